@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Script de benchmark des transformations sur des sites synthétiques.
+Génère dans un dossier temporaire des arborescences prix-m2-a-*/index.html de
+plusieurs tailles (600 à 50 000 pages) à partir des vraies pages de ville, puis
+mesure chaque transformation et la chaîne complète: temps total, pages/s,
+pic de mémoire (RSS) et percentiles de latence par page. Les assets du site réel
+sont copiés dans chaque site généré, qui passe par les mêmes étapes préparatoires
+que build_site.py (variantes d'images, feuille de style partagée, assets hashés...):
+le site réel doit avoir été reconstruit pour que ses variantes d'images soient
+reprises. Les résultats sont enregistrés en JSON et comparés à une référence pour
+signaler les régressions (code de sortie 1) et les croissances non linéaires d'une
+taille à l'autre.
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import build_site
+import city_dataset
+import city_search
+import price_lookup
+import hoist_styles
+import responsive_images
+import fingerprint_assets
+from build_manifest import build_path
+from city_template import FAQ_BLOCK
+from source_pages import read_source_page
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+DEFAULT_SIZES = [600, 2000, 10000, 50000]
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+REGRESSION_THRESHOLD = 0.20  # 20% plus lent que la référence
+GROWTH_THRESHOLD = 2.0       # temps par page multiplié par 2 entre la plus petite et la plus grande taille
+MIN_SECONDS = 0.1            # en dessous, la mesure n'est que du bruit
+
+CITY_LINK_PATTERN = re.compile(r'prix-m2-a-([a-z0-9-]+)/')
+
+# Assets du site réel copiés dans chaque site généré (images, feuilles de style, scripts)
+ASSET_DIRS = ["wp-content", "wp-includes"]
+
+def load_seed_pages(site_dir):
+    """Pages de ville réelles servant de modèles ({slug: contenu sans FAQ})"""
+    seeds = {}
+    for filepath in sorted(glob.glob(os.path.join(site_dir, "prix-m2-a-*/index.html"))):
+        slug = os.path.basename(os.path.dirname(filepath)).replace("prix-m2-a-", "")
+        # Pages telles qu'exportées avant l'ajout de la FAQ: les scripts ont du travail
+        content = read_source_page(site_dir, os.path.relpath(filepath, site_dir))
+        seeds[slug] = FAQ_BLOCK.sub('', content)
+    return seeds
+
+def generate_site(seeds, size, target_dir):
+    """Écrit `size` pages de ville: copies numérotées des pages modèles.
+
+    Dans la copie k, la page et ses liens vers les communes voisines pointent
+    vers les dossiers de la même copie (prix-m2-a-<ville>-k/): les liens restent valides.
+    """
+    slugs = list(seeds)
+    for i in range(size):
+        copy, index = divmod(i, len(slugs))
+        seed_slug = slugs[index]
+        content = seeds[seed_slug]
+        suffix = f"-{copy}" if copy else ""
+        if copy:
+            def rename(match):
+                if match.group(1) in seeds:
+                    return f'prix-m2-a-{match.group(1)}{suffix}/'
+                return match.group(0)
+            content = CITY_LINK_PATTERN.sub(rename, content)
+        folder = os.path.join(target_dir, f"prix-m2-a-{seed_slug}{suffix}")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, "index.html"), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+def copy_assets(site_dir, target_dir):
+    """Copie les assets du site réel et l'index de ses variantes d'images (déjà encodées
+    par build_site.py: l'encodage n'est pas mesuré)"""
+    for name in ASSET_DIRS:
+        source = os.path.join(site_dir, name)
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(target_dir, name), dirs_exist_ok=True)
+    index = build_path(site_dir, responsive_images.INDEX_FILE)
+    if os.path.exists(index):
+        os.makedirs(build_path(target_dir), exist_ok=True)
+        shutil.copy2(index, build_path(target_dir, responsive_images.INDEX_FILE))
+
+def peak_rss_mb():
+    """Pic de mémoire du processus (Mo)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sous macOS, en Ko sous Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def percentiles(values):
+    """Percentiles p50/p90/p99/max d'une liste de durées (ms)"""
+    if not values:
+        return {'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'max': 0.0}
+    values = sorted(values)
+    def pick(q):
+        return values[min(len(values) - 1, int(q * len(values)))] * 1000
+    return {'p50': pick(0.50), 'p90': pick(0.90), 'p99': pick(0.99), 'max': values[-1] * 1000}
+
+def summarize(latencies, seconds, pages):
+    """Mesures d'une étape"""
+    return {
+        'seconds': seconds,
+        'pages_per_s': pages / seconds if seconds else 0.0,
+        'latency_ms': percentiles(latencies),
+    }
+
+def run_size(seeds, size, work_dir, assets_dir):
+    """Génère un site de `size` pages et mesure chaque étape (dans un processus dédié)"""
+    site_dir = os.path.join(work_dir, f"site-{size}")
+    start = time.perf_counter()
+    generate_site(seeds, size, site_dir)
+    copy_assets(assets_dir, site_dir)
+    generate_seconds = time.perf_counter() - start
+
+    try:
+        steps = {}
+
+        # Extraction du jeu de données (première passe, sans cache)
+        start = time.perf_counter()
+        dataset = city_dataset.refresh_city_dataset(site_dir)
+        steps['city_dataset'] = summarize([], time.perf_counter() - start, size)
+
+        # Mêmes étapes préparatoires que build_site.run_pipeline: sans elles, responsive_images,
+        # hoist_styles et fingerprint_assets ne font rien et le CSS critique porte sur des
+        # pages dont les styles ne sont pas regroupés
+        start = time.perf_counter()
+        images, _ = responsive_images.prepare_images(site_dir, encode=False)
+        styles = hoist_styles.prepare_styles(site_dir, build_site.collect_pages(site_dir))
+        search = city_search.prepare_search_index(site_dir, dataset)
+        price_table = price_lookup.prepare_price_table(site_dir, dataset)
+        assets = fingerprint_assets.prepare_assets(site_dir)
+        steps['prepare'] = summarize([], time.perf_counter() - start, size)
+
+        wp_ids = {record['path']: record['wp_id'] for record in dataset.values()}
+        start = time.perf_counter()
+        context = build_site.build_context(site_dir, wp_ids, dataset, images, styles, assets, search, price_table)
+        steps['build_context'] = summarize([], time.perf_counter() - start, size)
+
+        # Chaque page est lue puis passe par toutes les transformations, dans l'ordre
+        transforms = [t for t in build_site.TRANSFORMS if t['applies_to']('prix-m2-a-x/index.html')]
+        latencies = {t['name']: [] for t in transforms}
+        chain = []
+        for rel_path in sorted(record['path'] for record in dataset.values()):
+            with open(os.path.join(site_dir, rel_path), 'r', encoding='utf-8') as f:
+                content = f.read()
+            page_start = time.perf_counter()
+            for t in transforms:
+                t_start = time.perf_counter()
+                content = t['func'](content, rel_path, context)
+                latencies[t['name']].append(time.perf_counter() - t_start)
+            chain.append(time.perf_counter() - page_start)
+
+        for t in transforms:
+            steps[t['name']] = summarize(latencies[t['name']], sum(latencies[t['name']]), size)
+        steps['chain'] = summarize(chain, sum(chain), size)
+
+        return {'pages': size, 'generate_seconds': generate_seconds,
+                'peak_rss_mb': peak_rss_mb(), 'steps': steps}
+    finally:
+        shutil.rmtree(site_dir, ignore_errors=True)
+
+def run_benchmark(site_dir, sizes):
+    """Mesure toutes les tailles; chaque taille tourne dans un nouveau processus (RSS isolé)"""
+    seeds = load_seed_pages(site_dir)
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="estimation-bench-")
+    try:
+        for size in sizes:
+            print(f"   {size} pages...", flush=True)
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                results[str(size)] = pool.submit(run_size, seeds, size, work_dir, site_dir).result()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'seeds': len(seeds),
+        'sizes': results,
+    }
+
+def find_regressions(report, baseline, threshold=REGRESSION_THRESHOLD):
+    """Étapes plus lentes que la référence (par taille)"""
+    regressions = []
+    for size, result in report['sizes'].items():
+        base = baseline.get('sizes', {}).get(size)
+        if not base:
+            continue
+        for step, measure in result['steps'].items():
+            base_measure = base['steps'].get(step)
+            if not base_measure or max(base_measure['seconds'], measure['seconds']) < MIN_SECONDS:
+                continue
+            ratio = measure['seconds'] / base_measure['seconds']
+            if ratio > 1 + threshold:
+                regressions.append((size, step, ratio))
+    return regressions
+
+def find_nonlinear_growth(report, threshold=GROWTH_THRESHOLD):
+    """Étapes dont le temps par page augmente avec la taille du site"""
+    sizes = sorted(report['sizes'], key=int)
+    if len(sizes) < 2:
+        return []
+    small, large = report['sizes'][sizes[0]], report['sizes'][sizes[-1]]
+    growth = []
+    for step, measure in large['steps'].items():
+        small_measure = small['steps'].get(step)
+        if not small_measure or min(small_measure['seconds'], measure['seconds']) < MIN_SECONDS:
+            continue
+        per_page_small = small_measure['seconds'] / small['pages']
+        per_page_large = measure['seconds'] / large['pages']
+        ratio = per_page_large / per_page_small
+        if ratio > threshold:
+            growth.append((step, ratio))
+    return growth
+
+def print_report(report):
+    """Affiche les mesures par taille"""
+    for size, result in report['sizes'].items():
+        print(f"\n📊 {size} pages (pic RSS {result['peak_rss_mb']:.0f} Mo, génération {result['generate_seconds']:.1f} s)")
+        for step, measure in result['steps'].items():
+            latency = measure['latency_ms']
+            print(f"   {step:<26} {measure['seconds']:>8.2f} s  {measure['pages_per_s']:>9.0f} pages/s"
+                  f"  p50 {latency['p50']:>6.2f}  p90 {latency['p90']:>6.2f}  p99 {latency['p99']:>6.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des transformations sur des sites synthétiques")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="site réel dont les pages de ville servent de modèles")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="tailles des sites générés (ex: 600,2000,10000,50000)")
+    parser.add_argument('--output', help="fichier JSON des résultats")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="résultats de référence (JSON)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="enregistre ces résultats comme nouvelle référence")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="ralentissement toléré par rapport à la référence (0.2 = 20%%)")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+
+    print(f"🔧 Benchmark sur des sites synthétiques ({', '.join(map(str, sizes))} pages)...")
+
+    report = run_benchmark(args.site_dir, sizes)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Résultats enregistrés dans {args.output}")
+
+    for step, ratio in find_nonlinear_growth(report):
+        print(f"  ⚠️ {step}: temps par page x{ratio:.1f} entre {min(sizes)} et {max(sizes)} pages (croissance non linéaire)")
+
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} régressions par rapport à la référence:")
+            for size, step, ratio in regressions:
+                print(f"     {size:>6} pages  {step:<26} x{ratio:.2f}")
+            # Code de sortie non nul: la CI échoue
+            sys.exit(1)
+        else:
+            print("\n✅ Aucune régression par rapport à la référence")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Référence enregistrée dans {args.baseline}")
+
+if __name__ == "__main__":
+    main()
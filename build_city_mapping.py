@@ -7,57 +7,46 @@ et corriger tous les liens dans le site.
 import os
 import re
 import glob
+from collections import Counter
+
+import page_writer
+from link_rewriter import compile_link_rules, rewrite_links, wp_link, print_hits
+from city_dataset import extract_wp_id, load_city_dataset
 
 SITE_DIR = "/Users/marc/Desktop/estimation-maison"
 
+# Pages principales dont l'ID WordPress est aussi mappé
+MAIN_PAGES = {
+    'estimation-maison': 'estimation-maison/index.html',
+    'estimation-appartement': 'estimation-appartement/index.html',
+    'estimation-bien-immobilier': 'estimation-bien-immobilier/index.html',
+    'estimation-par-ville': 'estimation-par-ville/index.html',
+    'prix-m2-par-province': 'prix-m2-par-province/index.html',
+    'a-propos': 'a-propos/index.html',
+    'mentions-legales': 'mentions-legales/index.html',
+    'politique-de-confidentialite': 'politique-de-confidentialite/index.html',
+}
+
 def extract_wp_id_from_page(filepath):
     """Extrait l'ID WordPress d'une page depuis son contenu"""
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Cherche le pattern ?p=XXX dans le canonical ou autres liens
-        match = re.search(r'\?p=(\d+)', content)
-        if match:
-            return match.group(1)
-        
-        # Cherche dans wp-json/wp/v2/pages/XXX
-        match = re.search(r'wp/v2/pages/(\d+)', content)
-        if match:
-            return match.group(1)
-            
-        return None
+            return extract_wp_id(f.read())
     except:
         return None
 
-def build_mapping():
+def build_mapping(site_dir=SITE_DIR):
     """Construit le mapping complet ID -> URL"""
     mapping = {}
     
-    # Parcourt toutes les pages prix-m2-a-*
-    for folder in glob.glob(os.path.join(SITE_DIR, "prix-m2-a-*")):
-        if os.path.isdir(folder):
-            index_file = os.path.join(folder, "index.html")
-            if os.path.exists(index_file):
-                wp_id = extract_wp_id_from_page(index_file)
-                if wp_id:
-                    folder_name = os.path.basename(folder)
-                    mapping[wp_id] = f"{folder_name}/index.html"
+    # Pages prix-m2-a-*: IDs déjà extraits dans le jeu de données des villes
+    for record in load_city_dataset(site_dir).values():
+        if record['wp_id']:
+            mapping[record['wp_id']] = record['path']
     
     # Ajoute les pages principales
-    main_pages = {
-        'estimation-maison': 'estimation-maison/index.html',
-        'estimation-appartement': 'estimation-appartement/index.html',
-        'estimation-bien-immobilier': 'estimation-bien-immobilier/index.html',
-        'estimation-par-ville': 'estimation-par-ville/index.html',
-        'prix-m2-par-province': 'prix-m2-par-province/index.html',
-        'a-propos': 'a-propos/index.html',
-        'mentions-legales': 'mentions-legales/index.html',
-        'politique-de-confidentialite': 'politique-de-confidentialite/index.html',
-    }
-    
-    for folder, url in main_pages.items():
-        index_file = os.path.join(SITE_DIR, folder, "index.html")
+    for folder, url in MAIN_PAGES.items():
+        index_file = os.path.join(site_dir, folder, "index.html")
         if os.path.exists(index_file):
             wp_id = extract_wp_id_from_page(index_file)
             if wp_id:
@@ -65,46 +54,55 @@ def build_mapping():
     
     return mapping
 
+def is_mapped_page(rel_path):
+    """Indique si l'ID WordPress de la page entre dans le mapping"""
+    return re.match(r'prix-m2-a-[^/]+/index\.html$', rel_path) is not None or rel_path in MAIN_PAGES.values()
+
+def build_mapping_from_ids(wp_ids):
+    """Construit le mapping ID -> URL depuis les IDs déjà extraits ({chemin relatif: ID})"""
+    mapping = {}
+    
+    city_pages = sorted(p for p in wp_ids if p not in MAIN_PAGES.values() and is_mapped_page(p))
+    main_pages = [url for url in MAIN_PAGES.values() if url in wp_ids]
+    
+    for rel_path in city_pages + main_pages:
+        wp_id = wp_ids[rel_path]
+        if wp_id:
+            mapping[wp_id] = rel_path
+    
+    return mapping
+
+def compile_wp_rules(mapping):
+    """Compile le mapping ID -> URL en règles index.html%3Fp=ID.html -> URL"""
+    return compile_link_rules({wp_link(wp_id): url for wp_id, url in mapping.items()})
+
+def fix_links_in_content(content, rules, prefix, hits=None):
+    """Remplace les liens index.html%3Fp=XXX.html du contenu d'une page"""
+    return rewrite_links(content, rules, prefix, hits)
+
 def fix_links_with_mapping(mapping):
-    """Corrige tous les liens dans tous les fichiers HTML"""
-    html_files = glob.glob(os.path.join(SITE_DIR, "**/*.html"), recursive=True)
+    """Corrige tous les liens dans tous les fichiers HTML (une transaction, page_writer);
+    renvoie (fichiers corrigés, id de l'instantané)"""
+    html_files = sorted(os.path.relpath(f, SITE_DIR)
+                        for f in glob.glob(os.path.join(SITE_DIR, "**/*.html"), recursive=True))
     
-    fixed_count = 0
+    rules = compile_wp_rules(mapping)
+    hits = Counter()
+    
+    def rewrite(rel_path, content):
+        # Calcule le préfixe relatif
+        depth = rel_path.count(os.sep)
+        prefix = "../" * depth if depth > 0 else ""
+        
+        # Remplace tous les liens index.html%3Fp=XXX.html
+        return fix_links_in_content(content, rules, prefix, hits)
     
-    for filepath in html_files:
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            original = content
-            
-            # Calcule le préfixe relatif
-            rel_path = os.path.relpath(filepath, SITE_DIR)
-            depth = rel_path.count(os.sep)
-            prefix = "../" * depth if depth > 0 else ""
-            
-            # Remplace tous les liens index.html%3Fp=XXX.html
-            for wp_id, url in mapping.items():
-                old_patterns = [
-                    f'href="../index.html%3Fp={wp_id}.html"',
-                    f"href='../index.html%3Fp={wp_id}.html'",
-                    f'href="index.html%3Fp={wp_id}.html"',
-                    f"href='index.html%3Fp={wp_id}.html'",
-                ]
-                for old in old_patterns:
-                    if old in content:
-                        content = content.replace(old, f'href="{prefix}{url}"')
-            
-            if content != original:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                fixed_count += 1
-                print(f"  ✅ {rel_path}")
-                
-        except Exception as e:
-            print(f"  ❌ {filepath}: {e}")
+    changed, snapshot = page_writer.rewrite_pages(SITE_DIR, html_files, rewrite)
+    for rel_path in changed:
+        print(f"  ✅ {rel_path}")
     
-    return fixed_count
+    print_hits(hits)
+    return changed, snapshot
 
 def main():
     print("🔍 Construction du mapping ID WordPress -> URL...")
@@ -112,8 +110,10 @@ def main():
     print(f"   {len(mapping)} pages mappées\n")
     
     print("🔧 Correction des liens...")
-    fixed = fix_links_with_mapping(mapping)
-    print(f"\n✅ {fixed} fichiers corrigés")
+    changed, snapshot = fix_links_with_mapping(mapping)
+    print(f"\n✅ {len(changed)} fichiers corrigés")
+    if changed:
+        print(f"   annuler: python3 page_writer.py --rollback {snapshot}")
 
 if __name__ == "__main__":
     main()
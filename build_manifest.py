@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Manifeste des builds incrémentaux.
+Pour chaque page (clé: chemin relatif), enregistre le hash d'entrée, le hash de sortie,
+la version de chaque transformation appliquée, le hash des données partagées qu'elles
+lisent et l'empreinte (mtime, taille) du fichier, afin qu'une nouvelle passe ne relise
+que les pages modifiées.
+"""
+
+import os
+import json
+import hashlib
+import inspect
+
+BUILD_DIR = ".build"
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 2
+
+def build_path(site_dir, *parts):
+    """Chemin d'un fichier de build (caches, manifestes) dans le site"""
+    return os.path.join(site_dir, BUILD_DIR, *parts)
+
+def content_hash(content):
+    """Hash du contenu d'une page"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def source_version(*objects):
+    """Version d'une transformation: hash du code source de ses fonctions et modules"""
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def data_hash(data):
+    """Hash stable d'une structure JSON (contexte partagé des transformations)"""
+    return content_hash(json.dumps(data, sort_keys=True, ensure_ascii=False))
+
+def file_stat(path):
+    """Empreinte rapide d'un fichier: [mtime_ns, taille]"""
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+def load_manifest(site_dir):
+    """Charge le manifeste (vide s'il n'existe pas ou n'est plus compatible)"""
+    try:
+        with open(build_path(site_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'version': MANIFEST_VERSION, 'context': None, 'pages': {}}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {'version': MANIFEST_VERSION, 'context': None, 'pages': {}}
+    return manifest
+
+def save_manifest(site_dir, manifest):
+    """Enregistre le manifeste (écriture dans un fichier temporaire puis renommage)"""
+    path = build_path(site_dir, MANIFEST_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
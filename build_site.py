@@ -0,0 +1,619 @@
+#!/usr/bin/env python3
+"""
+Script pour reconstruire le site en une seule passe.
+Chaque page HTML est lue une fois, toutes les transformations qui la concernent
+sont appliquées en mémoire dans l'ordre requis, puis la page est écrite une fois.
+Un manifeste (.build/manifest.json) permet de ne retraiter que les pages dont le
+contenu ou le code des transformations a changé (--force pour tout reconstruire).
+Avec --dry-run, rien n'est écrit: les différences sont affichées page par page
+(diff unifié) avec le nombre d'octets ajoutés/retirés par transformation.
+Avec --profile, le temps de chaque transformation, de chaque page et de chaque
+motif d'expression régulière est mesuré et exporté (JSON ou Chrome trace).
+Une fois écrites, les pages de ville sont relues comme pages sources: si l'une d'elles
+ne suit plus le modèle (templates/city_page.tmpl), le script se termine en erreur.
+"""
+
+import os
+import re
+import glob
+import sys
+import time
+import heapq
+import difflib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import fix_links
+import fix_all_links
+import build_city_mapping
+import fix_city_pages
+import fix_province_pages
+import fix_city_links
+import improve_city_pages
+import add_faq_to_cities
+import fix_faq_position
+import convert_faq_to_accordion
+import link_rewriter
+import city_index
+import city_template
+import city_dataset
+import link_graph
+import page_writer
+import profiler
+import responsive_images
+import hoist_styles
+import prune_scripts
+import critical_css
+import fingerprint_assets
+import precompress
+import sitemap
+import city_search
+import price_lookup
+import province_stats
+import city_neighbors
+from build_manifest import (content_hash, source_version, data_hash, file_stat,
+                            load_manifest, save_manifest)
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+CITY_PAGE_PATTERN = re.compile(r'prix-m2-a-[^/]+/index\.html$')
+HUB_PAGE = "estimation-par-ville/index.html"
+
+# Registre des transformations, dans l'ordre d'application
+TRANSFORMS = []
+
+def transform(name, applies_to, *modules, depends=None):
+    """Enregistre une transformation (l'ordre d'enregistrement est l'ordre d'application).
+
+    La version de la transformation est le hash du code de la fonction et des
+    modules dont elle dépend: modifier ce code invalide les pages concernées.
+    `depends(rel_path, context)` renvoie la partie des données partagées que la
+    transformation lit pour une page: seules les pages dont cette partie change
+    sont retraitées (et non tout le site).
+    """
+    def decorator(func):
+        TRANSFORMS.append({
+            'name': name,
+            'applies_to': applies_to,
+            'func': func,
+            'version': source_version(func, *modules),
+            'depends': depends,
+        })
+        return func
+    return decorator
+
+def is_any_page(rel_path):
+    """Toutes les pages HTML du site"""
+    return True
+
+def is_city_page(rel_path):
+    """Pages de villes (prix-m2-a-*/index.html)"""
+    return CITY_PAGE_PATTERN.match(rel_path) is not None
+
+def is_province_page(rel_path):
+    """Pages de provinces"""
+    return rel_path in fix_province_pages.PROVINCE_PAGES
+
+def is_main_page(rel_path):
+    """Pages principales (leur ID WordPress entre dans le mapping des liens)"""
+    return rel_path in build_city_mapping.MAIN_PAGES.values()
+
+def is_hub_page(rel_path):
+    """Page hub estimation-par-ville"""
+    return rel_path == HUB_PAGE
+
+def is_search_page(rel_path):
+    """Page hub et son doublon exporté (recherche de commune)"""
+    return rel_path in city_search.HUB_PAGES
+
+def is_simulator_page(rel_path):
+    """Page du simulateur"""
+    return rel_path == price_lookup.SIMULATOR_PAGE
+
+@transform('restore_assets', is_any_page, fingerprint_assets)
+def _restore_assets(content, rel_path, context):
+    # Liens vers les assets d'origine: ils sont hashés à nouveau en fin de chaîne
+    return fingerprint_assets.restore_assets(content, rel_path, context['asset_originals'])
+
+@transform('restore_stylesheets', is_any_page, critical_css)
+def _restore_stylesheets(content, rel_path, context):
+    # Retire le CSS critique en ligne: il est recalculé en fin de chaîne
+    return critical_css.restore_stylesheets(content)
+
+@transform('expand_styles', is_any_page, hoist_styles)
+def _expand_styles(content, rel_path, context):
+    # Les transformations suivantes travaillent sur les styles en ligne d'origine
+    return hoist_styles.expand_styles(content, context['style_index'])
+
+@transform('restore_images', is_any_page, responsive_images)
+def _restore_images(content, rel_path, context):
+    # <img> d'origine: les <picture> sont recalculés avec les variantes disponibles
+    return responsive_images.restore_images(content)
+
+@transform('fix_links', is_any_page, fix_links, link_rewriter)
+def _fix_links(content, rel_path, context):
+    return fix_links.fix_links_in_content(content, context['page_rules'])
+
+@transform('fix_all_links', is_any_page, fix_all_links, link_rewriter)
+def _fix_all_links(content, rel_path, context):
+    return fix_all_links.fix_links_in_content(content, fix_all_links.relative_prefix(rel_path))
+
+@transform('build_city_mapping', is_any_page, build_city_mapping, link_rewriter)
+def _build_city_mapping(content, rel_path, context):
+    prefix = fix_all_links.relative_prefix(rel_path)
+    return build_city_mapping.fix_links_in_content(content, context['wp_rules'], prefix)
+
+@transform('fix_city_pages', is_city_page, fix_city_pages, city_index)
+def _fix_city_pages(content, rel_path, context):
+    return fix_city_pages.fix_city_page_content(content, context['city_index'])
+
+@transform('fix_province_pages', is_province_page, fix_province_pages, city_index)
+def _fix_province_pages(content, rel_path, context):
+    return fix_province_pages.fix_province_page_content(content, context['city_index'])
+
+def _province_stats_data(rel_path, context):
+    # Statistiques de la province et communes citées dans l'encadré
+    stats = context['province_stats']['provinces'].get(province_stats.province_page_slug(rel_path))
+    if stats is None:
+        return None
+    cited = [context['dataset'][stats[key]] for key in ('cheapest', 'priciest')]
+    return [stats, [[record['city_name'], record['price_eur']] for record in cited]]
+
+@transform('province_stats', is_province_page, province_stats, depends=_province_stats_data)
+def _province_stats(content, rel_path, context):
+    return province_stats.add_province_stats(content, rel_path, context['province_stats'], context['dataset'])
+
+@transform('fix_city_links', is_hub_page, fix_city_links, city_index)
+def _fix_city_links(content, rel_path, context):
+    return fix_city_links.fix_estimation_par_ville_content(content, context['city_index'])
+
+@transform('improve_city_pages', is_city_page, improve_city_pages)
+def _improve_city_pages(content, rel_path, context):
+    return improve_city_pages.improve_city_page_content(content)
+
+def _city_record(rel_path, context):
+    return context['city_records'].get(rel_path) or {}
+
+@transform('city_neighbors', is_city_page, city_neighbors, city_template,
+           depends=lambda rel_path, context: _city_record(rel_path, context).get('nearest'))
+def _city_neighbors(content, rel_path, context):
+    return city_neighbors.update_neighbor_list(content, context['city_records'].get(rel_path))
+
+def _faq_data(rel_path, context):
+    # Données de la page (le prix d'une commune change le rang des autres communes de sa
+    # province: leur FAQ est réécrite, pas celle des autres provinces)
+    record = _city_record(rel_path, context)
+    commune = context['province_stats']['communes'].get(record.get('slug'))
+    province = context['province_stats']['provinces'][commune['province']] if commune else None
+    return [{key: record.get(key) for key in ('city_name', 'price', 'province', 'neighbors', 'nearest')},
+            commune, province and [province['mean'], province['median']]]
+
+@transform('add_faq_to_cities', is_city_page, add_faq_to_cities, city_dataset, province_stats,
+           depends=_faq_data)
+def _add_faq_to_cities(content, rel_path, context):
+    return add_faq_to_cities.add_faq_to_page_content(content, context['city_records'].get(rel_path),
+                                                     context['province_stats'])
+
+@transform('fix_faq_position', is_city_page, fix_faq_position)
+def _fix_faq_position(content, rel_path, context):
+    return fix_faq_position.fix_faq_position_content(content)
+
+@transform('convert_faq_to_accordion', is_city_page, convert_faq_to_accordion)
+def _convert_faq_to_accordion(content, rel_path, context):
+    return convert_faq_to_accordion.convert_faq_to_accordion_content(content)
+
+@transform('city_search', is_search_page, city_search,
+           depends=lambda rel_path, context: context['search'] and context['search']['path'])
+def _city_search(content, rel_path, context):
+    return city_search.add_city_search(content, rel_path, context['search'])
+
+@transform('simulator', is_simulator_page, price_lookup,
+           depends=lambda rel_path, context: context['price_table'] and context['price_table']['path'])
+def _simulator(content, rel_path, context):
+    return price_lookup.add_simulator(content, rel_path, context['price_table'])
+
+@transform('responsive_images', is_any_page, responsive_images, link_graph)
+def _responsive_images(content, rel_path, context):
+    return responsive_images.rewrite_images(content, rel_path, context['images'])
+
+@transform('prune_scripts', is_any_page, prune_scripts)
+def _prune_scripts(content, rel_path, context):
+    return prune_scripts.prune_scripts(content)
+
+@transform('hoist_styles', is_any_page, hoist_styles)
+def _hoist_styles(content, rel_path, context):
+    return hoist_styles.hoist_styles(content, rel_path, context['styles'])
+
+@transform('critical_css', is_any_page, critical_css, prune_scripts)
+def _critical_css(content, rel_path, context):
+    # La feuille partagée vient de la passe (elle n'est pas sur le disque avec --dry-run)
+    styles = context['styles']
+    sources = {styles['stylesheet']: styles['css']} if styles else None
+    return critical_css.inline_critical_css(content, rel_path, context['site_dir'], sources)
+
+@transform('fingerprint_assets', is_any_page, fingerprint_assets)
+def _fingerprint_assets(content, rel_path, context):
+    return fingerprint_assets.fingerprint_assets(content, rel_path, context['assets'])
+
+def collect_pages(site_dir):
+    """Liste toutes les pages HTML du site (chemins relatifs, triés)"""
+    files = glob.glob(os.path.join(site_dir, "**/*.html"), recursive=True)
+    return sorted(os.path.relpath(f, site_dir) for f in files)
+
+def read_pages(site_dir, pages):
+    """Lit chaque page une seule fois ({chemin relatif: contenu})"""
+    contents = {}
+    for rel_path in pages:
+        with open(os.path.join(site_dir, rel_path), 'r', encoding='utf-8') as f:
+            contents[rel_path] = f.read()
+        if profiler.ACTIVE:
+            profiler.record_io('read', contents[rel_path])
+    return contents
+
+def build_context(site_dir, wp_ids, dataset, images=None, styles=None, assets=None, search=None, price_table=None):
+    """Prépare les données partagées par les transformations"""
+    page_mapping = fix_links.build_page_mapping()
+    wp_mapping = build_city_mapping.build_mapping_from_ids(wp_ids)
+    cities = city_index.get_available_cities(site_dir)
+    images = images or {}
+    # Seules les variantes disponibles et les largeurs mesurées changent le rendu des pages
+    # (pas le contenu des images)
+    variants = {source: [entry['width'], entry['height'], entry['variants'], entry.get('resized')]
+                for source, entry in images.items()}
+    return {
+        'page_rules': fix_links.compile_page_rules(page_mapping),
+        'wp_rules': build_city_mapping.compile_wp_rules(wp_mapping),
+        'city_index': city_index.build_city_index(cities),
+        'city_records': {record['path']: record for record in dataset.values()},
+        'dataset': dataset,
+        'province_stats': province_stats.compute_province_stats(dataset),
+        'site_dir': site_dir,
+        'images': images,
+        'styles': styles,
+        'style_index': {key: value for key, value in hoist_styles.load_index(site_dir).items()
+                        if key in ('classes', 'blocks')},
+        'assets': assets,
+        'asset_originals': fingerprint_assets.load_originals(site_dir),
+        'search': search,
+        'price_table': price_table,
+        # Toute modification de ces données invalide l'ensemble des pages (les données des
+        # villes, statistiques, index de recherche et table des prix: voir page_data)
+        'hash': data_hash([page_mapping, wp_mapping, cities, variants, styles and styles['stylesheet'],
+                           critical_css.stylesheets_version(site_dir), assets and assets['manifest']]),
+    }
+
+def transform_versions(rel_path):
+    """Versions des transformations qui s'appliquent à une page"""
+    return {t['name']: t['version'] for t in TRANSFORMS if t['applies_to'](rel_path)}
+
+def transform_data(t, rel_path, context):
+    """Hash des données partagées lues par une transformation pour une page (None sans dépendance)"""
+    return data_hash(t['depends'](rel_path, context)) if t['depends'] else None
+
+def page_data(rel_path, context):
+    """Hash des données partagées lues par les transformations d'une page"""
+    return data_hash({t['name']: transform_data(t, rel_path, context)
+                      for t in TRANSFORMS if t['depends'] and t['applies_to'](rel_path)})
+
+def new_stats():
+    """Compteurs par transformation"""
+    return {t['name']: {'pages': 0, 'modified': 0, 'added': 0, 'removed': 0, 'seconds': 0.0}
+            for t in TRANSFORMS}
+
+def apply_transforms(content, rel_path, context, stats):
+    """Applique en mémoire toutes les transformations qui concernent la page"""
+    for t in TRANSFORMS:
+        if not t['applies_to'](rel_path):
+            continue
+        counters = stats[t['name']]
+        if profiler.ACTIVE:
+            profiler.begin_transform(t['name'])
+        start = time.perf_counter()
+        new_content = t['func'](content, rel_path, context)
+        elapsed = time.perf_counter() - start
+        counters['seconds'] += elapsed
+        if profiler.ACTIVE:
+            profiler.record_transform(t['name'], rel_path, start, elapsed, content, new_content)
+        counters['pages'] += 1
+        if new_content != content:
+            counters['modified'] += 1
+            delta = len(new_content.encode('utf-8')) - len(content.encode('utf-8'))
+            if delta > 0:
+                counters['added'] += delta
+            else:
+                counters['removed'] -= delta
+            content = new_content
+    return content
+
+def merge_stats(total, stats):
+    """Additionne les compteurs d'une page (ou d'un worker) au total"""
+    for name, counters in stats.items():
+        for key, value in counters.items():
+            total[name][key] += value
+
+def process_page(rel_path, content, context):
+    """Transforme une page; renvoie (chemin, nouveau contenu ou None, compteurs, erreur)"""
+    stats = new_stats()
+    try:
+        new_content = apply_transforms(content, rel_path, context, stats)
+    except Exception as e:
+        return rel_path, None, stats, str(e)
+    return rel_path, (new_content if new_content != content else None), stats, None
+
+# Données en lecture seule partagées une fois par worker (voir --jobs)
+_worker_context = None
+
+def _init_worker(context):
+    global _worker_context
+    _worker_context = context
+
+def _process_page_in_worker(item):
+    rel_path, content = item
+    return process_page(rel_path, content, _worker_context)
+
+def iter_results(pages, contents, context, jobs):
+    """Transforme les pages en série ou réparties sur plusieurs processus, dans l'ordre"""
+    if jobs <= 1:
+        for rel_path in pages:
+            yield process_page(rel_path, contents[rel_path], context)
+        return
+
+    # Des lots de pages limitent les allers-retours entre processus
+    chunksize = max(1, len(pages) // (jobs * 4))
+    items = ((rel_path, contents[rel_path]) for rel_path in pages)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(context,)) as pool:
+        yield from pool.map(_process_page_in_worker, items, chunksize=chunksize)
+
+def write_diff(out, rel_path, old, new):
+    """Écrit le diff unifié d'une page (généré ligne à ligne)"""
+    for line in difflib.unified_diff(old.splitlines(keepends=True), new.splitlines(keepends=True),
+                                     fromfile=f"a/{rel_path}", tofile=f"b/{rel_path}"):
+        out.write(line)
+        if not line.endswith('\n'):
+            out.write('\n\\ No newline at end of file\n')
+
+def run_pipeline(site_dir=SITE_DIR, jobs=1, force=False, dry_run=False, diff_out=None, top=10):
+    """Lit, transforme et écrit une seule fois chaque page à reconstruire.
+
+    En mode dry_run, aucune page ni le manifeste ne sont écrits; le diff de chaque
+    page modifiée est écrit au fur et à mesure dans `diff_out` (si fourni).
+    """
+    pages = collect_pages(site_dir)
+    manifest = load_manifest(site_dir)
+    entries = {} if force else manifest['pages']
+    versions = {rel_path: transform_versions(rel_path) for rel_path in pages}
+    stats_on_disk = {rel_path: file_stat(os.path.join(site_dir, rel_path)) for rel_path in pages}
+
+    def is_up_to_date(rel_path):
+        entry = entries.get(rel_path)
+        return entry is not None and entry['transforms'] == versions[rel_path]
+
+    def has_same_data(rel_path):
+        return entries[rel_path]['data'] == data[rel_path]
+
+    # 1. Pages inchangées depuis la dernière passe: ni lues ni retraitées
+    fresh = {rel_path for rel_path in pages
+             if is_up_to_date(rel_path) and entries[rel_path]['stat'] == stats_on_disk[rel_path]}
+    contents = read_pages(site_dir, [p for p in pages if p not in fresh])
+
+    # 2. Contexte partagé: les données des villes viennent du jeu de données
+    #    (city_dataset), les IDs WordPress des pages principales du manifeste
+    dataset = city_dataset.refresh_city_dataset(site_dir, contents)
+    wp_ids = {record['path']: record['wp_id'] for record in dataset.values()}
+    wp_ids.update({p: entries[p]['wp_id'] for p in fresh if is_main_page(p)})
+    wp_ids.update({p: city_dataset.extract_wp_id(c) for p, c in contents.items() if is_main_page(p)})
+    # Variantes AVIF/WebP des images (encodées une fois, sur tous les cœurs)
+    images, encoded = responsive_images.prepare_images(site_dir, encode=not dry_run)
+    # Styles en ligne répétés: feuille de style partagée (comptés sur les pages du disque)
+    styles = hoist_styles.prepare_styles(site_dir, pages, contents, write=not dry_run)
+    # Index de recherche des communes du hub (nom hashé: listé dans _headers avec les assets)
+    search = city_search.prepare_search_index(site_dir, dataset, write=not dry_run)
+    # Table des prix des communes du simulateur (idem)
+    price_table = price_lookup.prepare_price_table(site_dir, dataset, write=not dry_run)
+    # Copies des assets nommées d'après leur contenu (après les variantes et la feuille partagée)
+    assets = fingerprint_assets.prepare_assets(site_dir, write=not dry_run)
+    context = build_context(site_dir, wp_ids, dataset, images, styles, assets, search, price_table)
+    if context['hash'] != manifest.get('context'):
+        contents.update(read_pages(site_dir, sorted(fresh)))
+        fresh = set()
+        entries = {}
+    # Pages dont les données lues (ville, statistiques de sa province...) ont changé
+    data = {rel_path: page_data(rel_path, context) for rel_path in pages}
+    stale = sorted(rel_path for rel_path in fresh if not has_same_data(rel_path))
+    contents.update(read_pages(site_dir, stale))
+    fresh.difference_update(stale)
+
+    # 3. Pages touchées mais dont le contenu est celui produit par la dernière passe
+    for rel_path, content in contents.items():
+        if (is_up_to_date(rel_path) and has_same_data(rel_path)
+                and entries[rel_path]['output'] == content_hash(content)):
+            entries[rel_path]['stat'] = stats_on_disk[rel_path]
+            fresh.add(rel_path)
+    to_process = [p for p in pages if p not in fresh]
+
+    stats = new_stats()
+    new_entries = {p: entries[p] for p in pages if p in fresh}
+    written = {}
+    errors = []
+    largest = []  # tas des `top` plus grosses modifications (octets, chemin)
+    tx = None  # écriture transactionnelle, démarrée à la première page modifiée
+    try:
+        for rel_path, content, page_stats, error in iter_results(to_process, contents, context, jobs):
+            merge_stats(stats, page_stats)
+            if error:
+                print(f"  ❌ {rel_path}: {error}")
+                errors.append((rel_path, error))
+                continue
+
+            original = contents[rel_path]
+            if content is not None and dry_run:
+                written[rel_path] = content
+                delta = len(content.encode('utf-8')) - len(original.encode('utf-8'))
+                heapq.heappush(largest, (abs(delta), rel_path, delta))
+                if len(largest) > top:
+                    heapq.heappop(largest)
+                if diff_out is not None:
+                    write_diff(diff_out, rel_path, original, content)
+                continue
+            if content is not None:
+                if tx is None:
+                    tx = page_writer.begin_transaction(site_dir)
+                page_writer.write_page(tx, rel_path, content)
+                written[rel_path] = content
+                if profiler.ACTIVE:
+                    profiler.record_io('written', content)
+            output = original if content is None else content
+            new_entries[rel_path] = {
+                'input': content_hash(original),
+                'output': content_hash(output),
+                'transforms': versions[rel_path],
+                'data': data[rel_path],
+                'wp_id': city_dataset.extract_wp_id(output) if is_main_page(rel_path) else None,
+                'stat': None,
+            }
+        if tx is not None:
+            page_writer.commit(tx)
+    except BaseException:
+        if tx is not None:
+            page_writer.abort(tx)
+            print(f"\n❌ Passe interrompue: annuler avec `python3 page_writer.py --rollback {tx['snapshot_id']}`")
+        raise
+
+    # Empreintes relevées une fois les pages en place
+    for rel_path in to_process:
+        if rel_path in new_entries:
+            new_entries[rel_path]['stat'] = file_stat(os.path.join(site_dir, rel_path))
+
+    if not dry_run:
+        save_manifest(site_dir, {'version': manifest['version'], 'context': context['hash'], 'pages': new_entries})
+        # Les pages écrites sont déjà en mémoire: le jeu de données n'aura pas à les relire.
+        # Relues comme pages sources, elles doivent toujours suivre le modèle des pages de ville
+        nonconforming = city_dataset.nonconforming_pages(city_dataset.refresh_city_dataset(site_dir, written))
+        # Sitemap: lastmod des pages dont le contenu a changé
+        sitemap_result = sitemap.update_sitemap(site_dir)
+        # Versions .gz/.br des pages et assets modifiés (une fois tout le reste écrit)
+        compressed = precompress.precompress_site(site_dir)
+    else:
+        nonconforming = None
+        sitemap_result = None
+        compressed = None
+
+    return {'pages': len(pages), 'processed': len(to_process), 'skipped': len(fresh),
+            'written': len(written), 'errors': errors, 'transforms': stats, 'dry_run': dry_run,
+            'images': {'sources': len(images), 'encoded': encoded},
+            'assets': len(assets['manifest']) if assets else 0,
+            'search': search,
+            'price_table': price_table,
+            'sitemap': sitemap_result,
+            'compressed': compressed,
+            'nonconforming': nonconforming,
+            'snapshot': tx['snapshot_id'] if tx is not None else None,
+            'largest': [(rel_path, delta) for _, rel_path, delta in sorted(largest, reverse=True)]}
+
+def print_summary(result):
+    """Affiche le résumé par transformation"""
+    print("📊 Résumé par transformation:")
+    for name, counters in result['transforms'].items():
+        print(f"   {name:<26} {counters['modified']:>4}/{counters['pages']:<4} pages modifiées"
+              f"  +{counters['added']:<8} -{counters['removed']:<8} octets"
+              f"  ({counters['seconds'] * 1000:.1f} ms)")
+
+    print(f"\n⏭️ {result['skipped']} pages inchangées ignorées")
+    images = result['images']
+    print(f"🔧 {images['sources']} images en AVIF/WebP ({images['encoded']} réencodées)")
+    if responsive_images.Image is None:
+        print("  ⚠️ Pillow n'est pas installé: les nouvelles images ne sont pas converties")
+    print(f"🔧 {result['assets']} assets avec un nom hashé (cache d'un an)")
+    if result['search'] is not None:
+        print(f"🔧 Recherche de communes: {result['search']['cities']} communes,"
+              f" index de {result['search']['size'] / 1024:.1f} Ko ({result['search']['path']})")
+    if result['price_table'] is not None:
+        print(f"🔧 Simulateur: prix de {result['price_table']['communes']} communes,"
+              f" table de {result['price_table']['size'] / 1024:.1f} Ko ({result['price_table']['path']})")
+    if result['sitemap'] is not None:
+        print(f"🔧 Sitemap: {result['sitemap']['urls']} URLs ({result['sitemap']['changed']} modifiées),"
+              f" {result['sitemap']['written']} fichiers réécrits")
+    compressed = result['compressed']
+    if compressed is not None:
+        print(f"🔧 {compressed['compressed']}/{compressed['files']} fichiers précompressés"
+              f" ({', '.join(precompress.available_encodings())})")
+        precompress.print_report(compressed)
+        if precompress.brotli is None:
+            print("  ⚠️ Le module brotli n'est pas installé: seuls les .gz sont écrits")
+    if result['dry_run']:
+        print(f"🔍 {result['written']}/{result['processed']} pages seraient modifiées (rien n'a été écrit)")
+        if result['largest']:
+            print("\n📊 Plus grosses modifications:")
+            for rel_path, delta in result['largest']:
+                print(f"   {delta:>+9} octets  {rel_path}")
+    else:
+        print(f"✅ {result['written']}/{result['processed']} pages retraitées écrites")
+    if result['errors']:
+        print(f"❌ {len(result['errors'])} erreurs")
+    if result['nonconforming']:
+        print(f"❌ {len(result['nonconforming'])} pages de ville ne suivent plus le modèle une fois construites: "
+              f"{', '.join(result['nonconforming'][:10])}")
+    if result['snapshot'] and (result['errors'] or result['written']):
+        print(f"   annuler cette passe: python3 page_writer.py --rollback {result['snapshot']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruit le site en une seule passe")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="racine du site exporté")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="nombre de processus (0 = tous les cœurs)")
+    parser.add_argument('--force', action='store_true',
+                        help="ignore le manifeste et retraite toutes les pages")
+    parser.add_argument('--check-links', action='store_true',
+                        help="vérifie les liens internes après la reconstruction")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="n'écrit rien, affiche les différences et leur taille")
+    parser.add_argument('--diff', metavar='FICHIER', default='-',
+                        help="avec --dry-run: destination des diffs ('-' = sortie standard, '' = aucun)")
+    parser.add_argument('--top', type=int, default=10,
+                        help="avec --dry-run: nombre de plus grosses modifications affichées")
+    parser.add_argument('--profile', metavar='FICHIER',
+                        help="mesure transformations, pages et expressions régulières, et les enregistre")
+    parser.add_argument('--profile-format', choices=['json', 'trace'], default='json',
+                        help="format du profil: JSON agrégé ou Chrome trace (chrome://tracing)")
+    args = parser.parse_args()
+    jobs = args.jobs or os.cpu_count()
+
+    if args.profile:
+        # Les mesures sont prises dans ce processus: pas de workers
+        if jobs > 1:
+            print("⚠️ --profile: reconstruction dans un seul processus")
+        jobs = 1
+        profiler.enable()
+
+    print(f"🔧 Reconstruction du site en une passe ({jobs} processus)...")
+
+    diff_out = None
+    if args.dry_run and args.diff:
+        diff_out = sys.stdout if args.diff == '-' else open(args.diff, 'w', encoding='utf-8')
+
+    start = time.perf_counter()
+    try:
+        result = run_pipeline(args.site_dir, jobs, args.force, args.dry_run, diff_out, args.top)
+    finally:
+        if diff_out not in (None, sys.stdout):
+            diff_out.close()
+    print(f"   {result['processed']}/{result['pages']} pages retraitées ({time.perf_counter() - start:.2f} s)\n")
+
+    print_summary(result)
+
+    if args.profile:
+        profiler.disable()
+        profiler.save(args.profile, args.profile_format, extra={
+            key: result[key] for key in ('pages', 'processed', 'skipped', 'written')})
+        profiler.print_hot_paths()
+        print(f"\n✅ Profil enregistré dans {args.profile}")
+
+    if args.check_links:
+        print("\n🔍 Vérification des liens du site...")
+        link_graph.print_report(link_graph.check_site_links(args.site_dir))
+
+    if result['nonconforming']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
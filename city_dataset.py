@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Jeu de données des villes, extrait une seule fois des pages prix-m2-a-*.
+Chaque page est analysée (nom, prix, prix par type de bien, province, communes
+voisines, ID WordPress) et stockée dans une base SQLite (.build/city_dataset.sqlite). Une page n'est
+réanalysée que si son empreinte (mtime, taille) puis son hash ont changé:
+les scripts interrogent ce jeu de quelques Ko au lieu de relire ~35 Mo de HTML.
+Les fragments extraits avec le modèle de page (city_template.py) y sont aussi
+stockés pour le rendu des pages (render_city_pages.py), ainsi que les communes
+voisines calculées à partir des coordonnées (city_neighbors.py).
+"""
+
+import os
+import re
+import glob
+import json
+import sqlite3
+
+from build_manifest import build_path, content_hash, file_stat, source_version
+from city_template import load_city_template, parse_city_body, CUSTOM_PAGES
+from hoist_styles import expand_styles
+from critical_css import restore_stylesheets
+from city_neighbors import load_neighbors, neighbors_version
+from fingerprint_assets import restore_assets
+from responsive_images import restore_images
+from source_pages import restore_source
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+DATASET_FILE = "city_dataset.sqlite"
+# Version du schéma (PRAGMA user_version): une base d'une autre version est reconstruite
+SCHEMA_VERSION = 2
+CITY_PAGE_GLOB = "prix-m2-a-*/index.html"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cities (
+    slug TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    city_name TEXT,
+    price TEXT,
+    price_eur INTEGER,
+    province TEXT NOT NULL,
+    neighbors TEXT NOT NULL,
+    wp_id TEXT,
+    fragments TEXT,
+    province_slug TEXT,
+    type_prices TEXT
+);
+CREATE TABLE IF NOT EXISTS neighbors (
+    slug TEXT PRIMARY KEY,
+    nearest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Mapping des provinces
+PROVINCE_MAPPING = {
+    'anvers': 'Anvers',
+    'antwerpen': 'Anvers',
+    'brabant flamand': 'Brabant flamand',
+    'brabant-flamand': 'Brabant flamand',
+    'brabant wallon': 'Brabant wallon',
+    'brabant-wallon': 'Brabant wallon',
+    'bruxelles': 'Bruxelles',
+    'flandre occidentale': 'Flandre occidentale',
+    'flandre-occidentale': 'Flandre occidentale',
+    'flandre orientale': 'Flandre orientale',
+    'flandre-orientale': 'Flandre orientale',
+    'hainaut': 'Hainaut',
+    'liege': 'Liège',
+    'liège': 'Liège',
+    'limbourg': 'Limbourg',
+    'luxembourg': 'Luxembourg',
+    'namur': 'Namur',
+}
+
+# Nom des provinces dans les pages (néerlandais, anglais, fautes) -> page de province
+PROVINCE_SLUGS = {
+    'anvers': 'anvers',
+    'antwerpen': 'anvers',
+    'antwerp': 'anvers',
+    'brabant-flamand': 'brabant-flamand',
+    'vlaams-brabant': 'brabant-flamand',
+    'flandre-brabant': 'brabant-flamand',
+    'brabant-wallon': 'brabant-wallon',
+    'bruxelles': 'bruxelles',
+    'bruxelles-capitale': 'bruxelles',
+    'flandre-occidentale': 'flandre-occidentale',
+    'west-vlaanderen': 'flandre-occidentale',
+    'flandre-orientale': 'flandre-orientale',
+    'oost-vlaanderen': 'flandre-orientale',
+    'hainaut': 'hainaut',
+    'liege': 'liege',
+    'limbourg': 'limbourg',
+    'limburg': 'limbourg',
+    'luxembourg': 'luxembourg',
+    'namur': 'namur',
+}
+# Nom affiché de chaque province (slug de sa page)
+PROVINCE_NAMES = {
+    'anvers': 'Anvers',
+    'brabant-flamand': 'Brabant flamand',
+    'brabant-wallon': 'Brabant wallon',
+    'bruxelles': 'Bruxelles',
+    'flandre-occidentale': 'Flandre occidentale',
+    'flandre-orientale': 'Flandre orientale',
+    'hainaut': 'Hainaut',
+    'liege': 'Liège',
+    'limbourg': 'Limbourg',
+    'luxembourg': 'Luxembourg',
+    'namur': 'Namur',
+}
+
+# Lien "Par province" du menu, pointé vers la province de la ville par fix_city_pages
+PROVINCE_MENU_PATTERN = re.compile(r'title="Par province" href="(?:\.\./)?prix-m2-([a-z-]+)/')
+# Encadrés maison (fa-home) et appartement (fa-building): prix moyen et fourchette
+TYPE_PRICE_PATTERN = re.compile(
+    r'fa-(home|building)\b[^>]*></i>(?:(?!</div>).)*?([\d\s]+?)\s*(?:€\s*)?/ m²</p>\s*'
+    r'<p[^>]*>Fourchette de prix:<br />\s*de ([\d\s]+?)\s*€ à ([\d\s]+?)\s*€', re.S)
+PROPERTY_TYPES = {'home': 'maison', 'building': 'appartement'}
+
+def extract_city_name(content):
+    """Extrait le nom de la ville depuis le H1"""
+    match = re.search(r'<h1[^>]*>Prix m² à ([^<]+)</h1>', content)
+    if match:
+        return match.group(1).strip()
+    return None
+
+def extract_price(content):
+    """Extrait le prix moyen au m² (None si la page n'en affiche pas)"""
+    match = re.search(r'prix moyen au m² à [^p]+ pour tous les types de biens est de ([\d\s]+) €', content, re.IGNORECASE)
+    if match:
+        return match.group(1).strip().replace(' ', ' ')
+    # Fallback: chercher dans les encadrés
+    match = re.search(r'<p style="font-size: 80px[^>]*>([\d\s]+) € / m²</p>', content)
+    if match:
+        return match.group(1).strip()
+    return None
+
+def extract_province(content):
+    """Extrait le nom de la province"""
+    match = re.search(r'province (?:de |d&rsquo;|d\')([A-Za-zéè\-]+)', content, re.IGNORECASE)
+    if match:
+        province_raw = match.group(1).strip().lower().replace('.', '')
+        if province_raw in PROVINCE_MAPPING:
+            return PROVINCE_MAPPING[province_raw]
+        return match.group(1).strip()
+    return "la province"
+
+def extract_province_slug(content):
+    """Province de la ville (slug de sa page prix-m2-<province>), ou None"""
+    match = PROVINCE_MENU_PATTERN.search(content)
+    if match and match.group(1) in PROVINCE_NAMES:
+        return match.group(1)
+    match = re.search(r'province (?:de |d&rsquo;|d\')([A-Za-zéèÉ\- ]+?)[.,<]', content, re.IGNORECASE)
+    if match:
+        name = re.sub(r'[^a-z]+', '-', match.group(1).lower().replace('è', 'e').replace('é', 'e')).strip('-')
+        return PROVINCE_SLUGS.get(name)
+    return None
+
+def extract_type_prices(content):
+    """Prix au m² par type de bien: {'maison': [moyen, min, max], 'appartement': [...]}"""
+    prices = {}
+    for icon, price, low, high in TYPE_PRICE_PATTERN.findall(content):
+        figures = [parse_price(price), parse_price(low), parse_price(high)]
+        if None not in figures:
+            prices.setdefault(PROPERTY_TYPES[icon], figures)
+    return prices
+
+def extract_neighbors(content):
+    """Extrait les noms des communes voisines"""
+    neighbors = []
+    # Pattern pour les liens vers communes voisines
+    pattern = r'<a href="\.\./prix-m2-a-[^/]+/"[^>]*>([^<]+)</a>'
+    matches = re.findall(pattern, content)
+    for m in matches[:3]:  # Max 3 voisines
+        neighbors.append(m.strip())
+    return neighbors
+
+def extract_wp_id(content):
+    """Extrait l'ID WordPress depuis le contenu d'une page"""
+    # Cherche le pattern ?p=XXX dans le canonical ou autres liens
+    match = re.search(r'\?p=(\d+)', content)
+    if match:
+        return match.group(1)
+    
+    # Cherche dans wp-json/wp/v2/pages/XXX
+    match = re.search(r'wp/v2/pages/(\d+)', content)
+    if match:
+        return match.group(1)
+        
+    return None
+
+def parse_price(price):
+    """Convertit un prix affiché ("2 216") en entier (2216)"""
+    digits = re.sub(r'\D', '', price or '')
+    return int(digits) if digits else None
+
+def extract_city_record(content):
+    """Extrait toutes les données d'une page de ville en une fois"""
+    price = extract_price(content)
+    return {
+        'city_name': extract_city_name(content),
+        'price': price,
+        'price_eur': parse_price(price),
+        'province': extract_province(content),
+        'neighbors': extract_neighbors(content),
+        'wp_id': extract_wp_id(content),
+        'fragments': parse_city_body(content),
+        'province_slug': extract_province_slug(content),
+        'type_prices': extract_type_prices(content),
+    }
+
+def dataset_version():
+    """Version de l'extraction: code des extracteurs et modèle de page"""
+    return source_version(extract_city_record, extract_city_name, extract_price, extract_province,
+                          extract_neighbors, extract_wp_id, parse_city_body,
+                          extract_province_slug, extract_type_prices,
+                          restore_source, expand_styles, restore_stylesheets,
+                          restore_assets, restore_images) + load_city_template()['version']
+
+def _row_to_record(row):
+    (slug, path, city_name, price, price_eur, province, neighbors, wp_id, fragments, province_slug, type_prices,
+     nearest) = row
+    nearest = json.loads(nearest) if nearest else None
+    # Les communes les plus proches remplacent les voisines citées par la page
+    neighbors = [name for neighbor, name, distance in nearest] if nearest else json.loads(neighbors)
+    return {
+        'slug': slug,
+        'path': path,
+        'city_name': city_name,
+        'price': price,
+        'price_eur': price_eur,
+        'province': province,
+        'neighbors': neighbors,
+        'nearest': nearest,
+        'wp_id': wp_id,
+        'fragments': json.loads(fragments) if fragments else None,
+        'province_slug': province_slug,
+        'type_prices': json.loads(type_prices),
+    }
+
+def open_city_dataset(site_dir):
+    """Ouvre (et crée si besoin) la base du jeu de données"""
+    path = build_path(site_dir, DATASET_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        conn.executescript("DROP TABLE IF EXISTS cities; DROP TABLE IF EXISTS neighbors; "
+                           "DROP TABLE IF EXISTS meta;")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.executescript(SCHEMA)
+
+    # Les enregistrements extraits par une autre version sont réanalysés
+    version = dataset_version()
+    row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    if row is None or row[0] != version:
+        conn.execute("DELETE FROM cities")
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+        conn.commit()
+    return conn
+
+def refresh_city_dataset(site_dir=SITE_DIR, contents=None):
+    """Met à jour le jeu de données et le renvoie ({slug: enregistrement}).
+
+    Seules les pages dont l'empreinte a changé sont relues; `contents`
+    ({chemin relatif: contenu}) évite de relire une page déjà en mémoire.
+    """
+    contents = contents or {}
+    conn = open_city_dataset(site_dir)
+    try:
+        known = {slug: (mtime_ns, size, h) for slug, mtime_ns, size, h
+                 in conn.execute("SELECT slug, mtime_ns, size, hash FROM cities")}
+
+        seen = set()
+        for filepath in glob.glob(os.path.join(site_dir, CITY_PAGE_GLOB)):
+            rel_path = os.path.relpath(filepath, site_dir)
+            slug = os.path.basename(os.path.dirname(filepath)).replace("prix-m2-a-", "")
+            seen.add(slug)
+            mtime_ns, size = file_stat(filepath)
+
+            row = known.get(slug)
+            if row and row[:2] == (mtime_ns, size):
+                continue
+
+            content = contents.get(rel_path)
+            if content is None:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            page_hash = content_hash(content)
+
+            if row and row[2] == page_hash:
+                conn.execute("UPDATE cities SET mtime_ns = ?, size = ? WHERE slug = ?",
+                             (mtime_ns, size, slug))
+                continue
+
+            # Les pages publiées ont leurs styles regroupés et leurs assets hashés: les
+            # originaux sont rétablis avant l'analyse
+            record = extract_city_record(restore_source(content, rel_path, site_dir))
+            conn.execute(
+                "INSERT OR REPLACE INTO cities VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (slug, rel_path, mtime_ns, size, page_hash, record['city_name'], record['price'],
+                 record['price_eur'], record['province'], json.dumps(record['neighbors'], ensure_ascii=False),
+                 record['wp_id'], json.dumps(record['fragments'], ensure_ascii=False) if record['fragments'] else None,
+                 record['province_slug'], json.dumps(record['type_prices'])))
+
+        for slug in set(known) - seen:
+            conn.execute("DELETE FROM cities WHERE slug = ?", (slug,))
+        conn.commit()
+
+        records = load_city_records(conn)
+        if refresh_neighbors(conn, site_dir, records):
+            records = load_city_records(conn)
+        return records
+    finally:
+        conn.close()
+
+def refresh_neighbors(conn, site_dir, records):
+    """Recalcule les communes voisines si le fichier de coordonnées ou la liste des
+    villes a changé; renvoie True si elles ont été recalculées"""
+    version = neighbors_version(site_dir, records)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'neighbors'").fetchone()
+    if row is not None and row[0] == version:
+        return False
+    nearest = load_neighbors(site_dir, records)
+    conn.execute("DELETE FROM neighbors")
+    conn.executemany("INSERT INTO neighbors VALUES (?, ?)",
+                     [(slug, json.dumps(links, ensure_ascii=False)) for slug, links in nearest.items()])
+    conn.execute("INSERT OR REPLACE INTO meta VALUES ('neighbors', ?)", (version,))
+    conn.commit()
+    return True
+
+def load_city_records(conn):
+    """Lit tous les enregistrements ({slug: enregistrement}), triés par slug"""
+    rows = conn.execute(
+        "SELECT c.slug, path, city_name, price, price_eur, province, neighbors, wp_id, fragments, "
+        "province_slug, type_prices, n.nearest "
+        "FROM cities c LEFT JOIN neighbors n ON n.slug = c.slug ORDER BY c.slug")
+    return {row[0]: _row_to_record(row) for row in rows}
+
+def load_city_dataset(site_dir=SITE_DIR):
+    """Jeu de données à jour des villes ({slug: enregistrement})"""
+    return refresh_city_dataset(site_dir)
+
+def nonconforming_pages(dataset):
+    """Pages de ville qui devraient suivre le modèle mais dont l'extraction échoue"""
+    return [slug for slug, record in dataset.items() if record['fragments'] is None and slug not in CUSTOM_PAGES]
+
+def main():
+    print("🔍 Extraction du jeu de données des villes...")
+    
+    dataset = load_city_dataset(SITE_DIR)
+    
+    print(f"   {len(dataset)} villes dans {build_path(SITE_DIR, DATASET_FILE)}")
+    missing = [slug for slug, record in dataset.items() if not record['city_name']]
+    if missing:
+        print(f"  ⚠️ {len(missing)} pages sans nom de ville: {', '.join(missing[:10])}")
+
+if __name__ == "__main__":
+    main()
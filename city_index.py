@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Index partagé des villes disponibles (dossiers prix-m2-a-*).
+Construit une seule fois: noms normalisés (mis en cache), table d'alias
+(noms néerlandais / officiels -> dossier) et index de trigrammes pour trouver
+la meilleure correspondance d'un nom de ville sans parcourir toutes les villes.
+"""
+
+import os
+import re
+import glob
+from functools import lru_cache
+from unidecode import unidecode
+
+# Noms usuels -> nom du dossier (prix-m2-a-<nom>)
+CITY_ALIASES = {
+    'aalst': 'alost',
+    'antwerpen': 'anvers',
+    'baarle-hertog': 'baarle-duc',
+    'borgloon': 'looz',
+    'brugge': 'bruges',
+    'brussel': 'bruxelles-ville',
+    'bruxelles': 'bruxelles-ville',
+    'de-panne': 'la-panne',
+    'dendermonde': 'termonde',
+    'diksmuide': 'dixmude',
+    'galmaarden': 'gammerages',
+    'gent': 'gand',
+    'geraardsbergen': 'grammont',
+    'ieper': 'ypres',
+    'kortrijk': 'courtrai',
+    'leopoldsburg': 'bourg-leopold',
+    'leuven': 'louvain',
+    'mechelen': 'malines',
+    'menen': 'menin',
+    'mesen': 'messines',
+    'nieuwpoort': 'nieuport',
+    'oostende': 'ostende',
+    'oudenaarde': 'audenarde',
+    'roeselare': 'roulers',
+    'ronse': 'renaix',
+    'scherpenheuvel-zichem': 'montaigu',
+    'sint-genesius-rode': 'rhode-saint-genese',
+    'sint-niklaas': 'saint-nicolas',
+    'sint-truiden': 'saint-trond',
+    'temse': 'tamise',
+    'tienen': 'tirlemont',
+    'tongeren': 'tongres',
+    'veurne': 'furnes',
+    'vilvoorde': 'vilvorde',
+    'voeren': 'fourons',
+    'zoutleeuw': 'leau',
+}
+
+NGRAM = 3
+
+# En dessous, une correspondance partielle n'est pas retenue (lien laissé tel quel):
+# seuls les noms alignés sur les tirets l'atteignent (voir match_score)
+MIN_SCORE = 0.5
+
+@lru_cache(maxsize=65536)
+def normalize_city_name(name):
+    """Normalise le nom d'une ville pour le matcher avec le dossier"""
+    # Enlève les accents
+    name = unidecode(name.lower())
+    # Remplace les espaces et caractères spéciaux par des tirets
+    name = re.sub(r'[^a-z0-9]+', '-', name)
+    # Enlève les tirets en début/fin
+    name = name.strip('-')
+    return name
+
+def get_available_cities(site_dir):
+    """Récupère la liste des villes disponibles"""
+    cities = {}
+    for folder in sorted(glob.glob(os.path.join(site_dir, "prix-m2-a-*"))):
+        if os.path.isdir(folder):
+            folder_name = os.path.basename(folder)
+            # Extrait le nom de la ville (après "prix-m2-a-")
+            city_name = folder_name.replace("prix-m2-a-", "")
+            cities[city_name] = f"{folder_name}/index.html"
+    return cities
+
+def ngrams(text):
+    """Trigrammes d'un nom normalisé"""
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+def build_city_index(cities):
+    """Construit l'index à partir du dictionnaire {ville: url}"""
+    postings = {}
+    for city_key in cities:
+        for gram in ngrams(city_key):
+            postings.setdefault(gram, set()).add(city_key)
+
+    aliases = {alias: key for alias, key in CITY_ALIASES.items() if key in cities}
+    return {'cities': cities, 'aliases': aliases, 'ngrams': postings}
+
+def _candidates(index, normalized):
+    """Villes dont le nom contient la requête, ou contenues dans la requête"""
+    cities = index['cities']
+    found = set()
+
+    # Villes contenues dans la requête: chaque sous-chaîne est une recherche O(1)
+    length = len(normalized)
+    for start in range(length):
+        for end in range(start + 1, length + 1):
+            if normalized[start:end] in cities:
+                found.add(normalized[start:end])
+
+    # Villes contenant la requête: intersection des listes de trigrammes
+    grams = ngrams(normalized)
+    if grams:
+        postings = sorted((index['ngrams'].get(g, set()) for g in grams), key=len)
+        matches = set.intersection(*postings) if postings[0] else set()
+        found.update(key for key in matches if normalized in key)
+
+    return found
+
+def match_score(normalized, city_key):
+    """Confiance d'une correspondance partielle (1.0 = identique)"""
+    shorter, longer = sorted((normalized, city_key), key=len)
+    score = len(shorter) / len(longer)
+    # Une correspondance alignée sur les tirets est fiable (ex: "la-louviere"); au milieu
+    # d'un mot, c'est presque toujours une autre commune ("gas" -> "as", "eke" -> "jabbeke")
+    if f'-{shorter}-' in f'-{longer}-':
+        return (1 + score) / 2
+    return score / 2
+
+def find_city(index, name):
+    """Trouve la page d'une ville: renvoie (url, score), ou (None, score) si aucune
+    correspondance n'atteint MIN_SCORE"""
+    cities = index['cities']
+    normalized = normalize_city_name(name)
+    if not normalized:
+        return None, 0.0
+
+    if normalized in cities:
+        return cities[normalized], 1.0
+
+    alias = index['aliases'].get(normalized)
+    if alias is None and normalized.startswith('sint-'):
+        alias = 'saint-' + normalized[len('sint-'):]
+    if alias in cities:
+        return cities[alias], 1.0
+
+    candidates = _candidates(index, normalized)
+    if not candidates:
+        return None, 0.0
+
+    ranked = sorted(((match_score(normalized, key), key) for key in candidates), key=lambda x: (-x[0], x[1]))
+    best_score, best_key = ranked[0]
+    if best_score < MIN_SCORE:
+        print(f"  ⚠️ Correspondance trop faible pour {name}: {best_key} ({best_score:.2f}), lien non modifié")
+        return None, best_score
+    if len(ranked) > 1 and ranked[1][0] == best_score:
+        others = ', '.join(key for score, key in ranked[1:] if score == best_score)
+        print(f"  ⚠️ Correspondance ambiguë pour {name}: {best_key} retenu (aussi: {others})")
+    return cities[best_key], best_score
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Script pour calculer les communes voisines de chaque ville à partir des coordonnées
+de son centre (data/communes_centroides.csv dans le site).
+Les listes « communes avoisinantes » exportées par WordPress sont incomplètes: de
+zéro à huit communes, parfois la ville elle-même, et des liens vers des ID
+(index.html%3Fp=) au lieu des pages. Le fichier de coordonnées est lu une fois
+(plusieurs lignes par commune, une par rue par exemple, sont moyennées), un arbre
+k-d est construit sur les centres et les communes les plus proches de toutes les
+villes sont obtenues en une seule requête groupée.
+
+Le résultat est stocké dans le jeu de données (city_dataset): il n'est recalculé que
+si le fichier ou la liste des villes change, et les pages de ville (liste des
+communes avoisinantes, FAQ) l'utilisent à la place des liens exportés.
+SciPy (cKDTree) est utilisé s'il est installé; sinon l'arbre est construit en Python.
+"""
+
+import os
+import csv
+import html
+import math
+import time
+import heapq
+import argparse
+
+from build_manifest import data_hash, file_stat, source_version
+from city_index import CITY_ALIASES, normalize_city_name
+from city_template import render_neighbors
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+CENTROIDS_FILE = os.path.join("data", "communes_centroides.csv")
+# Nombre de communes voisines par ville (trois par ligne dans la page)
+NEIGHBOR_COUNT = 6
+# Kilomètres par degré de latitude
+KM_PER_DEGREE = 111.2
+
+# Colonnes reconnues dans le fichier (la première trouvée est utilisée)
+CENTROID_COLUMNS = {
+    'slug': ('slug',),
+    'name': ('commune', 'nom', 'name', 'gemeente'),
+    'lat': ('latitude', 'lat'),
+    'lon': ('longitude', 'lon', 'lng'),
+}
+
+def centroids_path(site_dir):
+    """Chemin du fichier de coordonnées d'un site"""
+    return os.path.join(site_dir, CENTROIDS_FILE)
+
+def city_label(record):
+    """Nom affiché d'une ville (nom du H1, sinon d'après le dossier)"""
+    return record['city_name'] or record['slug'].replace('-', ' ').title()
+
+def city_keys(dataset):
+    """Noms normalisés -> slug: dossiers, noms des pages (entités HTML décodées:
+    Braine-l&rsquo;Alleud) et alias néerlandais"""
+    keys = {alias: slug for alias, slug in CITY_ALIASES.items() if slug in dataset}
+    for slug, record in dataset.items():
+        if record['city_name']:
+            keys[normalize_city_name(html.unescape(record['city_name']))] = slug
+    keys.update((slug, slug) for slug in dataset)
+    return keys
+
+def read_centroids(path, keys):
+    """Lit le fichier CSV: ({slug: (lat, lon)}, noms non reconnus).
+
+    Les lignes d'une même commune sont moyennées: le fichier peut donner un point
+    par commune ou un point par rue.
+    """
+    sums = {}
+    unmatched = set()
+    resolved = {}
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = [column.strip().lower() for column in next(reader, [])]
+        columns = {role: next((header.index(name) for name in names if name in header), None)
+                   for role, names in CENTROID_COLUMNS.items()}
+        key_column = columns['slug'] if columns['slug'] is not None else columns['name']
+        if key_column is None or columns['lat'] is None or columns['lon'] is None:
+            raise ValueError(f"colonnes attendues: commune (ou slug), latitude, longitude; "
+                             f"trouvées: {', '.join(header)}")
+        lat_column, lon_column = columns['lat'], columns['lon']
+
+        for row in reader:
+            try:
+                name = row[key_column]
+                lat = float(row[lat_column])
+                lon = float(row[lon_column])
+            except (IndexError, ValueError):
+                continue
+            # Un même nom revient sur chaque ligne de la commune: normalisé une fois
+            slug = resolved.get(name)
+            if slug is None:
+                slug = resolved[name] = keys.get(normalize_city_name(name), '')
+            if not slug:
+                unmatched.add(name)
+                continue
+            entry = sums.get(slug)
+            if entry is None:
+                sums[slug] = [lat, lon, 1]
+            else:
+                entry[0] += lat
+                entry[1] += lon
+                entry[2] += 1
+
+    centroids = {slug: (lat / count, lon / count) for slug, (lat, lon, count) in sums.items()}
+    return centroids, sorted(unmatched)
+
+def project(coordinates):
+    """Coordonnées (lat, lon) en km sur un plan: projection équirectangulaire centrée
+    sur la latitude moyenne, précise à mieux que 1 % à l'échelle de la Belgique"""
+    scale = math.cos(math.radians(sum(lat for lat, lon in coordinates) / len(coordinates)))
+    return [(lon * KM_PER_DEGREE * scale, lat * KM_PER_DEGREE) for lat, lon in coordinates]
+
+def build_kdtree(points, indices=None, depth=0):
+    """Arbre k-d des points (x, y): nœuds (indice, axe, gauche, droite), None si vide"""
+    if indices is None:
+        indices = list(range(len(points)))
+    if not indices:
+        return None
+    axis = depth % 2
+    indices = sorted(indices, key=lambda i: points[i][axis])
+    middle = len(indices) // 2
+    return (indices[middle], axis,
+            build_kdtree(points, indices[:middle], depth + 1),
+            build_kdtree(points, indices[middle + 1:], depth + 1))
+
+def query_kdtree(tree, points, point, k):
+    """Les k points les plus proches de `point`: [(distance², indice)], du plus proche au plus loin"""
+    heap = []  # (-distance², -indice): le plus lointain des candidats en tête
+
+    def visit(node):
+        if node is None:
+            return
+        index, axis, left, right = node
+        x, y = points[index]
+        distance = (x - point[0]) ** 2 + (y - point[1]) ** 2
+        if len(heap) < k:
+            heapq.heappush(heap, (-distance, -index))
+        elif distance < -heap[0][0]:
+            heapq.heapreplace(heap, (-distance, -index))
+        delta = point[axis] - points[index][axis]
+        near, far = (left, right) if delta < 0 else (right, left)
+        visit(near)
+        # L'autre côté n'est visité que s'il peut contenir un point plus proche
+        if len(heap) < k or delta * delta < -heap[0][0]:
+            visit(far)
+
+    visit(tree)
+    return sorted((-distance, -index) for distance, index in heap)
+
+def nearest_neighbors(points, k):
+    """Les k plus proches voisins de chaque point (hors lui-même), en une requête groupée:
+    [[(indice, distance)]]"""
+    if len(points) < 2:
+        return [[] for point in points]
+    count = min(k + 1, len(points))
+    if cKDTree is not None:
+        distances, indices = cKDTree(points).query(points, k=count)
+        rows = [list(zip(row_indices, row_distances))
+                for row_indices, row_distances in zip(indices.tolist(), distances.tolist())]
+    else:
+        tree = build_kdtree(points)
+        rows = [[(index, math.sqrt(distance)) for distance, index in query_kdtree(tree, points, point, count)]
+                for point in points]
+    return [[(j, distance) for j, distance in row if j != i][:k] for i, row in enumerate(rows)]
+
+def compute_neighbors(dataset, centroids, k=NEIGHBOR_COUNT):
+    """Communes voisines de chaque ville située: {slug: [[slug, nom, distance en km]]}"""
+    slugs = sorted(centroids)
+    if not slugs:
+        return {}
+    rows = nearest_neighbors(project([centroids[slug] for slug in slugs]), k)
+    return {
+        slug: [[slugs[j], city_label(dataset[slugs[j]]), round(distance, 1)] for j, distance in row]
+        for slug, row in zip(slugs, rows)
+    }
+
+def load_neighbors(site_dir, dataset, path=None):
+    """Calcule les communes voisines depuis le fichier du site ({} s'il n'existe pas)"""
+    path = path or centroids_path(site_dir)
+    if not os.path.exists(path):
+        return {}
+    try:
+        centroids, unmatched = read_centroids(path, city_keys(dataset))
+    except (OSError, ValueError) as e:
+        print(f"Erreur {path}: {e}")
+        return {}
+    return compute_neighbors(dataset, centroids)
+
+def neighbors_version(site_dir, dataset):
+    """Version du calcul: fichier de coordonnées, villes et code"""
+    try:
+        stat = file_stat(centroids_path(site_dir))
+    except OSError:
+        stat = None
+    return data_hash([stat, NEIGHBOR_COUNT, {slug: record['city_name'] for slug, record in dataset.items()},
+                      source_version(city_keys, read_centroids, project, build_kdtree, query_kdtree,
+                                     nearest_neighbors, compute_neighbors, load_neighbors)])
+
+def neighbor_links(record):
+    """Liens (slug, nom) des communes voisines d'une ville, calculées si possible,
+    sinon ceux de la page"""
+    if record.get('nearest'):
+        return [(slug, name) for slug, name, distance in record['nearest']]
+    fragments = record.get('fragments') or {}
+    return fragments.get('neighbor_links', [])
+
+# Liste des communes avoisinantes d'une page de ville
+NEIGHBORS_LIST_START = 'communes avoisinantes</h2>'
+NEIGHBORS_LIST_OPEN = '<ul style="display: flex; flex-wrap: wrap; gap: 10px; list-style-type: none; padding: 0;">\n'
+
+def update_neighbor_list(content, record):
+    """Remplace la liste des communes avoisinantes par les communes les plus proches"""
+    if not record or not record.get('nearest'):
+        return content
+    start = content.find(NEIGHBORS_LIST_START)
+    if start < 0:
+        return content
+    start = content.find(NEIGHBORS_LIST_OPEN, start)
+    end = content.find('</ul>', start)
+    if start < 0 or end < 0:
+        return content
+    start += len(NEIGHBORS_LIST_OPEN)
+    return content[:start] + render_neighbors(neighbor_links(record)) + content[end:]
+
+def main():
+    # Import local: city_dataset dépend de ce module
+    from city_dataset import load_city_dataset
+
+    parser = argparse.ArgumentParser(description="Calcule les communes voisines des villes (arbre k-d)")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="racine du site exporté")
+    parser.add_argument('--centroids', help=f"fichier CSV des coordonnées (par défaut: <site>/{CENTROIDS_FILE})")
+    args = parser.parse_args()
+    path = args.centroids or centroids_path(args.site_dir)
+
+    print("🔍 Calcul des communes voisines...")
+    if not os.path.exists(path):
+        print(f"❌ Fichier de coordonnées introuvable: {path}")
+        print("   colonnes attendues: commune (ou slug), latitude, longitude")
+        return
+    if cKDTree is None:
+        print("  ⚠️ SciPy n'est pas installé: arbre k-d en Python")
+
+    dataset = load_city_dataset(args.site_dir)
+    start = time.perf_counter()
+    centroids, unmatched = read_centroids(path, city_keys(dataset))
+    read_time = time.perf_counter() - start
+    neighbors = compute_neighbors(dataset, centroids)
+    elapsed = time.perf_counter() - start
+
+    print(f"   {len(centroids)}/{len(dataset)} villes situées (lecture {read_time:.2f} s, total {elapsed:.2f} s)")
+    if unmatched:
+        print(f"  ⚠️ {len(unmatched)} communes du fichier sans page: {', '.join(unmatched[:10])}")
+    missing = [slug for slug in dataset if slug not in centroids]
+    if missing:
+        print(f"  ⚠️ {len(missing)} villes sans coordonnées (liens de la page conservés): {', '.join(missing[:10])}")
+    for slug in list(neighbors)[:5]:
+        print(f"     {slug}: " + ', '.join(f"{name} ({distance} km)" for s, name, distance in neighbors[slug]))
+    print(f"\n✅ {len(neighbors)} villes avec leurs {NEIGHBOR_COUNT} communes voisines")
+    if args.centroids:
+        print(f"   le jeu de données utilise {centroids_path(args.site_dir)}")
+
+if __name__ == "__main__":
+    main()
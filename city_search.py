@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Script pour ajouter une recherche de commune à la page hub estimation-par-ville.
+Un index compact des communes (noms normalisés comme normalize_city_name, alias
+néerlandais de city_index, préfixes triés et trigrammes) est écrit dans
+wp-content/communes.<hash>.json (précompressé avec les autres fichiers texte).
+La page reçoit un champ de recherche et un petit script qui ne charge l'index qu'à
+la première utilisation, puis répond sans parcourir la liste: recherche par
+préfixe (dichotomie) pour 1 ou 2 lettres, intersection des trigrammes au-delà.
+La liste complète des communes reste dans la page (sans JavaScript, et pour les
+moteurs de recherche).
+"""
+
+import os
+import re
+import json
+import html
+import glob
+import hashlib
+import argparse
+import posixpath
+
+from build_manifest import build_path
+from city_index import CITY_ALIASES, normalize_city_name, ngrams
+from city_dataset import load_city_dataset
+from fix_all_links import relative_prefix
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+INDEX_FILE = "city_search.json"
+INDEX_VERSION = 1
+
+SEARCH_DIR = "wp-content"
+SEARCH_PREFIX = "communes."
+
+# Pages hub (et son doublon exporté) qui reçoivent la recherche
+HUB_PAGES = ("estimation-par-ville/index.html", "estimation-par-ville.html")
+
+# Juste après le titre et le paragraphe d'introduction du hub
+SEARCH_ANCHOR_PATTERN = re.compile(r'<h1 class="hestia-title[^>]*>[^<]*</h1></div></div>(?:<p>.*?</p>)?')
+SEARCH_BLOCK_PATTERN = re.compile(r'\n?<!-- recherche-communes -->.*?<!-- /recherche-communes -->\n?', re.DOTALL)
+
+SEARCH_BLOCK = """
+<!-- recherche-communes -->
+<style id='city-search-css'>.city-search{{position:relative;margin:20px 0 30px}}.city-search input{{width:100%;padding:10px 14px;font-size:16px;border:1px solid #28a745;border-radius:5px}}.city-search ul{{list-style:none;margin:0;padding:0;border:1px solid #ddd;border-top:0;background:#fff}}.city-search li a{{display:block;padding:8px 14px}}.city-search li small{{color:#777;margin-left:8px}}.city-search ul:empty{{display:none}}</style>
+<div class="city-search" role="search"><label for="city-search-input">Rechercher une commune</label>
+<input type="search" id="city-search-input" placeholder="Ex: Liège, Gent, Wavre..." autocomplete="off" data-index="{index}" data-base="{base}">
+<ul id="city-search-results" aria-live="polite"></ul></div>
+<script>
+(function () {{
+  var input = document.getElementById('city-search-input'), list = document.getElementById('city-search-results');
+  var index = null, loading = null, MAX = 8;
+  // Même normalisation que normalize_city_name (city_index.py)
+  function normalize(s) {{
+    return s.toLowerCase().replace(/œ/g, 'oe').replace(/æ/g, 'ae').replace(/ß/g, 'ss')
+      .normalize('NFD').replace(/[\\u0300-\\u036f]/g, '').replace(/[^a-z0-9]+/g, '-').replace(/^-+|-+$/g, '');
+  }}
+  function load() {{
+    if (!loading) loading = fetch(input.dataset.index).then(function (r) {{ return r.json(); }}).then(function (data) {{ index = data; }});
+    return loading;
+  }}
+  function search(q) {{
+    var keys = index.keys, found = [], i, ids;
+    if (q.length < 3) {{
+      // Préfixe: dichotomie dans les clés triées
+      var lo = 0, hi = keys.length;
+      while (lo < hi) {{ i = (lo + hi) >> 1; if (keys[i][0] < q) lo = i + 1; else hi = i; }}
+      for (i = lo; i < keys.length && keys[i][0].lastIndexOf(q, 0) === 0; i++) found.push(i);
+    }} else {{
+      // Trigrammes: intersection des listes, puis vérification de la sous-chaîne
+      for (i = 0; i + 3 <= q.length; i++) {{
+        var posting = index.trigrams[q.substr(i, 3)] || [];
+        ids = ids ? ids.filter(function (id) {{ return posting.indexOf(id) !== -1; }}) : posting;
+      }}
+      found = ids.filter(function (id) {{ return keys[id][0].indexOf(q) !== -1; }});
+    }}
+    function rank(id) {{ var k = keys[id][0]; return (k.lastIndexOf(q, 0) === 0 ? 0 : k.indexOf('-' + q) !== -1 ? 1 : 2) * 1000 + k.length; }}
+    found.sort(function (a, b) {{ return rank(a) - rank(b); }});
+    var seen = {{}}, results = [];
+    for (i = 0; i < found.length && results.length < MAX; i++) {{
+      var city = keys[found[i]][1];
+      if (!seen[city]) {{ seen[city] = true; results.push(index.cities[city]); }}
+    }}
+    return results;
+  }}
+  function render() {{
+    var q = normalize(input.value);
+    list.innerHTML = '';
+    if (!q || !index) return;
+    search(q).forEach(function (city) {{
+      var li = document.createElement('li'), a = document.createElement('a'), small = document.createElement('small');
+      a.href = input.dataset.base + city[1];
+      a.textContent = city[0];
+      small.textContent = city[2];
+      a.appendChild(small);
+      li.appendChild(a);
+      list.appendChild(li);
+    }});
+  }}
+  input.addEventListener('focus', load);
+  input.addEventListener('input', function () {{ load().then(render); }});
+}})();
+</script>
+<!-- /recherche-communes -->
+"""
+
+def city_url(path):
+    """Lien d'une page de ville depuis la racine (dossier/index.html -> dossier/)"""
+    return path[:-len('index.html')] if path.endswith('/index.html') else path
+
+def build_search_index(dataset):
+    """Index des communes: {'cities': [[nom, lien, prix]], 'keys': [[clé, ville]], 'trigrams': {tri: [clés]}}"""
+    # Les noms sont affichés en texte (textContent): entités HTML du titre décodées
+    names = {slug: html.unescape(record['city_name'] or slug.replace('-', ' ').title())
+             for slug, record in dataset.items()}
+    records = sorted(dataset.values(), key=lambda r: (normalize_city_name(names[r['slug']]), r['slug']))
+    cities = []
+    slug_ids = {}
+    keys = set()
+    for record in records:
+        name = names[record['slug']]
+        price = f"{record['price']} €/m²" if record['price'] else ''
+        slug_ids[record['slug']] = len(cities)
+        cities.append([name, city_url(record['path']), price])
+        keys.add((normalize_city_name(name), slug_ids[record['slug']]))
+        keys.add((record['slug'], slug_ids[record['slug']]))
+    # Noms néerlandais et officiels (Gent -> Gand)
+    for alias, slug in CITY_ALIASES.items():
+        if slug in slug_ids:
+            keys.add((alias, slug_ids[slug]))
+
+    keys = sorted(keys)
+    trigrams = {}
+    for key_id, (key, city_id) in enumerate(keys):
+        for gram in sorted(ngrams(key)):
+            trigrams.setdefault(gram, []).append(key_id)
+    return {'cities': cities, 'keys': [list(k) for k in keys], 'trigrams': trigrams}
+
+def render_search_block(rel_path, search_path):
+    """Champ de recherche et script d'une page hub"""
+    prefix = relative_prefix(rel_path)
+    return SEARCH_BLOCK.format(index=prefix + search_path, base=prefix)
+
+def add_city_search(content, rel_path, search):
+    """Ajoute (ou met à jour) la recherche de commune sous l'introduction du hub"""
+    if not search:
+        return content
+    block = render_search_block(rel_path, search['path'])
+    if block.strip() in content:
+        return content
+    content = SEARCH_BLOCK_PATTERN.sub('', content, count=1)
+    anchor = SEARCH_ANCHOR_PATTERN.search(content)
+    if anchor is None:
+        return content
+    return content[:anchor.end()] + block + content[anchor.end():]
+
+def load_index(site_dir):
+    """Charge l'état de l'index publié (vide s'il n'existe pas ou n'est plus compatible)"""
+    try:
+        with open(build_path(site_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    if index.get('version') != INDEX_VERSION:
+        return {'version': INDEX_VERSION, 'path': None}
+    return index
+
+def save_index(site_dir, index):
+    """Enregistre l'état (écriture dans un fichier temporaire puis renommage)"""
+    path = build_path(site_dir, INDEX_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def search_index_data(dataset):
+    """Contenu du fichier de l'index de recherche (JSON compact)"""
+    return json.dumps(build_search_index(dataset), ensure_ascii=False, separators=(',', ':'))
+
+def prepare_search_index(site_dir=SITE_DIR, dataset=None, write=True):
+    """Écrit l'index de recherche des communes; renvoie {'path', 'cities', 'size'} (None sans commune)"""
+    dataset = dataset if dataset is not None else load_city_dataset(site_dir)
+    if not dataset:
+        return None
+    data = search_index_data(dataset)
+    digest = hashlib.sha256(data.encode('utf-8')).hexdigest()[:10]
+    search_path = posixpath.join(SEARCH_DIR, f"{SEARCH_PREFIX}{digest}.json")
+
+    if write:
+        path = os.path.join(site_dir, search_path)
+        if not os.path.exists(path):
+            with open(path + ".tmp", 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        # L'index précédent reste en place tant que des pages (ou un cache) peuvent y renvoyer
+        index = load_index(site_dir)
+        keep = {search_path, index['path']}
+        for filepath in glob.glob(os.path.join(site_dir, SEARCH_DIR, f"{SEARCH_PREFIX}*.json")):
+            if posixpath.join(SEARCH_DIR, os.path.basename(filepath)) not in keep:
+                os.remove(filepath)
+        index['path'] = search_path
+        save_index(site_dir, index)
+
+    return {'path': search_path, 'cities': len(dataset), 'size': len(data.encode('utf-8'))}
+
+def main():
+    parser = argparse.ArgumentParser(description="Écrit l'index de recherche des communes du hub")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="racine du site exporté")
+    args = parser.parse_args()
+
+    print("🔧 Index de recherche des communes...")
+    search = prepare_search_index(args.site_dir)
+    if search is None:
+        print("\n⏭️ Aucune commune dans le jeu de données")
+        return
+    print(f"   {search['cities']} communes, {search['size'] / 1024:.1f} Ko")
+    print(f"\n✅ {search['path']}")
+    print("   le hub est mis à jour par build_site.py (transformation city_search)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Modèle (template) du corps des pages de ville.
+Le contenu de l'article (H1, encadrés de prix, communes voisines, lien province,
+FAQ) est décrit une seule fois dans templates/city_page.tmpl. Le même modèle sert
+à générer une page à partir des données et, compilé en expression régulière,
+à en extraire les fragments propres à chaque ville (textes, prix, image...).
+"""
+
+import os
+import re
+import string
+import hashlib
+from functools import lru_cache
+
+TEMPLATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "city_page.tmpl")
+
+# Délimitation du corps de l'article dans la page WordPress
+BODY_START = '<div class="row"><div class="col-md-12"><h1 class="hestia-title title-in-content ">'
+BODY_END = '\t\t\t</div>\n\t\t\t\t\t</div>\n\t</article>'
+
+# FAQ (format accordéon ou format d'origine), régénérée à chaque rendu
+FAQ_BLOCK = re.compile(
+    r'\n<!-- FAQ personnalisée -->.*?(?:</details>|<div style="margin-bottom: 0;">.*?</div>)\n</div>', re.S)
+
+# Lien vers une commune voisine
+NEIGHBOR_LINK = '<li style="flex: 1 0 30%; margin: 5px;"><a href="../prix-m2-a-{slug}/" style="display: block; padding: 10px; border: 1px solid #28a745; border-radius: 5px; color: #28a745; text-align: center; text-decoration: none; transition: background-color 0.3s;">{name}</a></li>\n'
+NEIGHBOR_LINK_PATTERN = re.compile(r'<a href="\.\./prix-m2-a-([^/"]+)/"[^>]*>([^<]+)</a>')
+
+WHITESPACE = re.compile(r'\s+')
+
+# Pages de ville retouchées à la main (section en double, FAQ déplacée, corps incomplet...):
+# elles ne suivent pas le modèle et restent telles quelles. Toute autre page non conforme
+# est une erreur (voir city_dataset.nonconforming_pages)
+CUSTOM_PAGES = frozenset({
+    'bruges', 'bruxelles-ville', 'charleroi', 'etalle', 'forest', 'habay', 'la-louviere', 'ledegem',
+    'liege', 'londerzeel', 'momignies', 'puurs-sint-amands', 'schaerbeek', 'tervuren', 'uccle', 'waterloo',
+})
+
+# Champs calculés au rendu (les autres sont des fragments extraits de la page)
+GENERATED_FIELDS = ('city_name', 'neighbors_list', 'faq')
+
+def compile_template_pattern(text):
+    """Compile le modèle en expression régulière d'extraction.
+
+    Chaque champ devient un groupe nommé (les répétitions doivent être identiques);
+    les espaces entre les éléments ne sont pas significatifs. La FAQ est ignorée:
+    elle est retirée de la page avant l'extraction.
+    """
+    parts = []
+    seen = set()
+    pos = 0
+    for match in string.Template.pattern.finditer(text):
+        parts.append(text[pos:match.start()])
+        pos = match.end()
+        if match.group('escaped') is not None:
+            parts.append('$')
+            continue
+        name = match.group('braced') or match.group('named')
+        if name == 'faq':
+            continue
+        parts.append((name, name in seen))
+        seen.add(name)
+    parts.append(text[pos:])
+
+    regex = []
+    for part in parts:
+        if isinstance(part, tuple):
+            name, repeated = part
+            regex.append(f'(?P={name})' if repeated else f'(?P<{name}>.*?)')
+        else:
+            regex.extend(r'\s*' if token.isspace() else re.escape(token)
+                         for token in re.split(r'(\s+)', part) if token)
+    return re.compile(''.join(regex) + r'\s*\Z', re.S)
+
+@lru_cache(maxsize=None)
+def load_city_template(path=TEMPLATE_FILE):
+    """Charge et compile le modèle (une seule fois par processus)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    return {
+        'template': string.Template(text),
+        'pattern': compile_template_pattern(text),
+        'version': hashlib.sha256(text.encode('utf-8')).hexdigest()[:16],
+    }
+
+def find_city_body(content):
+    """Position (début, fin) du corps de l'article dans la page, ou None"""
+    start = content.find(BODY_START)
+    if start < 0:
+        return None
+    end = content.find(BODY_END, start)
+    if end < 0:
+        return None
+    return start, end
+
+def parse_city_body(content, template=None):
+    """Extrait les fragments d'une page de ville conforme au modèle, sinon None"""
+    template = template or load_city_template()
+    span = find_city_body(content)
+    if span is None:
+        return None
+
+    body = FAQ_BLOCK.sub('', content[span[0]:span[1]])
+    match = template['pattern'].match(body)
+    if not match:
+        return None
+
+    fields = match.groupdict()
+    neighbor_links = NEIGHBOR_LINK_PATTERN.findall(fields['neighbors_list'])
+
+    # Les fragments doivent reproduire la page (aux espaces près), sinon du contenu serait perdu
+    fields.update(neighbors_list=render_neighbors(neighbor_links), faq='')
+    if WHITESPACE.sub('', template['template'].substitute(fields)) != WHITESPACE.sub('', body):
+        return None
+
+    fragments = {name: value for name, value in fields.items() if name not in GENERATED_FIELDS}
+    fragments['neighbor_links'] = neighbor_links
+    return fragments
+
+def render_neighbors(neighbor_links):
+    """Liste <li> des communes voisines"""
+    return ''.join(NEIGHBOR_LINK.format(slug=slug, name=name) for slug, name in neighbor_links)
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Script pour extraire le CSS critique des pages et charger le reste en asynchrone.
+Pour chaque page, les règles des feuilles de style locales (thème Hestia, Bootstrap,
+WordPress, Font Awesome, styles regroupés) qui s'appliquent au haut de la page (en-tête,
+menu, bandeau et titre) sont recopiées dans un <style> en ligne; les feuilles de
+style sont ensuite chargées sans bloquer l'affichage (media='print' puis 'all', avec
+un <noscript> de repli). Au-delà de CRITICAL_MAX_BYTES, la page garde ses feuilles de
+style telles quelles: le CSS en ligne ne tiendrait plus dans les premiers paquets.
+
+Le résultat dépend du « gabarit » de la page: les balises, classes et ids présents
+au-dessus de la ligne de flottaison et les feuilles de style liées. Deux pages de même
+gabarit partagent un seul calcul (quelques gabarits pour les 580 pages de ville),
+conservé dans .build/critical/<hash>.css. La transformation est réversible (restore_stylesheets).
+"""
+
+import os
+import re
+import glob
+import hashlib
+import argparse
+import posixpath
+from urllib.parse import unquote
+
+from build_manifest import build_path, file_stat, source_version
+from fix_all_links import relative_prefix
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+CACHE_DIR = "critical"
+
+# Taille maximale du CSS en ligne (premiers paquets de la réponse)
+CRITICAL_MAX_BYTES = 14 * 1024
+
+# Sans <h1> ni </header>: ce nombre de caractères après <body>
+BODY_FOLD_CHARS = 8000
+# Sous-menus déroulants du menu: masqués tant qu'on ne les survole pas
+HIDDEN_MENU_PATTERN = re.compile(r'<ul\b[^>]*\bclass="[^"]*\bdropdown-menu\b[^"]*"[^>]*>.*?</ul>', re.DOTALL)
+
+STYLESHEET_PATTERN = re.compile(r"<link rel='stylesheet'[^>]*? media='all'[^>]*/>")
+ASYNC_STYLESHEET_PATTERN = re.compile(
+    r"<link rel='stylesheet'[^>]*? media='print' onload=\"this.media='all'\"[^>]*/><noscript>(<link [^>]*/>)</noscript>")
+CRITICAL_STYLE_PATTERN = re.compile(r"<style id='critical-css'>.*?</style>\n", re.DOTALL)
+HREF_PATTERN = re.compile(r"href='([^']*)'")
+
+TAG_PATTERN = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)([^>]*)>')
+ATTR_NAME_PATTERN = re.compile(r'\s([a-zA-Z-]+)(?==|\s|/?$)')
+CLASS_ATTR_PATTERN = re.compile(r'\sclass=["\']([^"\']*)["\']')
+ID_ATTR_PATTERN = re.compile(r'\sid=["\']([^"\']*)["\']')
+
+# Règles inutiles au premier affichage: états d'interaction et pseudo-éléments de navigateur
+SKIPPED_SELECTOR_PATTERN = re.compile(
+    r':(?:hover|focus|focus-within|focus-visible|active|visited|target)\b|::?(?:selection|placeholder|-webkit-|-moz-|-ms-)')
+FUNCTIONAL_PSEUDO_PATTERN = re.compile(r':[a-zA-Z-]+\([^()]*\)')
+# :where(.a .b), :is(...): le contenu fait partie du sélecteur (une liste donne des alternatives)
+MATCHES_PSEUDO_PATTERN = re.compile(r':(?:where|is|matches|-webkit-any|-moz-any)\(([^()]*)\)')
+ATTRIBUTE_SELECTOR_PATTERN = re.compile(r'\[\s*([a-zA-Z-]+)[^\]]*\]')
+SELECTOR_CLASS_PATTERN = re.compile(r'\.((?:[a-zA-Z0-9_-]|\\.)+)')
+SELECTOR_ID_PATTERN = re.compile(r'#([a-zA-Z0-9_-]+)')
+SELECTOR_TAG_PATTERN = re.compile(r'(?:^|[\s>+~(])([a-zA-Z][a-zA-Z0-9]*)')
+URL_PATTERN = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+EXTERNAL_URL_PATTERN = re.compile(r'^(?:[a-z][a-z0-9+.\-]*:|//|/|#)', re.I)
+# Espaces superflus d'un bloc de déclarations (les chaînes sont laissées telles quelles)
+# Déclarations sans effet sur le premier affichage (animations, interactions)
+NON_PAINT_DECLARATION_PATTERN = re.compile(
+    r'(?:^|;)(?:-(?:webkit|moz|ms|o)-)?(?:transition|animation|cursor|will-change|tap-highlight-color|user-select|pointer-events)[a-z-]*:[^;]*')
+# Propriétés personnalisées (--nom) déclarées et utilisées (var(--nom)), règles vidées
+CUSTOM_PROPERTY_PATTERN = re.compile(r'([{;])(--[a-zA-Z0-9_-]+):[^;{}]*')
+VAR_PATTERN = re.compile(r'var\(\s*(--[a-zA-Z0-9_-]+)')
+EMPTY_RULE_PATTERN = re.compile(r'(?:^|(?<=[{}]))[^{}]+\{\}')
+DECLARATION_SPACE_PATTERN = re.compile(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')|\s*([;:,])\s*|\s+')
+
+# At-rules dont le contenu est une liste de règles (les autres sont des blocs de déclarations)
+NESTED_AT_RULES = ('@media', '@supports', '@document', '@layer')
+
+# Feuilles de style analysées (par processus): {chemin: (empreinte, hash, règles, jetons)}
+_stylesheets = {}
+# CSS critique calculé (par processus): {clé du gabarit: css}
+_critical = {}
+
+def split_blocks(css):
+    """Découpe du CSS en (prélude, contenu du bloc) au premier niveau (commentaires ignorés)"""
+    blocks = []
+    start = 0
+    depth = 0
+    body_start = None
+    i = 0
+    n = len(css)
+    while i < n:
+        c = css[i]
+        if c == '/' and css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        if c in '"\'':
+            # Chaîne: les accolades et points-virgules qu'elle contient ne comptent pas
+            i += 1
+            while i < n and css[i] != c:
+                i += 2 if css[i] == '\\' else 1
+        elif c == '{':
+            if depth == 0:
+                body_start = i + 1
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append((css[start:body_start - 1].strip(), css[body_start:i]))
+                start = i + 1
+            depth = max(depth, 0)
+        elif c == ';' and depth == 0:
+            # At-rule sans bloc (@charset, @import): ignorée
+            start = i + 1
+        i += 1
+    return blocks
+
+def parse_rules(css):
+    """Règles d'une feuille de style: [(prélude, corps ou liste de règles imbriquées)]"""
+    rules = []
+    for prelude, body in split_blocks(css):
+        prelude = re.sub(r'/\*.*?\*/', '', prelude, flags=re.DOTALL).strip()
+        if prelude.startswith(NESTED_AT_RULES):
+            rules.append((prelude, parse_rules(body)))
+        else:
+            rules.append((prelude, body.strip()))
+    return rules
+
+def split_selectors(prelude):
+    """Sélecteurs d'une règle (virgules de premier niveau)"""
+    selectors = []
+    depth = 0
+    current = ''
+    for c in prelude:
+        if c in '([':
+            depth += 1
+        elif c in ')]':
+            depth -= 1
+        if c == ',' and depth == 0:
+            selectors.append(current.strip())
+            current = ''
+        else:
+            current += c
+    selectors.append(current.strip())
+    return selectors
+
+def selector_alternatives(selector):
+    """Sélecteurs simples équivalents (un par alternative de :is()/:where())"""
+    match = MATCHES_PSEUDO_PATTERN.search(selector)
+    if match is None:
+        return [selector]
+    alternatives = []
+    for option in match.group(1).split(','):
+        alternatives.extend(selector_alternatives(f"{selector[:match.start()]} {option.strip()}{selector[match.end():]}"))
+    return alternatives
+
+def selector_tokens(selector):
+    """Balises, classes, ids et attributs qu'un sélecteur exige (None: règle non critique)"""
+    if SKIPPED_SELECTOR_PATTERN.search(selector):
+        return None
+    selector = FUNCTIONAL_PSEUDO_PATTERN.sub('', selector)
+    tokens = {'[' + name.lower() for name in ATTRIBUTE_SELECTOR_PATTERN.findall(selector)}
+    selector = ATTRIBUTE_SELECTOR_PATTERN.sub('', selector)
+    tokens.update('.' + name.replace('\\', '') for name in SELECTOR_CLASS_PATTERN.findall(selector))
+    tokens.update('#' + name for name in SELECTOR_ID_PATTERN.findall(selector))
+    selector = SELECTOR_CLASS_PATTERN.sub('', SELECTOR_ID_PATTERN.sub('', selector))
+    selector = re.sub(r'::?[a-zA-Z-]+', '', selector)
+    tokens.update(tag.lower() for tag in SELECTOR_TAG_PATTERN.findall(selector))
+    return tokens
+
+def above_the_fold(content):
+    """Haut de la page: du <body> à la fin du titre <h1> (en-tête, menu, bandeau, titre),
+    à défaut jusqu'à la fin de l'en-tête, sans les sous-menus masqués"""
+    body = content.find('<body')
+    if body == -1:
+        return ''
+    h1 = content.find('</h1>', body)
+    if h1 != -1:
+        end = h1 + len('</h1>')
+    else:
+        header = content.find('</header>', body)
+        end = header + len('</header>') if header != -1 else body + BODY_FOLD_CHARS
+    return HIDDEN_MENU_PATTERN.sub('', content[body:end])
+
+def page_tokens(html):
+    """Balises, classes, ids et attributs présents dans un fragment de page"""
+    tokens = {'html', 'body', '*'}
+    for match in TAG_PATTERN.finditer(html):
+        tag, attrs = match.groups()
+        tokens.add(tag.lower())
+        tokens.update('[' + name.lower() for name in ATTR_NAME_PATTERN.findall(attrs))
+        class_attr = CLASS_ATTR_PATTERN.search(attrs)
+        if class_attr:
+            tokens.update('.' + name for name in class_attr.group(1).split())
+        id_attr = ID_ATTR_PATTERN.search(attrs)
+        if id_attr:
+            tokens.add('#' + id_attr.group(1))
+    return tokens
+
+def compact_declarations(body):
+    """Bloc de déclarations sans espaces superflus ni déclarations inutiles au premier
+    affichage (le CSS en ligne est dans chaque page)"""
+    def replace(match):
+        return match.group(1) or match.group(2) or ' '
+    body = DECLARATION_SPACE_PATTERN.sub(replace, body).strip().strip(';')
+    return NON_PAINT_DECLARATION_PATTERN.sub('', body).strip(';')
+
+def select_rules(rules, tokens):
+    """Règles qui s'appliquent au fragment (les @font-face restent dans les feuilles de
+    style: les icônes et polices sont chargées avec elles)"""
+    selected = []
+    for prelude, body in rules:
+        if isinstance(body, list):
+            inner = select_rules(body, tokens)
+            if inner:
+                selected.append(f"{prelude}{{{inner}}}")
+        elif prelude.startswith('@'):
+            continue
+        else:
+            kept = []
+            for selector in split_selectors(prelude):
+                if any(required is not None and required <= tokens
+                       for required in map(selector_tokens, selector_alternatives(selector))):
+                    kept.append(selector)
+            body = compact_declarations(body) if kept else ''
+            if body:
+                selected.append(f"{','.join(kept)}{{{body}}}")
+    return ''.join(selected)
+
+def drop_unused_properties(css):
+    """Retire les propriétés personnalisées que le CSS retenu n'utilise pas (variables de
+    Font Awesome, de l'éditeur WordPress...), puis les règles devenues vides"""
+    used = set()
+    while True:
+        kept = CUSTOM_PROPERTY_PATTERN.sub(lambda m: m.group(0) if m.group(2) in used else m.group(1), css)
+        referenced = set(VAR_PATTERN.findall(kept))
+        if referenced <= used:
+            break
+        used |= referenced
+    kept = kept.replace('{;', '{').replace(';}', '}')
+    while True:
+        emptied = EMPTY_RULE_PATTERN.sub('', kept)
+        if emptied == kept:
+            return kept
+        kept = emptied
+
+def rebase_urls(css, css_path, prefix):
+    """Réécrit les url() relatives d'une feuille de style pour un CSS en ligne dans la page"""
+    def replace(match):
+        quote, url = match.groups()
+        if EXTERNAL_URL_PATTERN.match(url):
+            return match.group(0)
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(css_path), url))
+        return f"url({quote}{prefix}{path}{quote})"
+    return URL_PATTERN.sub(replace, css)
+
+def rule_tokens(rules):
+    """Balises, classes, ids et attributs cités par les sélecteurs d'une feuille de style"""
+    tokens = set()
+    for prelude, body in rules:
+        if isinstance(body, list):
+            tokens.update(rule_tokens(body))
+        elif not prelude.startswith('@'):
+            for selector in split_selectors(prelude):
+                for alternative in selector_alternatives(selector):
+                    tokens.update(selector_tokens(alternative) or ())
+    return tokens
+
+def load_stylesheet(site_dir, path, css=None):
+    """Règles d'une feuille de style locale (analysée une fois par processus); `css` est le
+    contenu d'une feuille générée, pas forcément écrite sur le disque"""
+    filepath = os.path.join(site_dir, path)
+    stat = file_stat(filepath) if css is None else hashlib.sha256(css.encode('utf-8')).hexdigest()
+    cached = _stylesheets.get(filepath)
+    if cached is None or cached[0] != stat:
+        if css is None:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                css = f.read()
+        rules = parse_rules(css)
+        cached = (stat, hashlib.sha256(css.encode('utf-8')).hexdigest(), rules, rule_tokens(rules))
+        _stylesheets[filepath] = cached
+    return cached
+
+def page_stylesheets(content, rel_path, site_dir, sources=None):
+    """Feuilles de style locales liées par la page (chemins relatifs à la racine): celles
+    du disque et celles de `sources` ({chemin: contenu})"""
+    paths = []
+    for tag in STYLESHEET_PATTERN.findall(content):
+        href = HREF_PATTERN.search(tag)
+        if href is None or EXTERNAL_URL_PATTERN.match(href.group(1)):
+            continue
+        # Une vraie query string est ignorée; encodée (%3F), elle fait partie du nom du fichier
+        target = unquote(href.group(1).split('?', 1)[0])
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(rel_path), target))
+        if (sources and path in sources) or os.path.isfile(os.path.join(site_dir, path)):
+            paths.append(path)
+    return paths
+
+def stylesheets_version(site_dir):
+    """Empreinte des feuilles de style locales (une modification invalide les pages)"""
+    return {os.path.relpath(path, site_dir): file_stat(path)
+            for path in sorted(glob.glob(os.path.join(site_dir, "**/*.css"), recursive=True))}
+
+def critical_css(content, rel_path, site_dir, sources=None):
+    """CSS critique d'une page (calculé une fois par gabarit), vide au-delà de CRITICAL_MAX_BYTES"""
+    prefix = relative_prefix(rel_path)
+    sources = sources or {}
+    stylesheets = [(path, load_stylesheet(site_dir, path, sources.get(path)))
+                   for path in page_stylesheets(content, rel_path, site_dir, sources)]
+    # Seuls les jetons cités par une feuille de style comptent: les pages de ville, qui ne
+    # diffèrent que par leurs textes et leurs ids de titres, partagent le même gabarit
+    known = {'*'}.union(*(s[3] for p, s in stylesheets))
+    tokens = page_tokens(above_the_fold(content)) & known
+
+    key = hashlib.sha256(repr((sorted(tokens), prefix, [(p, s[1]) for p, s in stylesheets],
+                               source_version(select_rules, selector_tokens, compact_declarations,
+                                              drop_unused_properties))).encode('utf-8')).hexdigest()[:16]
+    css = _critical.get(key)
+    if css is not None:
+        return css
+
+    cache_path = build_path(site_dir, CACHE_DIR, f"{key}.css")
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            css = f.read()
+    else:
+        css = drop_unused_properties(''.join(rebase_urls(select_rules(rules, tokens), path, prefix)
+                                             for path, (stat, digest, rules, used) in stylesheets))
+        # Plusieurs processus peuvent écrire la même entrée: fichier temporaire propre à chacun
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(css)
+        os.replace(tmp_path, cache_path)
+    if len(css.encode('utf-8')) > CRITICAL_MAX_BYTES:
+        css = ''
+    _critical[key] = css
+    return css
+
+def inline_critical_css(content, rel_path, site_dir, sources=None):
+    """Ajoute le CSS critique en ligne et charge les feuilles de style en asynchrone
+    (`sources`: feuilles générées, {chemin: contenu}, prises en mémoire plutôt que sur le disque)"""
+    if "id='critical-css'" in content:
+        return content
+    first = STYLESHEET_PATTERN.search(content)
+    if first is None:
+        return content
+    css = critical_css(content, rel_path, site_dir, sources)
+    if not css:
+        return content
+
+    def make_async(match):
+        tag = match.group(0)
+        return tag.replace(" media='all'", " media='print' onload=\"this.media='all'\"", 1) + f"<noscript>{tag}</noscript>"
+
+    # Une balise </style> dans le CSS fermerait le bloc en ligne
+    css = css.replace('</style', '<\\/style')
+    return (content[:first.start()] + f"<style id='critical-css'>{css}</style>\n"
+            + STYLESHEET_PATTERN.sub(make_async, content[first.start():]))
+
+def restore_stylesheets(content):
+    """Retire le CSS critique et rétablit le chargement normal des feuilles de style"""
+    if "id='critical-css'" not in content:
+        return content
+    content = CRITICAL_STYLE_PATTERN.sub('', content, count=1)
+    return ASYNC_STYLESHEET_PATTERN.sub(lambda m: m.group(1), content)
+
+def main():
+    # Imports locaux: prune_scripts (via link_graph et city_dataset) et source_pages
+    # dépendent de ce module
+    from prune_scripts import page_template
+    from source_pages import read_source_page
+
+    parser = argparse.ArgumentParser(description="Calcule le CSS critique de chaque type de page")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="racine du site exporté")
+    args = parser.parse_args()
+
+    print("🔍 CSS critique par type de page...")
+
+    templates = {}
+    for filepath in sorted(glob.glob(os.path.join(args.site_dir, "**/*.html"), recursive=True)):
+        rel_path = os.path.relpath(filepath, args.site_dir)
+        # Page telle que la voit la transformation critical_css (styles regroupés)
+        content = read_source_page(args.site_dir, rel_path, expand=False)
+        css = critical_css(content, rel_path, args.site_dir)
+        stylesheets = page_stylesheets(content, rel_path, args.site_dir)
+        blocking = sum(os.path.getsize(os.path.join(args.site_dir, path)) for path in stylesheets)
+        counters = templates.setdefault(page_template(rel_path), {'pages': 0, 'variants': set(), 'css': 0,
+                                                                  'blocking': 0, 'over': 0})
+        counters['pages'] += 1
+        # Feuilles de style liées mais pas de CSS en ligne: au-delà du plafond
+        counters['over'] += 1 if stylesheets and not css else 0
+        counters['variants'].add(css)
+        counters['css'] += len(css.encode('utf-8'))
+        counters['blocking'] += blocking
+
+    print(f"\n📊 {len(_critical)} calculs pour {sum(c['pages'] for c in templates.values())} pages:")
+    for template, counters in sorted(templates.items()):
+        pages = counters['pages']
+        print(f"   {template:<10} {pages:>4} pages  {len(counters['variants']):>3} gabarits"
+              f"  {counters['css'] / pages / 1024:>6.1f} Ko en ligne"
+              f"  (au lieu de {counters['blocking'] / pages / 1024:.0f} Ko de CSS bloquant)")
+        if counters['over']:
+            print(f"     ⚠️ {counters['over']} pages au-delà de {CRITICAL_MAX_BYTES // 1024} Ko: feuilles de style bloquantes")
+
+if __name__ == "__main__":
+    main()
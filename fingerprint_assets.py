@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Script pour donner aux assets du site un nom qui dépend de leur contenu.
+Les fichiers exportés par WordPress gardent la query string dans leur nom
+(jquery.min.js?ver=3.7.1, lié en jquery.min.js%3Fver=3.7.1): aucun cache ne peut
+les garder indéfiniment. Chaque CSS, JS, police et image reçoit une copie nommée
+d'après son hash (jquery.min.3f2a9c01de.js, lien physique si possible), à côté de
+l'original; dans les CSS, les url() visent elles-mêmes les copies. Les pages sont
+réécrites par build_site.py (transformation fingerprint_assets), et la
+transformation est réversible (restore_assets): les autres transformations voient
+toujours les noms d'origine.
+
+Sont aussi écrits à la racine du site: asset-manifest.json (nom d'origine -> nom
+hashé) et _headers (règles de cache d'un an, immutable, pour chaque fichier hashé).
+"""
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import argparse
+import posixpath
+from urllib.parse import quote, unquote
+
+from build_manifest import build_path, file_stat
+from precompress import is_compressed
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+INDEX_FILE = "assets.json"
+INDEX_VERSION = 1
+
+MANIFEST_FILE = "asset-manifest.json"
+HEADERS_FILE = "_headers"
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+ASSET_EXTENSIONS = ('.css', '.js', '.woff', '.woff2', '.ttf', '.otf', '.eot', '.svg',
+                    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.ico')
+# Dossiers qui ne font pas partie du site publié
+IGNORED_DIRS = {'.build', '.git', 'templates'}
+
+# Nom déjà hashé (copies de ce script, feuille site-styles.<hash>.css de hoist_styles)
+HASHED_NAME_PATTERN = re.compile(r'\.[0-9a-f]{10}\.[a-z0-9]+$')
+
+# Références d'une page ou d'une feuille de style: attributs et url() CSS
+ATTRIBUTE_PATTERN = re.compile(r'(href|src|srcset)=(["\'])([^"\']*)\2')
+URL_PATTERN = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+EXTERNAL_PATTERN = re.compile(r'^(?:[a-z][a-z0-9+.\-]*:|//|#)', re.I)
+# Caractères laissés tels quels dans un nom de fichier lié (le ? de la query string
+# exportée devient %3F)
+LINK_SAFE = "/=+&,;@!$'()*~"
+
+def clean_name(filename):
+    """Nom d'un asset sans la query string exportée (style.min.css?ver=3.3.3.css -> style.min.css)"""
+    return filename.split('?', 1)[0]
+
+def hashed_name(path, digest):
+    """Chemin de la copie hashée (dans le même dossier que l'original)"""
+    directory, filename = posixpath.split(path)
+    stem, ext = posixpath.splitext(clean_name(filename))
+    return posixpath.join(directory, f"{stem}.{digest[:10]}{ext}")
+
+def is_asset(path):
+    """Fichier à hasher: CSS, JS, police ou image dont le nom n'est pas déjà hashé"""
+    if is_compressed(path):
+        return False
+    name = clean_name(posixpath.basename(path)).lower()
+    return name.endswith(ASSET_EXTENSIONS) and not HASHED_NAME_PATTERN.search(name)
+
+def scan_assets(site_dir):
+    """Assets du site (chemins relatifs à la racine, triés)"""
+    assets = []
+    for root, subdirs, filenames in os.walk(site_dir):
+        subdirs[:] = [d for d in subdirs if d not in IGNORED_DIRS]
+        rel_root = os.path.relpath(root, site_dir).replace(os.sep, '/')
+        rel_root = '' if rel_root == '.' else rel_root
+        assets.extend(posixpath.join(rel_root, f) for f in filenames if is_asset(posixpath.join(rel_root, f)))
+    return sorted(assets)
+
+def rewrite_reference(url, base_path, mapping):
+    """Lien vers un fichier de `mapping` ({chemin: chemin}) remplacé par le lien vers son
+    correspondant (seul le nom du fichier change: les deux sont dans le même dossier)"""
+    if EXTERNAL_PATTERN.match(url):
+        return url
+    target, sep, suffix = url.partition('#')
+    target, query_sep, query = target.partition('?')
+    decoded = unquote(target)
+    if decoded.startswith('/'):
+        path = posixpath.normpath(decoded.lstrip('/'))
+    else:
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(base_path), decoded))
+    replacement = mapping.get(path)
+    if replacement is None:
+        return url
+    directory = target.rsplit('/', 1)[0] + '/' if '/' in target else ''
+    new_target = directory + quote(posixpath.basename(replacement), safe=LINK_SAFE)
+    return new_target + query_sep + query + sep + suffix
+
+def rewrite_references(content, base_path, mapping):
+    """Réécrit tous les liens (href, src, srcset, url()) d'une page ou d'une feuille de style"""
+    def replace_attribute(match):
+        attr, quote_char, value = match.groups()
+        if attr == 'srcset':
+            candidates = []
+            for candidate in value.split(','):
+                parts = candidate.split(' ')
+                # Espaces autour de la virgule conservés: seul l'URL change
+                for i, part in enumerate(parts):
+                    if part:
+                        parts[i] = rewrite_reference(part, base_path, mapping)
+                        break
+                candidates.append(' '.join(parts))
+            new_value = ','.join(candidates)
+        else:
+            new_value = rewrite_reference(value, base_path, mapping)
+        if new_value == value:
+            return match.group(0)
+        return f"{attr}={quote_char}{new_value}{quote_char}"
+
+    def replace_url(match):
+        quote_char, url = match.groups()
+        new_url = rewrite_reference(url, base_path, mapping)
+        if new_url == url:
+            return match.group(0)
+        return f"url({quote_char}{new_url}{quote_char})"
+
+    content = ATTRIBUTE_PATTERN.sub(replace_attribute, content)
+    if 'url(' in content:
+        content = URL_PATTERN.sub(replace_url, content)
+    return content
+
+def fingerprint_assets(content, rel_path, assets):
+    """Remplace les liens vers les assets par les liens vers leurs copies hashées"""
+    if not assets or not assets['manifest']:
+        return content
+    return rewrite_references(content, rel_path, assets['manifest'])
+
+def restore_assets(content, rel_path, originals):
+    """Rétablit les liens vers les assets d'origine (inverse de fingerprint_assets)"""
+    if not originals:
+        return content
+    return rewrite_references(content, rel_path, originals)
+
+def file_hash(path):
+    """Hash du contenu d'un fichier"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_index(site_dir):
+    """Charge l'index des assets (vide s'il n'existe pas ou n'est plus compatible)"""
+    try:
+        with open(build_path(site_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    if index.get('version') != INDEX_VERSION:
+        return {'version': INDEX_VERSION, 'assets': {}, 'originals': {}, 'previous': []}
+    return index
+
+def save_index(site_dir, index):
+    """Enregistre l'index (écriture dans un fichier temporaire puis renommage)"""
+    path = build_path(site_dir, INDEX_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def load_originals(site_dir):
+    """Copies hashées connues ({chemin hashé: chemin d'origine})"""
+    return load_index(site_dir)['originals']
+
+def write_file(path, data):
+    """Écrit un fichier (fichier temporaire puis renommage)"""
+    with open(path + ".tmp", 'wb') as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+def link_copy(source, target):
+    """Copie hashée d'un fichier: lien physique (aucun octet dupliqué), sinon copie"""
+    try:
+        os.link(source, target + ".tmp")
+    except FileExistsError:
+        os.remove(target + ".tmp")
+        os.link(source, target + ".tmp")
+    except OSError:
+        shutil.copyfile(source, target + ".tmp")
+    os.replace(target + ".tmp", target)
+
+def render_headers(site_dir, manifest):
+    """Fichier _headers: cache d'un an pour chaque fichier hashé (copies et site-styles)"""
+    hashed = set(manifest.values())
+    for root, subdirs, filenames in os.walk(site_dir):
+        subdirs[:] = [d for d in subdirs if d not in IGNORED_DIRS]
+        rel_root = os.path.relpath(root, site_dir).replace(os.sep, '/')
+        for filename in filenames:
+            if HASHED_NAME_PATTERN.search(filename):
+                hashed.add(posixpath.normpath(posixpath.join(rel_root, filename)))
+    rules = [f"/{quote(path, safe=LINK_SAFE)}\n  Cache-Control: {IMMUTABLE_CACHE}\n" for path in sorted(hashed)]
+    return ''.join(rules)
+
+def prepare_assets(site_dir=SITE_DIR, write=True):
+    """Calcule les copies hashées des assets et les écrit (avec le manifeste et _headers).
+
+    Seuls les fichiers dont l'empreinte a changé sont rehashés. Les CSS sont toujours
+    relues: leurs url() visent les copies hashées, leur hash dépend donc des fichiers
+    qu'elles citent. Renvoie les données de la transformation fingerprint_assets:
+    {'manifest': {original: copie}} (None s'il n'y a aucun asset).
+    """
+    index = load_index(site_dir)
+    known = index['assets']
+    assets = scan_assets(site_dir)
+    if not assets:
+        return None
+
+    entries = {}
+    manifest = {}
+    stylesheets = []
+    for path in assets:
+        if clean_name(path).lower().endswith('.css'):
+            stylesheets.append(path)
+            continue
+        filepath = os.path.join(site_dir, path)
+        stat = file_stat(filepath)
+        entry = known.get(path)
+        if entry is None or entry['stat'] != stat:
+            entry = {'stat': stat, 'hash': file_hash(filepath)}
+        entry = dict(entry, path=hashed_name(path, entry['hash']))
+        entries[path] = entry
+        manifest[path] = entry['path']
+
+    rewritten = {}
+    for path in stylesheets:
+        filepath = os.path.join(site_dir, path)
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                css = rewrite_references(f.read(), path, manifest).encode('utf-8')
+        except Exception as e:
+            print(f"Erreur {path}: {e}")
+            continue
+        digest = hashlib.sha256(css).hexdigest()
+        entries[path] = {'stat': file_stat(filepath), 'hash': digest, 'path': hashed_name(path, digest)}
+        manifest[path] = entries[path]['path']
+        rewritten[path] = css
+
+    if write:
+        for path, entry in entries.items():
+            target = os.path.join(site_dir, entry['path'])
+            if os.path.exists(target):
+                continue
+            if path in rewritten:
+                write_file(target, rewritten[path])
+            else:
+                link_copy(os.path.join(site_dir, path), target)
+
+        # Les copies précédentes restent en place tant que des pages (ou un cache) y renvoient
+        current = set(manifest.values())
+        previous = {entry['path'] for entry in known.values() if 'path' in entry} - current
+        for path in set(index['previous']) - current - previous:
+            try:
+                os.remove(os.path.join(site_dir, path))
+            except FileNotFoundError:
+                pass
+
+        index['assets'] = entries
+        index['previous'] = sorted(previous)
+        # Les noms déjà publiés restent connus pour pouvoir rétablir les pages
+        index['originals'].update({hashed: original for original, hashed in manifest.items()})
+        save_index(site_dir, index)
+
+        write_file(os.path.join(site_dir, MANIFEST_FILE),
+                   (json.dumps(manifest, indent=1, sort_keys=True) + '\n').encode('utf-8'))
+        write_file(os.path.join(site_dir, HEADERS_FILE), render_headers(site_dir, manifest).encode('utf-8'))
+
+    return {'manifest': manifest}
+
+def main():
+    parser = argparse.ArgumentParser(description="Crée les copies hashées des assets du site")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="racine du site exporté")
+    args = parser.parse_args()
+
+    print("🔍 Hash des assets du site...")
+    assets = prepare_assets(args.site_dir)
+    if assets is None:
+        print("\n⏭️ Aucun asset")
+        return
+    manifest = assets['manifest']
+    size = sum(os.path.getsize(os.path.join(args.site_dir, path)) for path in manifest)
+    print(f"   {len(manifest)} assets ({size / 1024 / 1024:.1f} Mo) avec un nom hashé")
+    print(f"\n✅ {MANIFEST_FILE} et {HEADERS_FILE} écrits")
+    print("   les pages sont réécrites par build_site.py (transformation fingerprint_assets)")
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,10 @@ Script pour corriger TOUS les liens internes du site estimation-maison.be
 import os
 import re
 import glob
+from collections import Counter
+
+import page_writer
+from link_rewriter import compile_link_rules, rewrite_links, print_hits
 
 SITE_DIR = "/Users/marc/Desktop/estimation-maison"
 
@@ -34,66 +38,52 @@ PAGE_MAPPING = {
     'index.html%3Fp=2745.html': 'prix-m2-par-province/index.html',
 }
 
-def fix_links_in_file(filepath):
-    """Corrige les liens dans un fichier HTML"""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original = content
-        
-        # Calcule la profondeur du fichier pour les chemins relatifs
-        rel_path = os.path.relpath(filepath, SITE_DIR)
-        depth = rel_path.count(os.sep)
-        prefix = "../" * depth if depth > 0 else ""
-        
-        # Remplace les liens mappés (avec et sans ../)
-        for old, new in PAGE_MAPPING.items():
-            # Version avec ../
-            content = content.replace(f'href="../{old}"', f'href="{prefix}{new}"')
-            # Version sans ../
-            content = content.replace(f'href="{old}"', f'href="{prefix}{new}"')
-        
-        # Corrige les liens vers les pages de provinces
-        province_mapping = {
-            'prix-m2-brabant-flamand.html': 'prix-m2-brabant-flamand/index.html',
-            'prix-m2-brabant-wallon.html': 'prix-m2-brabant-wallon/index.html', 
-            'prix-m2-bruxelles.html': 'prix-m2-bruxelles/index.html',
-            'prix-m2-flandre-occidentale.html': 'prix-m2-flandre-occidentale/index.html',
-            'prix-m2-flandre-orientale.html': 'prix-m2-flandre-orientale/index.html',
-            'prix-m2-hainaut.html': 'prix-m2-hainaut/index.html',
-            'prix-m2-limbourg.html': 'prix-m2-limbourg/index.html',
-            'prix-m2-liege.html': 'prix-m2-liege/index.html',
-            'prix-m2-luxembourg.html': 'prix-m2-luxembourg/index.html',
-            'prix-m2-namur.html': 'prix-m2-namur/index.html',
-            'prix-m2-anvers.html': 'prix-m2-anvers/index.html',
-        }
-        for old_page, new_page in province_mapping.items():
-            content = content.replace(f'href="../{old_page}"', f'href="{prefix}{new_page}"')
-            content = content.replace(f'href="{old_page}"', f'href="{prefix}{new_page}"')
-        
-        if content != original:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return True
-        return False
-    except Exception as e:
-        print(f"Erreur {filepath}: {e}")
-        return False
+# Mapping des pages de provinces exportées à plat vers leur dossier
+PROVINCE_PAGE_MAPPING = {
+    'prix-m2-brabant-flamand.html': 'prix-m2-brabant-flamand/index.html',
+    'prix-m2-brabant-wallon.html': 'prix-m2-brabant-wallon/index.html', 
+    'prix-m2-bruxelles.html': 'prix-m2-bruxelles/index.html',
+    'prix-m2-flandre-occidentale.html': 'prix-m2-flandre-occidentale/index.html',
+    'prix-m2-flandre-orientale.html': 'prix-m2-flandre-orientale/index.html',
+    'prix-m2-hainaut.html': 'prix-m2-hainaut/index.html',
+    'prix-m2-limbourg.html': 'prix-m2-limbourg/index.html',
+    'prix-m2-liege.html': 'prix-m2-liege/index.html',
+    'prix-m2-luxembourg.html': 'prix-m2-luxembourg/index.html',
+    'prix-m2-namur.html': 'prix-m2-namur/index.html',
+    'prix-m2-anvers.html': 'prix-m2-anvers/index.html',
+}
+
+# Toutes les règles compilées une seule fois (href="..." avec ou sans ../)
+LINK_RULES = compile_link_rules({**PAGE_MAPPING, **PROVINCE_PAGE_MAPPING}, quotes=('"',))
+
+def relative_prefix(rel_path):
+    """Calcule le préfixe ../ d'un fichier selon sa profondeur dans le site"""
+    depth = rel_path.count(os.sep)
+    return "../" * depth if depth > 0 else ""
+
+def fix_links_in_content(content, prefix, hits=None):
+    """Corrige les liens dans le contenu d'une page HTML"""
+    # Remplace les liens mappés et les pages de provinces (avec et sans ../)
+    return rewrite_links(content, LINK_RULES, prefix, hits)
 
 def main():
     # Trouve tous les fichiers HTML
-    html_files = glob.glob(os.path.join(SITE_DIR, "**/*.html"), recursive=True)
+    html_files = sorted(os.path.relpath(f, SITE_DIR)
+                        for f in glob.glob(os.path.join(SITE_DIR, "**/*.html"), recursive=True))
     
     print(f"Correction de {len(html_files)} fichiers HTML...")
     
-    fixed = 0
-    for filepath in html_files:
-        if fix_links_in_file(filepath):
-            fixed += 1
-            print(f"  ✅ {os.path.relpath(filepath, SITE_DIR)}")
+    hits = Counter()
+    # La profondeur du fichier donne le préfixe des chemins relatifs
+    changed, snapshot = page_writer.rewrite_pages(
+        SITE_DIR, html_files, lambda rel_path, content: fix_links_in_content(content, relative_prefix(rel_path), hits))
+    for rel_path in changed:
+        print(f"  ✅ {rel_path}")
     
-    print(f"\n✅ {fixed} fichiers corrigés")
+    print(f"\n✅ {len(changed)} fichiers corrigés")
+    if changed:
+        print(f"   annuler: python3 page_writer.py --rollback {snapshot}")
+    print_hits(hits)
 
 if __name__ == "__main__":
     main()
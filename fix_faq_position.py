@@ -8,65 +8,67 @@ import os
 import re
 import glob
 
+import page_writer
+
 SITE_DIR = "/Users/marc/Desktop/estimation-maison"
 
-def fix_faq_position(filepath):
-    """Déplace la FAQ après le bloc province"""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original = content
-        
-        # Vérifier si FAQ présente
-        if 'Questions fréquentes sur l\'immobilier à' not in content:
-            return False
-        
-        # Extraire le bloc FAQ
-        faq_pattern = r'<!-- FAQ personnalisée -->\s*<div style="margin-top: 40px; padding: 30px; background-color: #f8f9fa; border-radius: 8px;">.*?</div>\s*</div>'
-        faq_match = re.search(faq_pattern, content, re.DOTALL)
-        
-        if not faq_match:
-            return False
-        
-        faq_block = faq_match.group(0)
-        
-        # Supprimer la FAQ de sa position actuelle
-        content = re.sub(faq_pattern, '', content, flags=re.DOTALL)
-        
-        # Trouver la fin du bloc province (après le CTA "Découvrez les prix au m² dans la province")
-        # Le bloc province se termine par </div></div> avant </div></div></article>
-        
-        # Pattern pour trouver la fin du bloc province
-        province_end_pattern = r'(Découvrez les prix au m² dans la province de [^<]+\.\s*<br />\s*</a>\s*)</div>\s*</div>'
-        
-        if re.search(province_end_pattern, content):
-            # Insérer la FAQ après le bloc province, en dehors des divs imbriquées
-            replacement = r'\1</div>\n</div>\n\n' + faq_block
-            content = re.sub(province_end_pattern, replacement, content)
-        
-        if content != original:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return True
-        return False
-    except Exception as e:
-        print(f"Erreur {filepath}: {e}")
-        return False
+FAQ_START = '<!-- FAQ personnalisée -->'
+DIV_PATTERN = re.compile(r'<div\b|</div>')
+
+# Fin du lien vers la province, suivie de la FAQ puis des deux </div> qui ferment le bloc
+# province (carte + CTA)
+PROVINCE_END_PATTERN = re.compile(r'(Découvrez les prix au m² dans la province de [^<]+?\.?\s*<br />\s*</a>)\s*$')
+PROVINCE_CLOSE_PATTERN = re.compile(r'\s*</div>\s*</div>')
+
+def find_faq_block(content):
+    """Position (début, fin) du bloc FAQ (commentaire et <div> englobante), ou None"""
+    start = content.find(FAQ_START)
+    if start < 0:
+        return None
+    depth = 0
+    for match in DIV_PATTERN.finditer(content, start):
+        depth += 1 if match.group(0) == '<div' else -1
+        if depth == 0:
+            return start, match.end()
+    return None
+
+def fix_faq_position_content(content):
+    """Déplace la FAQ après le bloc province dans le contenu d'une page"""
+    # Vérifier si FAQ présente
+    if 'Questions fréquentes sur l\'immobilier à' not in content:
+        return content
+    
+    # Extraire le bloc FAQ (questions simples ou accordéon)
+    span = find_faq_block(content)
+    if span is None:
+        return content
+    start, end = span
+    
+    # La FAQ est encore dans le bloc province: juste après le lien vers la province,
+    # avant les </div> qui ferment le bloc
+    province_end = PROVINCE_END_PATTERN.search(content, 0, start)
+    province_close = PROVINCE_CLOSE_PATTERN.match(content, end)
+    if not province_end or not province_close:
+        return content
+    
+    # Insérer la FAQ après le bloc province, en dehors des divs imbriquées
+    return (content[:province_end.end(1)] + '\n\n\n</div>\n</div>\n\n'
+            + content[start:end] + content[province_close.end():])
 
 def main():
     print("🔧 Repositionnement de la FAQ sur les pages de villes...")
     
-    city_pages = glob.glob(os.path.join(SITE_DIR, "prix-m2-a-*/index.html"))
+    city_pages = sorted(os.path.relpath(f, SITE_DIR)
+                        for f in glob.glob(os.path.join(SITE_DIR, "prix-m2-a-*/index.html")))
     
     print(f"   {len(city_pages)} pages de villes à traiter\n")
     
-    fixed = 0
-    for filepath in city_pages:
-        if fix_faq_position(filepath):
-            fixed += 1
+    changed, snapshot = page_writer.rewrite_pages(
+        SITE_DIR, city_pages, lambda rel_path, content: fix_faq_position_content(content))
     
-    print(f"\n✅ {fixed} pages corrigées")
+    print(f"\n✅ {len(changed)} pages corrigées")
+    if changed:
+        print(f"   annuler: python3 page_writer.py --rollback {snapshot}")
 
 if __name__ == "__main__":
     main()
@@ -7,6 +7,10 @@ Remplace les liens cassés par des liens fonctionnels
 import os
 import re
 import glob
+from collections import Counter
+
+import page_writer
+from link_rewriter import compile_link_rules, rewrite_links, print_hits
 
 SITE_DIR = "/Users/marc/Desktop/estimation-maison"
 
@@ -35,51 +39,43 @@ def build_page_mapping():
     
     return mapping
 
-def fix_links_in_file(filepath, mapping):
-    """Corrige les liens dans un fichier HTML"""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original = content
-        
-        # Remplace les liens mappés
-        for old, new in mapping.items():
-            content = content.replace(f'href="{old}"', f'href="{new}"')
-            content = content.replace(f"href='{old}'", f"href='{new}'")
-        
-        # Supprime les liens vers wp-json, feed, comments, xmlrpc
-        content = re.sub(r'<link[^>]*href="[^"]*wp-json[^"]*"[^>]*/?>', '', content)
-        content = re.sub(r'<link[^>]*href="[^"]*feed/[^"]*"[^>]*/?>', '', content)
-        content = re.sub(r'<link[^>]*href="[^"]*comments/[^"]*"[^>]*/?>', '', content)
-        content = re.sub(r'<link[^>]*href="[^"]*xmlrpc[^"]*"[^>]*/?>', '', content)
-        
-        # Remplace les URLs absolues par des relatives
-        content = content.replace('https://estimation-maison.be/', '')
-        
-        if content != original:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return True
-        return False
-    except Exception as e:
-        print(f"Erreur {filepath}: {e}")
-        return False
+def compile_page_rules(mapping):
+    """Compile le mapping en règles de réécriture (href="..." et href='...', sans ../)"""
+    return compile_link_rules(mapping, allow_parent=False, keep_quote=True)
+
+def fix_links_in_content(content, rules, hits=None):
+    """Corrige les liens dans le contenu d'une page HTML"""
+    # Remplace les liens mappés
+    content = rewrite_links(content, rules, hits=hits)
+    
+    # Supprime les liens vers wp-json, feed, comments, xmlrpc
+    content = re.sub(r'<link[^>]*href="[^"]*wp-json[^"]*"[^>]*/?>', '', content)
+    content = re.sub(r'<link[^>]*href="[^"]*feed/[^"]*"[^>]*/?>', '', content)
+    content = re.sub(r'<link[^>]*href="[^"]*comments/[^"]*"[^>]*/?>', '', content)
+    content = re.sub(r'<link[^>]*href="[^"]*xmlrpc[^"]*"[^>]*/?>', '', content)
+    
+    # Remplace les URLs absolues par des relatives
+    content = content.replace('https://estimation-maison.be/', '')
+    
+    return content
 
 def main():
-    mapping = build_page_mapping()
+    rules = compile_page_rules(build_page_mapping())
+    hits = Counter()
     
     # Trouve tous les fichiers HTML
-    html_files = glob.glob(os.path.join(SITE_DIR, "**/*.html"), recursive=True)
+    html_files = sorted(os.path.relpath(f, SITE_DIR)
+                        for f in glob.glob(os.path.join(SITE_DIR, "**/*.html"), recursive=True))
     
     print(f"Correction de {len(html_files)} fichiers HTML...")
     
-    fixed = 0
-    for filepath in html_files:
-        if fix_links_in_file(filepath, mapping):
-            fixed += 1
+    changed, snapshot = page_writer.rewrite_pages(
+        SITE_DIR, html_files, lambda rel_path, content: fix_links_in_content(content, rules, hits))
     
-    print(f"✅ {fixed} fichiers corrigés")
+    print(f"✅ {len(changed)} fichiers corrigés")
+    if changed:
+        print(f"   annuler: python3 page_writer.py --rollback {snapshot}")
+    print_hits(hits)
     
     # Supprime les fichiers inutiles
     print("\nSuppression des fichiers inutiles...")
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Script pour regrouper les styles en ligne répétés dans une feuille de style partagée.
+Les attributs style="..." identiques présents sur plusieurs pages (encadrés de prix,
+FAQ, liens vers les communes voisines...) deviennent des classes générées (hs-xxxx),
+et les blocs <style> injectés à l'identique dans chaque <head> (accordéon de la FAQ)
+sont déplacés dans le même fichier: wp-content/site-styles.<hash>.css, dont le nom
+change avec le contenu (cache navigateur de longue durée).
+
+La transformation est réversible: build_site.py rétablit les styles en ligne avant
+les autres transformations (qui reconnaissent leur propre balisage), puis les regroupe
+à nouveau en fin de chaîne. Les déclarations sont comptées sur les pages telles
+qu'elles sont sur le disque: celles qu'une passe vient d'ajouter sont regroupées à la
+passe suivante.
+"""
+
+import os
+import re
+import json
+import glob
+import hashlib
+import argparse
+import posixpath
+
+from build_manifest import build_path, file_stat
+from fix_all_links import relative_prefix
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+INDEX_FILE = "styles.json"
+INDEX_VERSION = 1
+
+STYLESHEET_DIR = "wp-content"
+STYLESHEET_PREFIX = "site-styles."
+
+# Une déclaration n'est regroupée que si elle apparaît sur au moins MIN_PAGES pages
+MIN_PAGES = 3
+
+# Balise avec un attribut style (et sans attribut class, pour que la classe générée
+# puisse prendre sa place)
+STYLE_TAG_PATTERN = re.compile(r'<[a-zA-Z][a-zA-Z0-9]*[^<>]*? style="([^"]*)"[^<>]*>')
+# Bloc <style> sans attribut (ceux de WordPress ont un id et restent en place)
+STYLE_BLOCK_PATTERN = re.compile(r'<style>.*?</style>\n?', re.DOTALL)
+CLASS_PATTERN = re.compile(r' class="hs-([0-9a-f]{10})"')
+BLOCK_MARKER_PATTERN = re.compile(r'<!-- hs-block-([0-9a-f]{10}) -->')
+STYLESHEET_LINK = "<link rel='stylesheet' id='site-styles-css' href='{href}' type='text/css' media='all' />\n"
+STYLESHEET_LINK_PATTERN = re.compile(r"<link rel='stylesheet' id='site-styles-css' href='[^']*' type='text/css' media='all' />\n")
+
+def style_key(text):
+    """Identifiant court d'une déclaration ou d'un bloc"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:10]
+
+def is_hoistable(declaration):
+    """Déclaration recopiable telle quelle dans une feuille de style"""
+    return bool(declaration.strip()) and not any(c in declaration for c in '&{}<>') and 'url(' not in declaration
+
+def extract_styles(content):
+    """Déclarations en ligne (balises sans class) et blocs <style> d'une page"""
+    declarations = set()
+    for match in STYLE_TAG_PATTERN.finditer(content):
+        if ' class=' not in match.group(0) and is_hoistable(match.group(1)):
+            declarations.add(match.group(1))
+    blocks = set(STYLE_BLOCK_PATTERN.findall(content))
+    return declarations, blocks
+
+def expand_styles(content, index):
+    """Rétablit les styles en ligne et les blocs <style> regroupés (inverse de hoist_styles)"""
+    if 'site-styles-css' not in content:
+        return content
+    content = STYLESHEET_LINK_PATTERN.sub('', content, count=1)
+    classes, blocks = index['classes'], index['blocks']
+    content = CLASS_PATTERN.sub(lambda m: f' style="{classes[m.group(1)]}"' if m.group(1) in classes else m.group(0),
+                                content)
+    return BLOCK_MARKER_PATTERN.sub(lambda m: blocks.get(m.group(1), m.group(0)), content)
+
+def hoist_styles(content, rel_path, styles):
+    """Remplace les styles regroupés par leurs classes et ajoute la feuille de style à la page"""
+    if not styles or '</head>' not in content or 'site-styles-css' in content:
+        return content
+    by_declaration = styles['by_declaration']
+    hoisted = False
+
+    def replace(match):
+        nonlocal hoisted
+        tag, declaration = match.group(0), match.group(1)
+        key = by_declaration.get(declaration)
+        if key is None or ' class=' in tag:
+            return tag
+        hoisted = True
+        # ' style="..."' -> ' class="hs-..."', à la même place dans la balise
+        start = match.start(1) - match.start(0) - len(' style="')
+        end = match.end(1) - match.start(0) + 1
+        return f'{tag[:start]} class="hs-{key}"{tag[end:]}'
+
+    content = STYLE_TAG_PATTERN.sub(replace, content)
+    for key, block in styles['blocks'].items():
+        if block in content:
+            content = content.replace(block, f'<!-- hs-block-{key} -->')
+            hoisted = True
+    if not hoisted:
+        return content
+    link = STYLESHEET_LINK.format(href=relative_prefix(rel_path) + styles['stylesheet'])
+    return content.replace('</head>', link + '</head>', 1)
+
+def render_stylesheet(classes, blocks):
+    """Feuille de style: une règle par classe (!important, comme un style en ligne), puis les blocs"""
+    rules = []
+    for key, declaration in sorted(classes.items()):
+        properties = [p.strip() for p in declaration.split(';') if p.strip()]
+        properties = [p if p.endswith('!important') else f'{p} !important' for p in properties]
+        rules.append(f".hs-{key}{{{';'.join(properties)}}}")
+    for key, block in sorted(blocks.items()):
+        rules.append(block.strip()[len('<style>'):-len('</style>')].strip())
+    return '\n'.join(rules) + '\n'
+
+def load_index(site_dir):
+    """Charge l'index des styles (vide s'il n'existe pas ou n'est plus compatible)"""
+    try:
+        with open(build_path(site_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    if index.get('version') != INDEX_VERSION:
+        return {'version': INDEX_VERSION, 'classes': {}, 'blocks': {}, 'stylesheet': None, 'pages': {}}
+    return index
+
+def save_index(site_dir, index):
+    """Enregistre l'index (écriture dans un fichier temporaire puis renommage)"""
+    path = build_path(site_dir, INDEX_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def prepare_styles(site_dir=SITE_DIR, pages=None, contents=None, write=True):
+    """Compte les styles des pages et écrit la feuille de style partagée.
+
+    Seules les pages dont l'empreinte a changé sont relues (et rétablies avant
+    d'être analysées); `contents` ({chemin relatif: contenu}) évite de relire une
+    page déjà en mémoire. Renvoie les données de la transformation hoist_styles:
+    {'by_declaration', 'blocks', 'stylesheet', 'css'} (None si rien n'est à regrouper).
+    Le contenu de la feuille ('css') sert au CSS critique même s'il n'est pas écrit.
+    """
+    # Import local: source_pages dépend de ce module
+    from source_pages import restore_source
+
+    index = load_index(site_dir)
+    if pages is None:
+        pages = sorted(os.path.relpath(p, site_dir) for p in glob.glob(os.path.join(site_dir, "**/*.html"), recursive=True))
+
+    contents = contents or {}
+    known = index['pages']
+    updated = {}
+    for rel_path in pages:
+        stat = file_stat(os.path.join(site_dir, rel_path))
+        entry = known.get(rel_path)
+        if entry is None or entry['stat'] != stat:
+            content = contents.get(rel_path)
+            if content is None:
+                try:
+                    with open(os.path.join(site_dir, rel_path), 'r', encoding='utf-8') as f:
+                        content = f.read()
+                except Exception as e:
+                    print(f"Erreur {rel_path}: {e}")
+                    continue
+            declarations, blocks = extract_styles(restore_source(content, rel_path, site_dir))
+            entry = {'stat': stat, 'declarations': sorted(declarations), 'blocks': sorted(blocks)}
+        updated[rel_path] = entry
+    index['pages'] = updated
+
+    declaration_pages = {}
+    block_pages = {}
+    for entry in updated.values():
+        for declaration in entry['declarations']:
+            declaration_pages[declaration] = declaration_pages.get(declaration, 0) + 1
+        for block in entry['blocks']:
+            block_pages[block] = block_pages.get(block, 0) + 1
+    classes = {style_key(d): d for d, count in declaration_pages.items() if count >= MIN_PAGES}
+    blocks = {style_key(b): b for b, count in block_pages.items() if count >= MIN_PAGES}
+
+    # Les classes déjà publiées restent connues pour pouvoir rétablir les pages
+    index['classes'].update(classes)
+    index['blocks'].update(blocks)
+
+    styles = None
+    if classes or blocks:
+        css = render_stylesheet(classes, blocks)
+        stylesheet = posixpath.join(STYLESHEET_DIR, f"{STYLESHEET_PREFIX}{style_key(css)}.css")
+        styles = {'by_declaration': {d: k for k, d in classes.items()}, 'blocks': blocks,
+                  'stylesheet': stylesheet, 'css': css}
+        if write:
+            path = os.path.join(site_dir, stylesheet)
+            if not os.path.exists(path):
+                with open(path + ".tmp", 'w', encoding='utf-8') as f:
+                    f.write(css)
+                os.replace(path + ".tmp", path)
+            # La feuille précédente reste en place tant que des pages peuvent y renvoyer
+            keep = {stylesheet, index['stylesheet']}
+            for filepath in glob.glob(os.path.join(site_dir, STYLESHEET_DIR, f"{STYLESHEET_PREFIX}*.css")):
+                if posixpath.join(STYLESHEET_DIR, os.path.basename(filepath)) not in keep:
+                    os.remove(filepath)
+            index['stylesheet'] = stylesheet
+
+    if write:
+        save_index(site_dir, index)
+    return styles
+
+def main():
+    parser = argparse.ArgumentParser(description="Regroupe les styles en ligne répétés dans une feuille de style")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="racine du site exporté")
+    args = parser.parse_args()
+
+    print("🔍 Recherche des styles en ligne répétés...")
+    styles = prepare_styles(args.site_dir)
+    if styles is None:
+        print("\n⏭️ Aucun style répété")
+        return
+    size = os.path.getsize(os.path.join(args.site_dir, styles['stylesheet']))
+    print(f"   {len(styles['by_declaration'])} déclarations et {len(styles['blocks'])} blocs <style> regroupés")
+    print(f"\n✅ {styles['stylesheet']} ({size} octets)")
+    print("   les pages sont réécrites par build_site.py (transformation hoist_styles)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Script pour importer les prix trimestriels des communes (CSV ou Parquet).
+Le fichier donne, par commune, le prix moyen au m² tout type de bien et, si connus,
+le prix moyen et la fourchette des maisons et des appartements:
+
+    commune,prix,maison,maison_min,maison_max,appartement,appartement_min,appartement_max
+
+Il est d'abord validé: communes inconnues (ni dossier, ni nom de page, ni alias
+néerlandais), valeurs illisibles ou hors limites, fourchettes incohérentes,
+doublons, variations suspectes par rapport aux prix publiés (ignorées sans
+--accept-outliers) et communes absentes du fichier (leurs pages ne changent pas).
+Une erreur annule tout l'import (code de sortie 1), sauf avec --allow-partial qui
+importe les lignes valides.
+Les lignes sont ensuite jointes au jeu de données des villes (city_dataset): seules
+les pages dont un chiffre change sont lues puis réécrites, une à une, dans une
+transaction (page_writer): grand prix de l'encadré, phrase « Le prix moyen au m²
+... est de » (introduction et description), encadrés maison/appartement et réponse
+de la FAQ. Un rapport des pages modifiées (CSV) est écrit dans .build/.
+"""
+
+import os
+import re
+import csv
+import sys
+import time
+import argparse
+
+import page_writer
+from build_manifest import build_path
+from city_dataset import load_city_dataset
+from city_neighbors import city_keys
+from city_index import normalize_city_name
+from source_pages import read_source_page
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+REPORT_FILE = "price_import_report.csv"
+
+# Colonnes du fichier (la première trouvée est utilisée)
+IMPORT_COLUMNS = {
+    'commune': ('commune', 'nom', 'slug'),
+    'prix': ('prix', 'prix_m2'),
+}
+PROPERTY_TYPES = ('maison', 'appartement')
+
+# Prix au m² plausibles, et variation au-delà de laquelle une ligne est suspecte
+PRICE_LIMITS = (300, 20000)
+MAX_CHANGE = 0.30
+
+# Champs de prix des pages de ville (styles en ligne rétablis): préfixe, nombre, suffixe
+HEADLINE_PATTERN = re.compile(r'(<p style="font-size: 80px; font-weight: bold;[^>]*>)([\d\s]+?)(\s*€ / m²</p>)')
+SENTENCE_PATTERN = re.compile(r'(prix moyen au m² à [^<"]+? pour tous les types de biens est de )([\d\s]+?)(\s*€)')
+FAQ_PRICE_PATTERN = re.compile(r"(Le prix moyen au mètre carré à [^<]+? est d'environ )([\d\s]+?)(\s*€)")
+TYPE_BOX_PATTERN = re.compile(
+    r'(fa-(home|building)\b[^>]*></i>(?:(?!</div>).)*?<p style="font-size: 40px;[^>]*>)([\d\s]+?)'
+    r'(\s*€ / m²</p>\s*<p[^>]*>Fourchette de prix:<br />\s*de )([\d\s]+?)(\s*€ à )([\d\s]+?)(\s*€)', re.S)
+TYPE_ICONS = {'home': 'maison', 'building': 'appartement'}
+
+def parse_value(value):
+    """Prix lu dans le fichier (2216, "2 216", "2216,4"...) en euros entiers, None si vide"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return round(value)
+    text = re.sub(r'\s', '', str(value)).replace(',', '.')
+    if not text:
+        return None
+    if not re.fullmatch(r'\d+(?:\.\d+)?', text):
+        raise ValueError(f"prix illisible: {value!r}")
+    return round(float(text))
+
+def read_rows(path):
+    """Lignes du fichier (CSV ou Parquet), colonnes en minuscules: [(numéro de ligne, {colonne: valeur})]"""
+    if path.lower().endswith('.parquet'):
+        if pq is None:
+            raise ValueError("pyarrow n'est pas installé: fichiers Parquet illisibles")
+        rows = pq.read_table(path).to_pylist()
+        return [(number, {str(k).strip().lower(): v for k, v in row.items()})
+                for number, row in enumerate(rows, start=2)]
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        sample = f.read(4096)
+        f.seek(0)
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t') if sample else csv.excel
+        reader = csv.DictReader(f, dialect=dialect)
+        return [(number, {(k or '').strip().lower(): v for k, v in row.items()})
+                for number, row in enumerate(reader, start=2)]
+
+def column(row, role):
+    """Valeur d'une colonne d'après ses noms possibles"""
+    for name in IMPORT_COLUMNS[role]:
+        if name in row:
+            return row[name]
+    return None
+
+def parse_row(row):
+    """Prix d'une ligne: {'prix': n, 'maison': [moyen, min, max] ou None, ...}; ValueError si invalide"""
+    prices = {'prix': parse_value(column(row, 'prix'))}
+    if prices['prix'] is None:
+        raise ValueError("prix manquant")
+    for property_type in PROPERTY_TYPES:
+        figures = [parse_value(row.get(property_type)), parse_value(row.get(f"{property_type}_min")),
+                   parse_value(row.get(f"{property_type}_max"))]
+        if figures == [None, None, None]:
+            prices[property_type] = None
+            continue
+        if None in figures:
+            raise ValueError(f"{property_type}: prix moyen, minimum et maximum attendus ensemble")
+        if not figures[1] <= figures[0] <= figures[2]:
+            raise ValueError(f"{property_type}: fourchette incohérente ({figures[1]} > {figures[0]} > {figures[2]})")
+        prices[property_type] = figures
+    for value in [prices['prix']] + [v for t in PROPERTY_TYPES if prices[t] for v in prices[t]]:
+        if not PRICE_LIMITS[0] <= value <= PRICE_LIMITS[1]:
+            raise ValueError(f"prix hors limites: {value} € / m² ({PRICE_LIMITS[0]}-{PRICE_LIMITS[1]})")
+    return prices
+
+def validate_import(rows, dataset):
+    """Valide les lignes et les joint aux pages de ville.
+
+    Renvoie {'prices': {slug: prix}, 'errors': [(ligne, commune, message)],
+    'unknown': [(ligne, commune)], 'outliers': [(slug, ancien, nouveau)], 'missing': [slug]}.
+    """
+    keys = city_keys(dataset)
+    result = {'prices': {}, 'errors': [], 'unknown': [], 'outliers': [], 'missing': []}
+    lines = {}
+    for number, row in rows:
+        name = column(row, 'commune')
+        name = str(name).strip() if name is not None else ''
+        if not name:
+            result['errors'].append((number, '', "commune manquante"))
+            continue
+        slug = keys.get(normalize_city_name(name))
+        if slug is None:
+            result['unknown'].append((number, name))
+            continue
+        if slug in lines:
+            result['errors'].append((number, name, f"doublon de la ligne {lines[slug]}"))
+            continue
+        lines[slug] = number
+        try:
+            prices = parse_row(row)
+        except ValueError as e:
+            result['errors'].append((number, name, str(e)))
+            continue
+        old = dataset[slug]['price_eur']
+        if old and abs(prices['prix'] / old - 1) > MAX_CHANGE:
+            result['outliers'].append((slug, old, prices['prix']))
+        result['prices'][slug] = prices
+    result['missing'] = [slug for slug in dataset if slug not in lines]
+    return result
+
+def format_like(value, old):
+    """Prix formaté avec le séparateur de milliers du champ remplacé (2 216, 2 216...)"""
+    separator = next((c for c in old.strip() if not c.isdigit()), ' ')
+    return f"{value:,}".replace(',', separator)
+
+def replace_number(pattern, content, value, group=2, count=0):
+    """Remplace le nombre (groupe `group`) des champs d'un motif; renvoie (contenu, champs trouvés)"""
+    found = 0
+
+    def replace(match):
+        nonlocal found
+        found += 1
+        return (match.string[match.start():match.start(group)] + format_like(value, match.group(group))
+                + match.string[match.end(group):match.end()])
+
+    return pattern.sub(replace, content, count=count), found
+
+def update_page_prices(content, prices):
+    """Réécrit tous les champs de prix d'une page de ville; renvoie (contenu, champs introuvables)"""
+    missing = []
+    content, found = replace_number(HEADLINE_PATTERN, content, prices['prix'], count=1)
+    if not found:
+        missing.append('encadré')
+    content, found = replace_number(SENTENCE_PATTERN, content, prices['prix'])
+    if not found:
+        missing.append('phrase')
+    content = replace_number(FAQ_PRICE_PATTERN, content, prices['prix'], count=1)[0]
+
+    def replace_box(match):
+        figures = prices.get(TYPE_ICONS[match.group(2)])
+        if not figures:
+            return match.group(0)
+        average, low, high = figures
+        return (match.group(1) + format_like(average, match.group(3)) + match.group(4)
+                + format_like(low, match.group(5)) + match.group(6) + format_like(high, match.group(7))
+                + match.group(8))
+
+    types = {TYPE_ICONS[m.group(2)] for m in TYPE_BOX_PATTERN.finditer(content)}
+    missing.extend(t for t in PROPERTY_TYPES if prices.get(t) and t not in types)
+    return TYPE_BOX_PATTERN.sub(replace_box, content), missing
+
+def page_changes(record, prices):
+    """Chiffres qui changent sur la page d'une ville (liste vide si aucun)"""
+    changes = []
+    if record['price_eur'] != prices['prix']:
+        changes.append('prix')
+    for property_type in PROPERTY_TYPES:
+        if prices[property_type] and record['type_prices'].get(property_type) != prices[property_type]:
+            changes.append(property_type)
+    return changes
+
+def import_prices(site_dir, prices, dataset, write=True):
+    """Réécrit les pages dont un prix change; renvoie les compteurs et les lignes du rapport"""
+    result = {'changed': [], 'unchanged': 0, 'incomplete': [], 'errors': [], 'snapshot': None}
+    tx = page_writer.begin_transaction(site_dir) if write else None
+    for slug, new_prices in sorted(prices.items()):
+        record = dataset[slug]
+        changes = page_changes(record, new_prices)
+        if not changes:
+            result['unchanged'] += 1
+            continue
+
+        filepath = os.path.join(site_dir, record['path'])
+        try:
+            # Styles en ligne et assets d'origine rétablis: build_site.py les regroupera
+            # et les hashera à nouveau
+            content = read_source_page(site_dir, record['path'])
+
+            new_content, missing = update_page_prices(content, new_prices)
+            if missing:
+                result['incomplete'].append((slug, missing))
+            if new_content == content:
+                result['unchanged'] += 1
+                continue
+            old = record['price_eur']
+            result['changed'].append({
+                'slug': slug,
+                'page': record['path'],
+                'ancien_prix': old,
+                'nouveau_prix': new_prices['prix'],
+                'variation': f"{(new_prices['prix'] / old - 1) * 100:+.1f} %" if old else '',
+                'champs': ' '.join(changes),
+            })
+            if write:
+                page_writer.write_page(tx, record['path'], new_content)
+        except Exception as e:
+            print(f"Erreur {filepath}: {e}")
+            result['errors'].append(slug)
+    if tx is not None:
+        page_writer.commit(tx)
+        result['snapshot'] = tx['snapshot_id']
+    return result
+
+def write_report(path, changed):
+    """Rapport des pages modifiées (CSV)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    fields = ['slug', 'page', 'ancien_prix', 'nouveau_prix', 'variation', 'champs']
+    with open(path + ".tmp", 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(changed)
+    os.replace(path + ".tmp", path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Importe les prix des communes (CSV ou Parquet) dans les pages de ville")
+    parser.add_argument('file', help="fichier des prix (.csv ou .parquet)")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="racine du site exporté")
+    parser.add_argument('--check', action='store_true',
+                        help="n'écrit rien, valide le fichier et liste les pages qui seraient modifiées")
+    parser.add_argument('--accept-outliers', action='store_true',
+                        help=f"importe aussi les prix qui varient de plus de {MAX_CHANGE * 100:.0f} %%")
+    parser.add_argument('--allow-partial', action='store_true',
+                        help="importe les lignes valides malgré des lignes en erreur ou des communes inconnues")
+    parser.add_argument('--report', help=f"rapport des pages modifiées (par défaut: .build/{REPORT_FILE})")
+    args = parser.parse_args()
+
+    print(f"🔧 Import des prix depuis {args.file}...")
+    start = time.perf_counter()
+    try:
+        rows = read_rows(args.file)
+    except (OSError, ValueError, csv.Error) as e:
+        print(f"❌ Erreur {args.file}: {e}")
+        sys.exit(1)
+    dataset = load_city_dataset(args.site_dir)
+    validation = validate_import(rows, dataset)
+    prices = validation['prices']
+
+    print(f"   {len(rows)} lignes, {len(prices)} communes reconnues sur {len(dataset)} pages")
+    for number, name, message in validation['errors']:
+        print(f"  ❌ ligne {number} ({name}): {message}")
+    if validation['unknown']:
+        print(f"  ❌ {len(validation['unknown'])} communes inconnues: "
+              + ', '.join(f"{name} (ligne {number})" for number, name in validation['unknown'][:10]))
+    if validation['outliers']:
+        action = "importés" if args.accept_outliers else "ignorés (--accept-outliers pour les importer)"
+        print(f"  ⚠️ {len(validation['outliers'])} prix varient de plus de {MAX_CHANGE:.0%}, {action}:")
+        for slug, old, new in validation['outliers'][:10]:
+            print(f"     {slug}: {old} -> {new} € / m²")
+        if not args.accept_outliers:
+            for slug, old, new in validation['outliers']:
+                del prices[slug]
+    if validation['missing']:
+        print(f"  ⚠️ {len(validation['missing'])} pages sans ligne dans le fichier (prix inchangés): "
+              f"{', '.join(validation['missing'][:10])}")
+
+    # Un lot trimestriel est importé en entier ou pas du tout
+    invalid = bool(validation['errors'] or validation['unknown'])
+    if invalid and not args.allow_partial and not args.check:
+        print("\n❌ Import annulé, aucune page modifiée: corriger le fichier "
+              "(ou --allow-partial pour importer les lignes valides)")
+        sys.exit(1)
+
+    result = import_prices(args.site_dir, prices, dataset, write=not args.check)
+    elapsed = time.perf_counter() - start
+    for slug, missing in result['incomplete']:
+        print(f"  ⚠️ {slug}: champs introuvables dans la page ({', '.join(missing)})")
+
+    report = args.report or build_path(args.site_dir, REPORT_FILE)
+    write_report(report, result['changed'])
+    if args.check:
+        print(f"\n📊 {len(result['changed'])} pages seraient modifiées, {result['unchanged']} inchangées ({elapsed:.2f} s)")
+    else:
+        print(f"\n✅ {len(result['changed'])} pages modifiées, {result['unchanged']} inchangées ({elapsed:.2f} s)")
+        if result['changed']:
+            print(f"   annuler: python3 page_writer.py --rollback {result['snapshot']}")
+            print("   lancer build_site.py pour mettre à jour les statistiques, la FAQ et les tables de prix")
+    print(f"   rapport: {report}")
+    if result['errors']:
+        print(f"❌ {len(result['errors'])} erreurs")
+    if result['errors'] or (invalid and not args.allow_partial):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Script pour vérifier les liens du site (graphe des liens).
+Extrait en une passe tous les href/src/srcset de chaque page HTML, résout chaque
+lien dans l'arborescence (y compris les assets exportés en "fichier?ver=X", liés
+en "fichier%3Fver=X") et signale les liens cassés, les pages orphelines et les
+liens qui passent encore par une redirection (anciennes URLs réécrites par les
+scripts de correction). Le graphe est conservé dans .build/link_graph.json:
+une nouvelle passe ne relit que les pages modifiées.
+"""
+
+import os
+import re
+import html
+import json
+import time
+import argparse
+import posixpath
+from urllib.parse import unquote
+
+import fix_links
+import fix_all_links
+from link_rewriter import wp_link
+from build_manifest import build_path, file_stat
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+GRAPH_FILE = "link_graph.json"
+GRAPH_VERSION = 1
+
+# Dossiers qui ne font pas partie du site publié
+IGNORED_DIRS = {'.build', '.git', 'templates'}
+
+# Pas de \b en tête: ce test par position coûte plus cher que toute l'extraction
+LINK_PATTERN = re.compile(r'(href|src|srcset)=(?:"([^"]*)"|\'([^\']*)\')')
+EXTERNAL_PATTERN = re.compile(r'^(?:[a-z][a-z0-9+.\-]*:|//)', re.I)
+
+def scan_site(site_dir):
+    """Liste les fichiers du site: (pages HTML, tous les fichiers, dossiers)"""
+    files = set()
+    dirs = {''}
+    for root, subdirs, filenames in os.walk(site_dir):
+        subdirs[:] = [d for d in subdirs if d not in IGNORED_DIRS]
+        rel_root = os.path.relpath(root, site_dir).replace(os.sep, '/')
+        rel_root = '' if rel_root == '.' else rel_root
+        for d in subdirs:
+            dirs.add(posixpath.join(rel_root, d))
+        for filename in filenames:
+            files.add(posixpath.join(rel_root, filename))
+    pages = sorted(f for f in files if f.endswith('.html'))
+    return pages, files, dirs
+
+def extract_links(content):
+    """Tous les liens (attribut, cible) d'une page, dans l'ordre"""
+    links = []
+    for match in LINK_PATTERN.finditer(content):
+        attr, double, single = match.groups()
+        value = double if double is not None else single
+        if attr == 'srcset':
+            for candidate in value.split(','):
+                candidate = candidate.strip()
+                if candidate:
+                    links.append(['src', candidate.split()[0]])
+        else:
+            links.append([attr, value])
+    return links
+
+def load_graph(site_dir):
+    """Charge le graphe enregistré (vide s'il n'existe pas ou n'est plus compatible)"""
+    try:
+        with open(build_path(site_dir, GRAPH_FILE), 'r', encoding='utf-8') as f:
+            graph = json.load(f)
+    except (OSError, ValueError):
+        return {'version': GRAPH_VERSION, 'pages': {}}
+    if graph.get('version') != GRAPH_VERSION:
+        return {'version': GRAPH_VERSION, 'pages': {}}
+    return graph
+
+def save_graph(site_dir, graph):
+    """Enregistre le graphe (écriture dans un fichier temporaire puis renommage)"""
+    path = build_path(site_dir, GRAPH_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(graph, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def update_graph(site_dir, pages):
+    """Met à jour le graphe: seules les pages dont l'empreinte a changé sont relues"""
+    graph = load_graph(site_dir)
+    known = graph['pages']
+    updated = {}
+    read = 0
+    for rel_path in pages:
+        stat = file_stat(os.path.join(site_dir, rel_path))
+        entry = known.get(rel_path)
+        if entry is None or entry['stat'] != stat:
+            try:
+                with open(os.path.join(site_dir, rel_path), 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except Exception as e:
+                print(f"Erreur {rel_path}: {e}")
+                continue
+            entry = {'stat': stat, 'links': extract_links(content)}
+            read += 1
+        updated[rel_path] = entry
+    graph['pages'] = updated
+    if read or len(updated) != len(known):
+        save_graph(site_dir, graph)
+    return graph, read
+
+def resolve_link(rel_path, target):
+    """Chemin (relatif à la racine) visé par un lien interne, ou None s'il est externe"""
+    target = html.unescape(target).strip()
+    if not target or target.startswith('#') or EXTERNAL_PATTERN.match(target):
+        return None
+    target = target.split('#', 1)[0]
+    # Une vraie query string (?x=...) est ignorée par le serveur statique;
+    # encodée (%3F), elle fait partie du nom du fichier exporté
+    target = unquote(target.split('?', 1)[0])
+    if target.startswith('/'):
+        path = posixpath.normpath(target.lstrip('/') or '.')
+    else:
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(rel_path), target))
+    return '' if path == '.' else path
+
+def find_target(path, files, dirs):
+    """Fichier servi pour un chemin (dossier -> index.html), ou None"""
+    if path in files:
+        return path
+    if path in dirs:
+        index = posixpath.join(path, 'index.html')
+        if index in files:
+            return index
+    return None
+
+def build_redirects(site_dir):
+    """Anciennes URLs réécrites par les scripts de correction ({source: destination})"""
+    redirects = {}
+    for mapping in (fix_all_links.PROVINCE_PAGE_MAPPING, fix_all_links.PAGE_MAPPING, fix_links.PAGE_MAPPING):
+        redirects.update(mapping)
+    # Import local: city_dataset dépend de ce module (via responsive_images)
+    from city_dataset import load_city_dataset
+    for record in load_city_dataset(site_dir).values():
+        if record['wp_id']:
+            redirects.setdefault(wp_link(record['wp_id']), record['path'])
+    return {unquote(source): unquote(dest) for source, dest in redirects.items()}
+
+def follow_redirects(path, redirects):
+    """Suit les redirections depuis un chemin: liste des étapes (boucle -> None)"""
+    chain = [path]
+    while path in redirects:
+        path = redirects[path]
+        if path in chain:
+            return None
+        chain.append(path)
+    return chain
+
+def check_links(graph, files, dirs, redirects):
+    """Analyse le graphe: liens cassés, redirections, pages orphelines"""
+    report = {'links': 0, 'external': 0, 'broken': [], 'redirects': [], 'orphans': []}
+    inbound = {rel_path: 0 for rel_path in graph['pages']}
+    resolved = {}
+
+    for rel_path, entry in graph['pages'].items():
+        for attr, target in entry['links']:
+            key = (posixpath.dirname(rel_path), target)
+            if key not in resolved:
+                resolved[key] = resolve_link(rel_path, target)
+            path = resolved[key]
+            if path is None:
+                report['external'] += 1
+                continue
+            report['links'] += 1
+
+            if path in redirects:
+                chain = follow_redirects(path, redirects)
+                final = find_target(chain[-1], files, dirs) if chain else None
+                report['redirects'].append((rel_path, target, chain))
+                if final is None:
+                    report['broken'].append((rel_path, attr, target))
+            else:
+                final = find_target(path, files, dirs)
+                if final is None:
+                    report['broken'].append((rel_path, attr, target))
+
+            if final in inbound and final != rel_path:
+                inbound[final] += 1
+
+    report['orphans'] = sorted(p for p, count in inbound.items() if count == 0 and p != 'index.html')
+    return report
+
+def check_site_links(site_dir=SITE_DIR):
+    """Met à jour le graphe du site et le vérifie; renvoie le rapport"""
+    pages, files, dirs = scan_site(site_dir)
+    graph, read = update_graph(site_dir, pages)
+    report = check_links(graph, files, dirs, build_redirects(site_dir))
+    report.update(pages=len(pages), read=read)
+    return report
+
+def print_report(report, limit=10):
+    """Affiche le rapport de vérification"""
+    print(f"   {report['links']} liens internes vérifiés ({report['external']} externes ignorés)")
+
+    if report['broken']:
+        print(f"\n❌ {len(report['broken'])} liens cassés")
+        for rel_path, attr, target in report['broken'][:limit]:
+            print(f"     {rel_path}: {attr}=\"{target}\"")
+    else:
+        print("\n✅ Aucun lien cassé")
+
+    chains = [r for r in report['redirects'] if r[2] is None or len(r[2]) > 2]
+    if report['redirects']:
+        print(f"\n⚠️ {len(report['redirects'])} liens vers une ancienne URL ({len(chains)} chaînes de redirections)")
+        for rel_path, target, chain in (chains or report['redirects'])[:limit]:
+            steps = ' -> '.join(chain) if chain else 'boucle'
+            print(f"     {rel_path}: {target} ({steps})")
+
+    if report['orphans']:
+        print(f"\n⚠️ {len(report['orphans'])} pages orphelines (aucun lien entrant)")
+        for rel_path in report['orphans'][:limit]:
+            print(f"     {rel_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérifie les liens internes du site")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="racine du site exporté")
+    parser.add_argument('--limit', type=int, default=10, help="nombre d'exemples affichés par catégorie")
+    args = parser.parse_args()
+
+    print("🔍 Vérification des liens du site...")
+
+    start = time.perf_counter()
+    report = check_site_links(args.site_dir)
+    print(f"   {report['pages']} pages, {report['read']} relues ({time.perf_counter() - start:.2f} s)")
+
+    print_report(report, args.limit)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Moteur commun de réécriture de liens.
+Toutes les règles {ancien lien: nouveau lien} sont compilées en un seul motif
+générique + un dictionnaire: chaque page est parcourue une seule fois et chaque
+href trouvé coûte une recherche O(1), quel que soit le nombre de règles.
+"""
+
+import re
+from collections import Counter
+
+def compile_link_rules(mapping, quotes=('"', "'"), allow_parent=True, keep_quote=False):
+    """Compile des règles de réécriture de liens.
+
+    - quotes: délimiteurs d'attribut reconnus (href="..." et/ou href='...')
+    - allow_parent: accepte aussi la variante préfixée par ../
+    - keep_quote: conserve le délimiteur d'origine (sinon réécrit en "...")
+    """
+    quote_class = ''.join(re.escape(q) for q in quotes)
+    parent = r'((?:\.\./)?)' if allow_parent else r'()'
+    pattern = re.compile(rf'href=([{quote_class}]){parent}([^"\'<>\s]+)\1')
+    return {
+        'pattern': pattern,
+        'mapping': dict(mapping),
+        'keep_quote': keep_quote,
+    }
+
+def rewrite_links(content, rules, prefix='', hits=None):
+    """Réécrit en un seul parcours tous les liens couverts par les règles.
+
+    Le nouveau lien est préfixé par `prefix` (profondeur de la page).
+    Si `hits` (un Counter) est fourni, il est incrémenté pour chaque règle appliquée.
+    """
+    mapping = rules['mapping']
+    if not mapping:
+        return content
+
+    keep_quote = rules['keep_quote']
+
+    def replace(match):
+        quote, _, target = match.groups()
+        new = mapping.get(target)
+        if new is None:
+            return match.group(0)
+        if hits is not None:
+            hits[target] += 1
+        if not keep_quote:
+            quote = '"'
+        return f'href={quote}{prefix}{new}{quote}'
+
+    return rules['pattern'].sub(replace, content)
+
+def wp_link(wp_id):
+    """Nom du fichier exporté pour un lien WordPress ?p=ID"""
+    return f'index.html%3Fp={wp_id}.html'
+
+def print_hits(hits, limit=10):
+    """Affiche le nombre de liens réécrits par règle"""
+    print(f"   {sum(hits.values())} liens réécrits, {len(hits)} règles utilisées")
+    for target, count in Counter(hits).most_common(limit):
+        print(f"     {count:>5}  {target}")
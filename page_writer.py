@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Écriture transactionnelle des pages du site.
+Chaque page est écrite dans un fichier temporaire puis renommée (os.replace):
+une page n'est jamais à moitié écrite. Les fsync sont faits par lots, et avant
+d'être remplacée, la version d'origine de chaque page est conservée par un lien
+physique dans .build/snapshots/<id>/ (aucune copie): une passe interrompue ou
+non désirée s'annule en ne restaurant que les fichiers modifiés.
+Les scripts de correction (fix_*, add_faq_to_cities...) réécrivent leurs pages par
+rewrite_pages: une exception arrête la passe au lieu d'être seulement affichée.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+
+from build_manifest import build_path
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+SNAPSHOTS_DIR = "snapshots"
+JOURNAL_FILE = "journal.json"
+FSYNC_BATCH = 64
+KEEP_SNAPSHOTS = 3
+
+def _fsync_dir(path):
+    """Rend durable un renommage dans un dossier (sans effet sous Windows)"""
+    if sys.platform == 'win32':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _save_journal(tx):
+    """Enregistre la liste des pages modifiées/créées avant de les remplacer"""
+    path = os.path.join(tx['snapshot_dir'], JOURNAL_FILE)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump({'changed': tx['changed'], 'created': tx['created'], 'done': tx['done']}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+def list_snapshots(site_dir):
+    """Identifiants des instantanés, du plus ancien au plus récent"""
+    root = build_path(site_dir, SNAPSHOTS_DIR)
+    if not os.path.isdir(root):
+        return []
+    return sorted(d for d in os.listdir(root) if os.path.isfile(os.path.join(root, d, JOURNAL_FILE)))
+
+# Horodatage (ns) du dernier instantané créé par ce processus
+_last_snapshot_ns = 0
+
+def new_snapshot_id():
+    """Identifiant d'instantané: date, nanosecondes puis pid (l'ordre alphabétique est
+    l'ordre de création, y compris entre processus dans la même seconde)"""
+    global _last_snapshot_ns
+    _last_snapshot_ns = max(time.time_ns(), _last_snapshot_ns + 1)
+    seconds, nanoseconds = divmod(_last_snapshot_ns, 10 ** 9)
+    return time.strftime("%Y%m%d-%H%M%S", time.localtime(seconds)) + f"-{nanoseconds:09d}-{os.getpid()}"
+
+def begin_transaction(site_dir, batch=FSYNC_BATCH):
+    """Démarre une transaction d'écriture (et son instantané)"""
+    os.makedirs(build_path(site_dir, SNAPSHOTS_DIR), exist_ok=True)
+    while True:
+        snapshot_id = new_snapshot_id()
+        snapshot_dir = build_path(site_dir, SNAPSHOTS_DIR, snapshot_id)
+        try:
+            os.mkdir(snapshot_dir)
+            break
+        except FileExistsError:
+            continue
+    tx = {
+        'site_dir': site_dir,
+        'snapshot_id': snapshot_id,
+        'snapshot_dir': snapshot_dir,
+        'batch': batch,
+        'pending': [],
+        'changed': [],
+        'created': [],
+        'done': False,
+    }
+    _save_journal(tx)
+
+    # Seuls les derniers instantanés sont conservés
+    for old in list_snapshots(site_dir)[:-KEEP_SNAPSHOTS]:
+        shutil.rmtree(build_path(site_dir, SNAPSHOTS_DIR, old), ignore_errors=True)
+    return tx
+
+def write_page(tx, rel_path, content):
+    """Écrit une page dans un fichier temporaire (remplacée au prochain lot)"""
+    filepath = os.path.join(tx['site_dir'], rel_path)
+    tmp_path = filepath + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    if rel_path not in tx['pending']:
+        tx['pending'].append(rel_path)
+    if len(tx['pending']) >= tx['batch']:
+        flush(tx)
+
+def _snapshot(tx, rel_path):
+    """Conserve la version d'origine d'une page (lien physique, copie à défaut)"""
+    filepath = os.path.join(tx['site_dir'], rel_path)
+    if not os.path.exists(filepath):
+        tx['created'].append(rel_path)
+        return
+    target = os.path.join(tx['snapshot_dir'], rel_path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(filepath, target)
+    except OSError:
+        shutil.copy2(filepath, target)
+    tx['changed'].append(rel_path)
+
+def flush(tx):
+    """Rend durables les pages en attente: fsync du lot, journal, puis renommages"""
+    pending = tx['pending']
+    if not pending:
+        return
+    for rel_path in pending:
+        fd = os.open(os.path.join(tx['site_dir'], rel_path) + ".tmp", os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    known = set(tx['changed']) | set(tx['created'])
+    for rel_path in pending:
+        if rel_path not in known:
+            _snapshot(tx, rel_path)
+    _save_journal(tx)
+
+    dirs = set()
+    for rel_path in pending:
+        filepath = os.path.join(tx['site_dir'], rel_path)
+        os.replace(filepath + ".tmp", filepath)
+        dirs.add(os.path.dirname(filepath))
+    for directory in dirs:
+        _fsync_dir(directory)
+    tx['pending'] = []
+
+def commit(tx):
+    """Termine la transaction: toutes les pages écrites sont en place"""
+    flush(tx)
+    tx['done'] = True
+    _save_journal(tx)
+
+def abort(tx):
+    """Abandonne les pages pas encore remplacées (les autres restent annulables)"""
+    for rel_path in tx['pending']:
+        try:
+            os.remove(os.path.join(tx['site_dir'], rel_path) + ".tmp")
+        except OSError:
+            pass
+    tx['pending'] = []
+
+def rewrite_pages(site_dir, pages, rewrite):
+    """Réécrit des pages dans une transaction, démarrée à la première page modifiée.
+
+    `rewrite(rel_path, content)` renvoie le nouveau contenu d'une page. Une exception
+    arrête la passe: les pages en attente sont abandonnées, celles déjà remplacées
+    s'annulent avec l'instantané (la commande est affichée), et l'exception remonte.
+    Renvoie (pages modifiées, id de l'instantané ou None).
+    """
+    tx = None
+    changed = []
+    try:
+        for rel_path in pages:
+            with open(os.path.join(site_dir, rel_path), 'r', encoding='utf-8') as f:
+                content = f.read()
+            new_content = rewrite(rel_path, content)
+            if new_content != content:
+                if tx is None:
+                    tx = begin_transaction(site_dir)
+                write_page(tx, rel_path, new_content)
+                changed.append(rel_path)
+        if tx is not None:
+            commit(tx)
+    except BaseException:
+        if tx is not None:
+            abort(tx)
+            print(f"\n❌ Passe interrompue: annuler avec `python3 page_writer.py --rollback {tx['snapshot_id']}`")
+        raise
+    return changed, tx['snapshot_id'] if tx is not None else None
+
+def rollback(site_dir, snapshot_id=None):
+    """Restaure les pages d'un instantané (le plus récent par défaut); renvoie (id, nombre de pages)"""
+    snapshots = list_snapshots(site_dir)
+    if snapshot_id is None:
+        if not snapshots:
+            return None
+        snapshot_id = snapshots[-1]
+    snapshot_dir = build_path(site_dir, SNAPSHOTS_DIR, snapshot_id)
+    with open(os.path.join(snapshot_dir, JOURNAL_FILE), 'r', encoding='utf-8') as f:
+        journal = json.load(f)
+
+    for rel_path in journal['changed']:
+        os.replace(os.path.join(snapshot_dir, rel_path), os.path.join(site_dir, rel_path))
+    for rel_path in journal['created']:
+        try:
+            os.remove(os.path.join(site_dir, rel_path))
+        except FileNotFoundError:
+            pass
+    shutil.rmtree(snapshot_dir)
+    return snapshot_id, len(journal['changed']) + len(journal['created'])
+
+def main():
+    parser = argparse.ArgumentParser(description="Instantanés des pages écrites par les scripts")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="racine du site exporté")
+    parser.add_argument('--rollback', nargs='?', const='', metavar='ID',
+                        help="restaure un instantané (le plus récent par défaut)")
+    args = parser.parse_args()
+
+    if args.rollback is None:
+        print("📊 Instantanés disponibles:")
+        for snapshot_id in list_snapshots(args.site_dir):
+            with open(build_path(args.site_dir, SNAPSHOTS_DIR, snapshot_id, JOURNAL_FILE), 'r', encoding='utf-8') as f:
+                journal = json.load(f)
+            state = "terminé" if journal['done'] else "interrompu"
+            print(f"   {snapshot_id}  {len(journal['changed']) + len(journal['created']):>5} pages  ({state})")
+        return
+
+    print("🔧 Restauration de l'instantané...")
+    result = rollback(args.site_dir, args.rollback or None)
+    if result is None:
+        print("\n⏭️ Aucun instantané à restaurer")
+    else:
+        print(f"\n✅ {result[1]} pages restaurées (instantané {result[0]})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Script pour précompresser les fichiers texte du site.
+Chaque page HTML, feuille de style, script, image SVG et fichier JSON reçoit à côté d'elle une
+version gzip (.gz) et, si le module brotli est installé, Brotli (.br), au niveau
+maximal: le serveur (gzip_static/brotli_static, hébergeur) envoie directement ces
+octets, sans compresser à chaque requête. Seuls les fichiers dont le contenu a changé
+sont recompressés (.build/compressed.json), en parallèle sur tous les cœurs; un
+contenu identique (copie hashée d'un asset) n'est compressé qu'une fois.
+
+Le module brotli est optionnel: sans lui, seuls les .gz sont écrits.
+"""
+
+import os
+import gzip
+import json
+import hashlib
+import argparse
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+
+from build_manifest import build_path, file_stat
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+INDEX_FILE = "compressed.json"
+INDEX_VERSION = 1
+
+TEXT_TYPES = ('html', 'css', 'js', 'svg', 'json')
+COMPRESSED_SUFFIXES = ('.gz', '.br')
+# Dossiers qui ne font pas partie du site publié
+IGNORED_DIRS = {'.build', '.git', 'templates'}
+# En dessous, l'en-tête gzip et le temps de décompression coûtent plus que le gain
+MIN_SIZE = 1024
+
+def is_compressed(path):
+    """Version compressée écrite par ce script (x.css.gz, jquery.min.js?ver=3.7.1.br)"""
+    return path.endswith(COMPRESSED_SUFFIXES)
+
+def file_type(path):
+    """Type d'un fichier texte à compresser (html, css, js, svg, json), ou None"""
+    if is_compressed(path):
+        return None
+    # Les assets exportés gardent leur query string: jquery.min.js?ver=3.7.1
+    name = posixpath.basename(path).split('?', 1)[0].lower()
+    ext = posixpath.splitext(name)[1][1:]
+    return ext if ext in TEXT_TYPES else None
+
+def available_encodings():
+    """Encodages produits ici: gzip toujours, Brotli si le module est installé"""
+    return ['gz'] + (['br'] if brotli is not None else [])
+
+def compress(data, encoding):
+    """Compresse au niveau maximal (gzip sans date: même entrée, mêmes octets)"""
+    if encoding == 'gz':
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, quality=11)
+
+def scan_text_files(site_dir):
+    """Fichiers texte du site (chemins relatifs à la racine, triés)"""
+    found = []
+    for root, subdirs, filenames in os.walk(site_dir):
+        subdirs[:] = [d for d in subdirs if d not in IGNORED_DIRS]
+        rel_root = os.path.relpath(root, site_dir).replace(os.sep, '/')
+        rel_root = '' if rel_root == '.' else rel_root
+        found.extend(posixpath.join(rel_root, f) for f in filenames if file_type(f))
+    return sorted(found)
+
+def remove_siblings(site_dir, path, encodings):
+    """Supprime les versions compressées d'un fichier"""
+    for encoding in encodings:
+        try:
+            os.remove(os.path.join(site_dir, f"{path}.{encoding}"))
+        except FileNotFoundError:
+            pass
+
+def compress_file(site_dir, paths, encodings):
+    """Compresse le contenu commun à `paths` et écrit les versions à côté de chacun;
+    renvoie les tailles ({'size', encodage: taille ou None si pas plus petit})"""
+    with open(os.path.join(site_dir, paths[0]), 'rb') as f:
+        data = f.read()
+    sizes = {'size': len(data)}
+    for encoding in encodings:
+        compressed = compress(data, encoding)
+        if len(compressed) >= len(data):
+            sizes[encoding] = None
+            for path in paths:
+                remove_siblings(site_dir, path, [encoding])
+            continue
+        sizes[encoding] = len(compressed)
+        for path in paths:
+            target = os.path.join(site_dir, f"{path}.{encoding}")
+            with open(target + ".tmp", 'wb') as f:
+                f.write(compressed)
+            os.replace(target + ".tmp", target)
+    return sizes
+
+def _compress_task(task):
+    return task[1], compress_file(*task)
+
+def file_hash(path):
+    """Hash du contenu d'un fichier"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_index(site_dir):
+    """Charge l'index des fichiers compressés (vide s'il n'existe pas ou n'est plus compatible)"""
+    try:
+        with open(build_path(site_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    if index.get('version') != INDEX_VERSION:
+        return {'version': INDEX_VERSION, 'files': {}}
+    return index
+
+def save_index(site_dir, index):
+    """Enregistre l'index (écriture dans un fichier temporaire puis renommage)"""
+    path = build_path(site_dir, INDEX_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def siblings_exist(site_dir, path, entry):
+    """Toutes les versions compressées d'une entrée de l'index sont présentes"""
+    return all(os.path.exists(os.path.join(site_dir, f"{path}.{encoding}"))
+               for encoding in available_encodings() if entry.get(encoding))
+
+def precompress_site(site_dir=SITE_DIR):
+    """Compresse les fichiers texte nouveaux ou modifiés; renvoie {'files', 'compressed', 'types'}.
+
+    `types` donne par type de fichier le nombre de fichiers et les octets avant et
+    après compression ({type: {'files', 'size', 'gz', 'br'}}).
+    """
+    index = load_index(site_dir)
+    known = index['files']
+    encodings = available_encodings()
+
+    files = {}
+    pending = {}
+    for path in scan_text_files(site_dir):
+        filepath = os.path.join(site_dir, path)
+        if os.path.getsize(filepath) < MIN_SIZE:
+            if path in known:
+                remove_siblings(site_dir, path, ['gz', 'br'])
+            continue
+        stat = file_stat(filepath)
+        entry = known.get(path)
+        if entry is not None and entry['stat'] != stat:
+            # Fichier réécrit: le hash dit si son contenu a vraiment changé
+            digest = file_hash(filepath)
+            entry = dict(entry, stat=stat) if digest == entry['hash'] else None
+        if (entry is not None and siblings_exist(site_dir, path, entry)
+                and all(encoding in entry for encoding in encodings)):
+            files[path] = entry
+            continue
+        digest = entry['hash'] if entry is not None else file_hash(filepath)
+        pending.setdefault(digest, []).append(path)
+        files[path] = {'stat': stat, 'hash': digest}
+
+    if pending:
+        tasks = [(site_dir, paths, encodings) for paths in pending.values()]
+        with ProcessPoolExecutor() as pool:
+            for paths, sizes in pool.map(_compress_task, tasks):
+                for path in paths:
+                    files[path].update(sizes)
+
+    # Fichiers supprimés (anciennes copies hashées...): leurs versions compressées aussi
+    for path in set(known) - set(files):
+        remove_siblings(site_dir, path, ['gz', 'br'])
+
+    index['files'] = files
+    save_index(site_dir, index)
+
+    types = {}
+    for path, entry in files.items():
+        counters = types.setdefault(file_type(path), {'files': 0, 'size': 0, 'gz': 0, 'br': 0})
+        counters['files'] += 1
+        counters['size'] += entry['size']
+        for encoding in ('gz', 'br'):
+            # Sans version compressée utile, le fichier est servi tel quel
+            counters[encoding] += entry.get(encoding) or entry['size']
+    return {'files': len(files), 'compressed': sum(len(paths) for paths in pending.values()), 'types': types}
+
+def print_report(result):
+    """Affiche le taux de compression par type de fichier"""
+    for file_type_name, counters in sorted(result['types'].items()):
+        ratios = '  '.join(f"{encoding} {counters[encoding] / counters['size']:>5.1%}"
+                           for encoding in available_encodings())
+        print(f"   {file_type_name:<5} {counters['files']:>5} fichiers  {counters['size'] / 1024 / 1024:>6.1f} Mo  -> {ratios}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Précompresse les fichiers texte du site (gzip, Brotli)")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="racine du site exporté")
+    args = parser.parse_args()
+
+    print("🔧 Précompression des fichiers texte...")
+    if brotli is None:
+        print("  ⚠️ Le module brotli n'est pas installé: seuls les .gz sont écrits")
+    result = precompress_site(args.site_dir)
+    print("\n📊 Taille compressée par type de fichier:")
+    print_report(result)
+    print(f"\n✅ {result['compressed']}/{result['files']} fichiers compressés")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Script pour compiler la table des prix des communes utilisée par le simulateur.
+Les prix au m² publiés sur les pages de ville (tout type de bien, maison et
+appartement avec leur fourchette) et la province de chaque commune, tirés du jeu de
+données (city_dataset), sont écrits dans un seul fichier JSON compact,
+wp-content/prix-communes.<hash>.json: le nom change avec le contenu (cache d'un an
+via _headers) et le fichier est précompressé avec les autres fichiers texte.
+
+La page simulateur/index.html ne contenait que le shortcode WordPress non rendu
+([simulateur_immobilier]): il est remplacé par un formulaire (commune, type de bien,
+surface) dont le script charge la table une seule fois, la garde en localStorage
+tant que son nom ne change pas, et calcule l'estimation sans autre requête.
+Une commune peut être présélectionnée par l'URL: simulateur/?commune=<slug>.
+"""
+
+import os
+import re
+import glob
+import html
+import json
+import hashlib
+import argparse
+import posixpath
+
+from build_manifest import build_path
+from city_dataset import load_city_dataset, PROVINCE_NAMES
+from city_index import CITY_ALIASES, normalize_city_name
+from fix_all_links import relative_prefix
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+INDEX_FILE = "price_lookup.json"
+INDEX_VERSION = 1
+
+TABLE_DIR = "wp-content"
+TABLE_PREFIX = "prix-communes."
+# Format des lignes de la table (versionné avec elle)
+TABLE_FORMAT = 1
+TABLE_FIELDS = ['nom', 'province', 'prix', 'maison', 'appartement']
+
+SIMULATOR_PAGE = "simulateur/index.html"
+
+# Shortcode du plugin WordPress, exporté sans être rendu
+SHORTCODE = "<p>[simulateur_immobilier]</p>"
+SIMULATOR_BLOCK_PATTERN = re.compile(r'<!-- simulateur -->.*?<!-- /simulateur -->', re.DOTALL)
+
+SIMULATOR_BLOCK = """<!-- simulateur -->
+<style id='simulator-css'>.simulator{{max-width:520px;margin:20px auto 30px}}.simulator label{{display:block;margin:12px 0 4px;font-weight:bold}}.simulator input,.simulator select{{width:100%;padding:10px 14px;font-size:16px;border:1px solid #28a745;border-radius:5px}}.simulator output{{display:block;margin-top:20px;padding:20px;border:2px solid #ddd;border-radius:10px;background:#f9f9f9;text-align:center;font-size:20px}}.simulator output:empty{{display:none}}.simulator output strong{{display:block;font-size:36px;color:#28a745}}</style>
+<form class="simulator" id="simulator" data-table="{table}" onsubmit="return false">
+<label for="simulator-city">Commune</label>
+<input id="simulator-city" list="simulator-cities" placeholder="Ex: Namur" autocomplete="off" required>
+<datalist id="simulator-cities"></datalist>
+<label for="simulator-type">Type de bien</label>
+<select id="simulator-type"><option value="">Tout type de bien</option><option value="maison">Maison</option><option value="appartement">Appartement</option></select>
+<label for="simulator-surface">Surface habitable (m²)</label>
+<input id="simulator-surface" type="number" min="10" max="2000" step="1" value="120" inputmode="numeric">
+<output id="simulator-result" aria-live="polite"></output>
+</form>
+<script>
+(function () {{
+  var form = document.getElementById('simulator'), city = document.getElementById('simulator-city');
+  var type = document.getElementById('simulator-type'), surface = document.getElementById('simulator-surface');
+  var result = document.getElementById('simulator-result'), path = form.dataset.table, table = null, byName = {{}};
+  var KEY = 'prix-communes';
+  // Même normalisation que normalize_city_name (city_index.py)
+  function normalize(s) {{
+    return s.toLowerCase().replace(/œ/g, 'oe').replace(/æ/g, 'ae').replace(/ß/g, 'ss')
+      .normalize('NFD').replace(/[\\u0300-\\u036f]/g, '').replace(/[^a-z0-9]+/g, '-').replace(/^-+|-+$/g, '');
+  }}
+  function euros(n) {{ return Math.round(n).toLocaleString('fr-BE') + ' €'; }}
+  function ready(data) {{
+    table = data;
+    var options = [];
+    for (var slug in table.communes) {{
+      byName[normalize(table.communes[slug][0])] = slug;
+      options.push('<option value="' + table.communes[slug][0].replace(/"/g, '&quot;') + '">');
+    }}
+    document.getElementById('simulator-cities').innerHTML = options.join('');
+    var wanted = new URLSearchParams(location.search).get('commune');
+    if (wanted && table.communes[wanted]) city.value = table.communes[wanted][0];
+    estimate();
+  }}
+  function load() {{
+    // La table est gardée tant que son nom (hash du contenu) ne change pas
+    try {{
+      var cached = JSON.parse(localStorage.getItem(KEY) || 'null');
+      if (cached && cached.path === path) return ready(cached.data);
+    }} catch (e) {{}}
+    fetch(path).then(function (r) {{ return r.json(); }}).then(function (data) {{
+      try {{ localStorage.setItem(KEY, JSON.stringify({{path: path, data: data}})); }} catch (e) {{}}
+      ready(data);
+    }});
+  }}
+  function estimate() {{
+    if (!table) return;
+    var key = normalize(city.value), slug = byName[key] || table.keys[key] || (table.communes[key] && key);
+    var m2 = parseFloat(surface.value);
+    if (!slug || !(m2 > 0)) {{ result.innerHTML = ''; return; }}
+    var row = table.communes[slug], prices = type.value ? row[table.fields.indexOf(type.value)] : null;
+    var price = prices ? prices[0] : row[2];
+    var ranges = prices ? [prices] : [row[3], row[4]].filter(Boolean);
+    var low = Math.min.apply(null, ranges.map(function (r) {{ return r[1]; }}));
+    var high = Math.max.apply(null, ranges.map(function (r) {{ return r[2]; }}));
+    var html = 'Estimation à ' + row[0] + ' (' + euros(price) + ' / m²)<strong>' + euros(price * m2) + '</strong>';
+    if (ranges.length) html += 'Fourchette: de ' + euros(low * m2) + ' à ' + euros(high * m2);
+    if (row[1]) html += '<br><small>Province: ' + table.provinces[row[1]] + '</small>';
+    result.innerHTML = html;
+  }}
+  [city, type, surface].forEach(function (field) {{ field.addEventListener('input', estimate); }});
+  load();
+}})();
+</script>
+<!-- /simulateur -->"""
+
+def build_price_table(dataset):
+    """Table des prix: {'format', 'fields', 'provinces', 'communes': {slug: ligne}, 'keys': {nom: slug}}"""
+    communes = {}
+    keys = {}
+    for slug, record in sorted(dataset.items()):
+        if record['price_eur'] is None:
+            continue
+        type_prices = record['type_prices']
+        # Texte brut (entités HTML du titre décodées): le nom est comparé à l'option choisie
+        name = html.unescape(record['city_name'] or slug.replace('-', ' ').title())
+        communes[slug] = [name, record['province_slug'], record['price_eur'],
+                          type_prices.get('maison'), type_prices.get('appartement')]
+        if normalize_city_name(name) != slug:
+            keys[normalize_city_name(name)] = slug
+    # Noms néerlandais et officiels (Gent -> gand)
+    for alias, slug in sorted(CITY_ALIASES.items()):
+        if slug in communes and alias not in communes:
+            keys[alias] = slug
+    provinces = {row[1] for row in communes.values() if row[1]}
+    return {
+        'format': TABLE_FORMAT,
+        'fields': TABLE_FIELDS,
+        'provinces': {slug: PROVINCE_NAMES[slug] for slug in sorted(provinces)},
+        'communes': communes,
+        'keys': dict(sorted(keys.items())),
+    }
+
+def render_simulator(rel_path, table_path):
+    """Formulaire et script du simulateur"""
+    return SIMULATOR_BLOCK.format(table=relative_prefix(rel_path) + table_path)
+
+def add_simulator(content, rel_path, table):
+    """Remplace le shortcode du simulateur (ou un simulateur déjà rendu) par le formulaire"""
+    if not table:
+        return content
+    block = render_simulator(rel_path, table['path'])
+    if block in content:
+        return content
+    if SIMULATOR_BLOCK_PATTERN.search(content):
+        return SIMULATOR_BLOCK_PATTERN.sub(lambda m: block, content, count=1)
+    return content.replace(SHORTCODE, block, 1)
+
+def load_index(site_dir):
+    """Charge l'état de la table publiée (vide s'il n'existe pas ou n'est plus compatible)"""
+    try:
+        with open(build_path(site_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    if index.get('version') != INDEX_VERSION:
+        return {'version': INDEX_VERSION, 'path': None}
+    return index
+
+def save_index(site_dir, index):
+    """Enregistre l'état (écriture dans un fichier temporaire puis renommage)"""
+    path = build_path(site_dir, INDEX_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def price_table_data(table):
+    """Contenu du fichier de la table des prix (JSON compact)"""
+    return json.dumps(table, ensure_ascii=False, separators=(',', ':'))
+
+def prepare_price_table(site_dir=SITE_DIR, dataset=None, write=True):
+    """Écrit la table des prix; renvoie {'path', 'communes', 'size'} (None sans commune)"""
+    dataset = dataset if dataset is not None else load_city_dataset(site_dir)
+    table = build_price_table(dataset)
+    if not table['communes']:
+        return None
+    data = price_table_data(table)
+    digest = hashlib.sha256(data.encode('utf-8')).hexdigest()[:10]
+    table_path = posixpath.join(TABLE_DIR, f"{TABLE_PREFIX}{digest}.json")
+
+    if write:
+        path = os.path.join(site_dir, table_path)
+        if not os.path.exists(path):
+            with open(path + ".tmp", 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        # La table précédente reste en place tant que des pages (ou un cache) peuvent y renvoyer
+        index = load_index(site_dir)
+        keep = {table_path, index['path']}
+        for filepath in glob.glob(os.path.join(site_dir, TABLE_DIR, f"{TABLE_PREFIX}*.json")):
+            if posixpath.join(TABLE_DIR, os.path.basename(filepath)) not in keep:
+                os.remove(filepath)
+        index['path'] = table_path
+        save_index(site_dir, index)
+
+    return {'path': table_path, 'communes': len(table['communes']), 'size': len(data.encode('utf-8'))}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile la table des prix des communes du simulateur")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="racine du site exporté")
+    args = parser.parse_args()
+
+    print("🔧 Table des prix des communes...")
+    table = prepare_price_table(args.site_dir)
+    if table is None:
+        print("\n⏭️ Aucune commune dans le jeu de données")
+        return
+    print(f"   {table['communes']} communes, {table['size'] / 1024:.1f} Ko")
+    print(f"\n✅ {table['path']}")
+    print("   le simulateur est mis à jour par build_site.py (transformation simulator)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Instrumentation des transformations (option --profile de build_site.py).
+Une fois activée, mesure le temps par transformation, par page et par motif
+d'expression régulière (nombre d'appels et de correspondances), ainsi que les
+octets lus/écrits. Le résultat est exporté en JSON ou au format Chrome trace
+(chrome://tracing, Perfetto). Désactivée, elle ne coûte qu'un test de booléen
+par transformation. À l'activation, seuls les modules du site sont instrumentés
+(le module re lui-même n'est pas modifié): leurs motifs compilés au chargement
+(FAQ_BLOCK, DIV_PATTERN...) sont remplacés par des motifs mesurés, et leur nom
+`re` par un équivalent mesuré (re.sub('...'), re.compile à l'exécution...).
+Les motifs de la bibliothèque standard n'apparaissent donc pas dans le rapport.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+
+ACTIVE = False
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_state = None
+# Remplacements faits à l'activation: (dictionnaire, clé, valeur d'origine)
+_replaced = []
+
+# Méthodes des motifs mesurées: nom -> nombre de correspondances du résultat
+_PATTERN_METHODS = {
+    'search': lambda result: 1 if result else 0,
+    'match': lambda result: 1 if result else 0,
+    'fullmatch': lambda result: 1 if result else 0,
+    'findall': len,
+    'split': lambda result: len(result) - 1,
+}
+
+def _short(text):
+    """Texte d'un motif, tronqué"""
+    text = str(text)
+    return text if len(text) <= 120 else text[:117] + '...'
+
+def _record_regex(pattern, name, function, seconds, matches):
+    stats = _state['regex'].setdefault(name, {
+        'pattern': _short(pattern.pattern), 'calls': 0, 'matches': 0, 'seconds': 0.0,
+        'functions': {}, 'transforms': {}})
+    stats['calls'] += 1
+    stats['matches'] += matches
+    stats['seconds'] += seconds
+    stats['functions'][function] = stats['functions'].get(function, 0) + 1
+    current = _state['current']
+    if current:
+        stats['transforms'][current] = stats['transforms'].get(current, 0.0) + seconds
+
+class _TimedPattern:
+    """Motif compilé d'un module du site dont les appels sont mesurés
+    (isinstance(motif, re.Pattern) reste vrai)"""
+
+    def __init__(self, pattern, name):
+        self._pattern = pattern
+        self._name = name
+
+    @property
+    def __class__(self):
+        return re.Pattern
+
+    def __getattr__(self, name):
+        return getattr(self._pattern, name)
+
+    def __repr__(self):
+        return repr(self._pattern)
+
+    def _timed(self, function, *args, **kwargs):
+        start = time.perf_counter()
+        result = getattr(self._pattern, function)(*args, **kwargs)
+        _record_regex(self._pattern, self._name, function, time.perf_counter() - start,
+                      _PATTERN_METHODS[function](result))
+        return result
+
+    def search(self, *args, **kwargs):
+        return self._timed('search', *args, **kwargs)
+
+    def match(self, *args, **kwargs):
+        return self._timed('match', *args, **kwargs)
+
+    def fullmatch(self, *args, **kwargs):
+        return self._timed('fullmatch', *args, **kwargs)
+
+    def findall(self, *args, **kwargs):
+        return self._timed('findall', *args, **kwargs)
+
+    def split(self, *args, **kwargs):
+        return self._timed('split', *args, **kwargs)
+
+    def subn(self, repl, string, count=0):
+        start = time.perf_counter()
+        result = self._pattern.subn(repl, string, count)
+        _record_regex(self._pattern, self._name, 'subn', time.perf_counter() - start, result[1])
+        return result
+
+    def sub(self, repl, string, count=0):
+        start = time.perf_counter()
+        result, matches = self._pattern.subn(repl, string, count)
+        _record_regex(self._pattern, self._name, 'sub', time.perf_counter() - start, matches)
+        return result
+
+    def finditer(self, *args, **kwargs):
+        # Le parcours est paresseux: chaque pas est mesuré, l'appel est enregistré à la fin
+        iterator = self._pattern.finditer(*args, **kwargs)
+        seconds = 0.0
+        matches = 0
+        try:
+            while True:
+                start = time.perf_counter()
+                match = next(iterator, None)
+                seconds += time.perf_counter() - start
+                if match is None:
+                    return
+                matches += 1
+                yield match
+        finally:
+            _record_regex(self._pattern, self._name, 'finditer', seconds, matches)
+
+def _unwrap(pattern):
+    return pattern._pattern if type(pattern) is _TimedPattern else pattern
+
+class _TimedRe:
+    """Remplace `re` dans un module du site: les fonctions passent par des motifs mesurés"""
+
+    def __init__(self, module_name):
+        self._module = module_name
+
+    def __getattr__(self, name):
+        return getattr(re, name)
+
+    def _compile(self, pattern, flags, depth):
+        if type(pattern) is _TimedPattern and not flags:
+            return pattern
+        # Motif construit à l'exécution: il est désigné par la ligne qui l'utilise
+        # (les motifs construits par page au même endroit sont regroupés)
+        caller = sys._getframe(depth)
+        return _TimedPattern(re.compile(_unwrap(pattern), flags),
+                             f"{self._module}:{caller.f_lineno} ({caller.f_code.co_name})")
+
+    def compile(self, pattern, flags=0):
+        return self._compile(pattern, flags, 2)
+
+    def search(self, pattern, string, flags=0):
+        return self._compile(pattern, flags, 2).search(string)
+
+    def match(self, pattern, string, flags=0):
+        return self._compile(pattern, flags, 2).match(string)
+
+    def fullmatch(self, pattern, string, flags=0):
+        return self._compile(pattern, flags, 2).fullmatch(string)
+
+    def findall(self, pattern, string, flags=0):
+        return self._compile(pattern, flags, 2).findall(string)
+
+    def finditer(self, pattern, string, flags=0):
+        return self._compile(pattern, flags, 2).finditer(string)
+
+    def split(self, pattern, string, maxsplit=0, flags=0):
+        return self._compile(pattern, flags, 2).split(string, maxsplit)
+
+    def sub(self, pattern, repl, string, count=0, flags=0):
+        return self._compile(pattern, flags, 2).sub(repl, string, count)
+
+    def subn(self, pattern, repl, string, count=0, flags=0):
+        return self._compile(pattern, flags, 2).subn(repl, string, count)
+
+def site_modules():
+    """Modules chargés depuis le dossier des scripts du site (sauf celui-ci)"""
+    modules = []
+    for module in list(sys.modules.values()):
+        path = getattr(module, '__file__', None)
+        if (path and module.__name__ != __name__
+                and os.path.dirname(os.path.abspath(path)) == SCRIPTS_DIR):
+            modules.append(module)
+    return modules
+
+def _replace(container, key, value):
+    _replaced.append((container, key, container[key]))
+    container[key] = value
+
+def _instrument_constants(container, prefix):
+    """Remplace les motifs compilés d'un dictionnaire (ou d'une liste), récursivement"""
+    items = container.items() if isinstance(container, dict) else enumerate(container)
+    for key, value in list(items):
+        name = f"{prefix}[{key!r}]"
+        if type(value) is re.Pattern:
+            _replace(container, key, _TimedPattern(value, name))
+        elif isinstance(value, (dict, list)):
+            _instrument_constants(value, name)
+
+def _instrument_module(module):
+    """Instrumente les constantes (NOM_EN_MAJUSCULES) et le nom `re` d'un module"""
+    namespace = vars(module)
+    name = module.__name__
+    if namespace.get('re') is re:
+        _replace(namespace, 're', _TimedRe(name))
+    for attr, value in list(namespace.items()):
+        if not attr.isupper():
+            continue
+        if type(value) is re.Pattern:
+            _replace(namespace, attr, _TimedPattern(value, f"{name}.{attr}"))
+        elif isinstance(value, (dict, list)):
+            _instrument_constants(value, f"{name}.{attr}")
+
+def enable():
+    """Active l'instrumentation des modules du site"""
+    global ACTIVE, _state
+    if ACTIVE:
+        return
+    _state = {
+        'start': time.perf_counter(),
+        'current': None,
+        'transforms': {},
+        'regex': {},
+        'files': {},
+        'io': {'read_bytes': 0, 'written_bytes': 0, 'pages_read': 0, 'pages_written': 0},
+        'events': [],
+    }
+    for module in site_modules():
+        _instrument_module(module)
+    ACTIVE = True
+
+def disable():
+    """Désactive l'instrumentation (rétablit les motifs d'origine) et renvoie les mesures"""
+    global ACTIVE
+    if not ACTIVE:
+        return _state
+    while _replaced:
+        container, key, original = _replaced.pop()
+        container[key] = original
+    ACTIVE = False
+    return _state
+
+def begin_transform(name):
+    """Marque la transformation en cours (les appels re lui sont attribués)"""
+    _state['current'] = name
+
+def record_transform(name, rel_path, start, seconds, before, after):
+    """Enregistre l'application d'une transformation à une page"""
+    _state['current'] = None
+    stats = _state['transforms'].setdefault(name, {
+        'pages': 0, 'modified': 0, 'skipped': 0, 'seconds': 0.0, 'bytes_delta': 0})
+    stats['pages'] += 1
+    stats['seconds'] += seconds
+    if after != before:
+        stats['modified'] += 1
+        stats['bytes_delta'] += len(after.encode('utf-8')) - len(before.encode('utf-8'))
+    else:
+        stats['skipped'] += 1
+
+    page = _state['files'].setdefault(rel_path, {'seconds': 0.0, 'transforms': {}})
+    page['seconds'] += seconds
+    page['transforms'][name] = seconds
+
+    _state['events'].append({
+        'name': name, 'cat': 'transform', 'ph': 'X', 'pid': 1, 'tid': 1,
+        'ts': (start - _state['start']) * 1e6, 'dur': seconds * 1e6,
+        'args': {'file': rel_path, 'modified': after != before},
+    })
+
+def record_io(kind, content):
+    """Compte les octets lus ('read') ou écrits ('written')"""
+    _state['io'][f'{kind}_bytes'] += len(content.encode('utf-8'))
+    _state['io'][f'pages_{kind}'] += 1
+
+def report(extra=None, top=20):
+    """Mesures agrégées, prêtes pour json.dump"""
+    files = sorted(_state['files'].items(), key=lambda item: -item[1]['seconds'])
+    regex = sorted(_state['regex'].items(), key=lambda item: -item[1]['seconds'])
+    return {
+        'seconds': time.perf_counter() - _state['start'],
+        'io': _state['io'],
+        'transforms': _state['transforms'],
+        'regex': [dict(stats, name=name) for name, stats in regex],
+        'slowest_files': [dict(stats, file=rel_path) for rel_path, stats in files[:top]],
+        'run': extra or {},
+    }
+
+def save(path, fmt='json', extra=None):
+    """Écrit les mesures en JSON ou au format Chrome trace"""
+    data = report(extra)
+    if fmt == 'trace':
+        data = {'traceEvents': _state['events'], 'displayTimeUnit': 'ms', 'otherData': data}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+
+def print_hot_paths(limit=5):
+    """Affiche les motifs d'expressions régulières les plus coûteux"""
+    regex = sorted(_state['regex'].items(), key=lambda item: -item[1]['seconds'])
+    print(f"\n🔍 Motifs les plus coûteux ({len(regex)} motifs):")
+    for name, stats in regex[:limit]:
+        print(f"   {stats['seconds'] * 1000:>8.1f} ms  {stats['calls']:>6} appels  {stats['matches']:>6} corresp.  {name[:70]}")
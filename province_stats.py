@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Script pour calculer les statistiques de prix des communes par province.
+Les prix au m² du jeu de données (city_dataset) sont regroupés par province: moyenne,
+médiane, percentiles, écart type, et pour chaque commune son rang, son écart à la
+moyenne et son z-score. Ces chiffres remplacent dans la FAQ des pages de ville la
+phrase « se situe dans la moyenne de la province », écrite pour toutes les communes,
+et alimentent un encadré sur chaque page de province.
+
+Avec NumPy, tout est calculé en une passe vectorisée (tri par province puis prix,
+sommes par groupe, recherche dichotomique pour les rangs): 1 ms pour les 580
+communes, quelques dizaines de millisecondes pour 20 000 entrées (surtout la création
+des résultats). NumPy est optionnel: sans lui, le même calcul est fait en Python.
+"""
+
+import bisect
+import argparse
+import statistics
+
+from city_dataset import load_city_dataset, PROVINCE_NAMES
+from fix_all_links import relative_prefix
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+QUANTILES = {'p10': 0.10, 'p25': 0.25, 'median': 0.50, 'p75': 0.75, 'p90': 0.90}
+# Écart à la moyenne (en écarts types) en deçà duquel une commune est « dans la moyenne »
+AVERAGE_Z = 0.5
+# Au-delà: parmi les communes les plus chères (ou les plus abordables)
+EXTREME_Z = 1.5
+
+# Encadré des pages de province, avant la liste des communes
+PROVINCE_STATS_START = '<!-- statistiques-province -->'
+PROVINCE_STATS_END = '<!-- /statistiques-province -->'
+PROVINCE_LIST = '<div class="province-section">'
+ARTICLE_END = '\t\t\t</div>\n\t\t\t\t\t</div>\n\t</article>'
+
+def price_entries(dataset):
+    """Communes dont la province et le prix sont connus: [(slug, province, prix)], dans
+    l'ordre du jeu de données (trié par slug: à prix égal, la première commune par slug)"""
+    return [(slug, record['province_slug'], record['price_eur'])
+            for slug, record in dataset.items()
+            if record['province_slug'] and record['price_eur']]
+
+def _province_stats_numpy(entries):
+    """Calcul vectorisé: un tableau par colonne, groupes contigus après tri"""
+    slugs = [slug for slug, province, price in entries]
+    provinces, codes = np.unique([province for slug, province, price in entries], return_inverse=True)
+    prices = np.array([price for slug, province, price in entries], dtype=np.int64)
+
+    # Tri par province puis par prix: chaque province occupe une tranche [début, fin)
+    order = np.lexsort((prices, codes))
+    sorted_prices = prices[order].astype(float)
+    counts = np.bincount(codes, minlength=len(provinces))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    ends = starts + counts
+
+    means = np.bincount(codes, weights=prices, minlength=len(provinces)) / counts
+    squares = np.bincount(codes, weights=prices.astype(float) ** 2, minlength=len(provinces)) / counts
+    stds = np.sqrt(np.maximum(squares - means ** 2, 0))
+
+    def quantile(q):
+        # Interpolation linéaire entre les deux valeurs encadrantes (comme numpy.percentile)
+        position = q * (counts - 1)
+        offset = np.floor(position)
+        low = starts + offset.astype(np.int64)
+        high = np.minimum(low + 1, ends - 1)
+        return sorted_prices[low] + (sorted_prices[high] - sorted_prices[low]) * (position - offset)
+
+    quantiles = {name: quantile(q) for name, q in QUANTILES.items()}
+
+    # Rangs: clés (province, prix) triées, communes plus chères / moins chères par dichotomie
+    keys = codes.astype(np.int64) * (int(prices.max()) + 1) + prices
+    sorted_keys = keys[order]
+    higher = ends[codes] - np.searchsorted(sorted_keys, keys, side='right')
+    lower = np.searchsorted(sorted_keys, keys, side='left') - starts[codes]
+    spread = np.where(stds[codes] > 0, stds[codes], 1)
+    z_scores = (prices - means[codes]) / spread
+    diffs = (prices / means[codes] - 1) * 100
+
+    province_stats = {}
+    for i, province in enumerate(provinces):
+        province_stats[str(province)] = dict(
+            {name: round(float(values[i])) for name, values in quantiles.items()},
+            count=int(counts[i]), mean=round(float(means[i])), std=round(float(stds[i])),
+            min=int(sorted_prices[starts[i]]), max=int(sorted_prices[ends[i] - 1]),
+            cheapest=slugs[order[starts[i]]], priciest=slugs[order[ends[i] - 1]])
+    # Conversion en listes Python une seule fois (l'accès élément par élément est lent)
+    rows = zip(slugs, provinces[codes].tolist(), prices.tolist(), (higher + 1).tolist(),
+               counts[codes].tolist(), np.rint(lower / counts[codes] * 100).astype(np.int64).tolist(),
+               np.round(z_scores, 2).tolist(), np.round(diffs, 1).tolist())
+    commune_stats = {
+        slug: {'province': province, 'price': price, 'rank': rank, 'count': count,
+               'percentile': percentile, 'z': z, 'diff': diff}
+        for slug, province, price, rank, count, percentile, z, diff in rows
+    }
+    return province_stats, commune_stats
+
+def _quantile(values, q):
+    """Quantile d'une liste triée (interpolation linéaire)"""
+    position = q * (len(values) - 1)
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+def _province_stats_python(entries):
+    """Même calcul sans NumPy"""
+    groups = {}
+    for slug, province, price in entries:
+        groups.setdefault(province, []).append((price, slug))
+
+    province_stats = {}
+    commune_stats = {}
+    for province, group in sorted(groups.items()):
+        group.sort()
+        values = [price for price, slug in group]
+        mean = statistics.fmean(values)
+        std = statistics.pstdev(values)
+        province_stats[province] = dict(
+            {name: round(_quantile(values, q)) for name, q in QUANTILES.items()},
+            count=len(values), mean=round(mean), std=round(std), min=values[0], max=values[-1],
+            cheapest=group[0][1], priciest=group[-1][1])
+        for price, slug in group:
+            lower = bisect.bisect_left(values, price)
+            higher = len(values) - bisect.bisect_right(values, price)
+            commune_stats[slug] = {
+                'province': province, 'price': price, 'rank': higher + 1, 'count': len(values),
+                'percentile': round(lower / len(values) * 100),
+                'z': round((price - mean) / (std or 1), 2), 'diff': round((price / mean - 1) * 100, 1),
+            }
+    return province_stats, commune_stats
+
+def compute_province_stats(dataset):
+    """Statistiques par province et par commune: {'provinces': {...}, 'communes': {...}}"""
+    entries = price_entries(dataset)
+    if not entries:
+        return {'provinces': {}, 'communes': {}}
+    compute = _province_stats_numpy if np is not None else _province_stats_python
+    province_stats, commune_stats = compute(entries)
+    return {'provinces': province_stats, 'communes': commune_stats}
+
+def format_price(value):
+    """Prix affiché comme sur les pages (2 216)"""
+    return f"{value:,}".replace(',', ' ')
+
+def ordinal(rank):
+    """Rang abrégé (1er, 2e...)"""
+    return "1er" if rank == 1 else f"{rank}e"
+
+def province_comparison(city_name, slug, stats):
+    """Réponse de la FAQ « Les prix sont-ils élevés par rapport au reste de la province ? »,
+    ou None si la commune n'a pas de statistiques"""
+    commune = stats['communes'].get(slug) if stats else None
+    if commune is None:
+        return None
+    province = stats['provinces'][commune['province']]
+    province_name = PROVINCE_NAMES[commune['province']]
+    z = commune['z']
+    if abs(z) < AVERAGE_Z:
+        position = f"se situe dans la moyenne de la province de {province_name}"
+    elif z >= EXTREME_Z:
+        position = f"fait partie des communes les plus chères de la province de {province_name}"
+    elif z > 0:
+        position = f"est plus chère que la moyenne de la province de {province_name}"
+    elif z <= -EXTREME_Z:
+        position = f"fait partie des communes les plus abordables de la province de {province_name}"
+    else:
+        position = f"est moins chère que la moyenne de la province de {province_name}"
+    diff = commune['diff']
+    return (f"Avec {format_price(commune['price'])} € / m², {city_name} {position} "
+            f"({diff:+.0f} % par rapport à la moyenne de {format_price(province['mean'])} € / m², "
+            f"médiane de {format_price(province['median'])} €). "
+            f"Elle se classe au {ordinal(commune['rank'])} rang des {commune['count']} communes de la province, "
+            f"de la plus chère à la plus abordable. Pour une comparaison détaillée, consultez notre page "
+            f"sur les prix au m² dans la province.")
+
+def province_page_slug(rel_path):
+    """Province d'une page de province (prix-m2-liege/index.html -> liege)"""
+    return rel_path.split('/')[0][len('prix-m2-'):]
+
+def render_province_stats(rel_path, stats, dataset):
+    """Encadré des statistiques d'une page de province, ou None sans données"""
+    province = stats['provinces'].get(province_page_slug(rel_path)) if stats else None
+    if province is None:
+        return None
+    prefix = relative_prefix(rel_path)
+    name = PROVINCE_NAMES[province_page_slug(rel_path)]
+
+    def city_link(slug):
+        record = dataset[slug]
+        return f"<a href='{prefix}prix-m2-a-{slug}/'>{record['city_name'] or slug}</a> ({format_price(record['price_eur'])} €)"
+
+    return (f"{PROVINCE_STATS_START}\n"
+            f"<h2>Les prix au m² des communes de la province de {name}</h2>\n"
+            f"<p>Sur les {province['count']} communes de la province de {name}, le prix moyen au m² pour tous les "
+            f"types de biens est de {format_price(province['mean'])} € et la moitié des communes se situent sous "
+            f"{format_price(province['median'])} € (médiane). Une commune sur dix est sous "
+            f"{format_price(province['p10'])} € et une sur dix au-dessus de {format_price(province['p90'])} €; "
+            f"la moitié des communes se situent entre {format_price(province['p25'])} € et "
+            f"{format_price(province['p75'])} €.</p>\n"
+            f"<p>La commune la plus abordable est {city_link(province['cheapest'])}, "
+            f"la plus chère {city_link(province['priciest'])}.</p>\n"
+            f"{PROVINCE_STATS_END}\n")
+
+def add_province_stats(content, rel_path, stats, dataset):
+    """Ajoute (ou met à jour) l'encadré des statistiques d'une page de province"""
+    block = render_province_stats(rel_path, stats, dataset)
+    if block is None or block in content:
+        return content
+    start = content.find(PROVINCE_STATS_START)
+    if start >= 0:
+        end = content.find(PROVINCE_STATS_END, start)
+        if end >= 0:
+            end += len(PROVINCE_STATS_END)
+            if content.startswith('\n', end):
+                end += 1
+            return content[:start] + block + content[end:]
+    position = content.find(PROVINCE_LIST)
+    if position < 0:
+        position = content.find(ARTICLE_END)
+    if position < 0:
+        return content
+    return content[:position] + block + content[position:]
+
+def main():
+    parser = argparse.ArgumentParser(description="Statistiques de prix des communes par province")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="racine du site exporté")
+    args = parser.parse_args()
+
+    print("📊 Statistiques des prix par province...")
+    if np is None:
+        print("  ⚠️ NumPy n'est pas installé: calcul en Python")
+    dataset = load_city_dataset(args.site_dir)
+    stats = compute_province_stats(dataset)
+    for slug, province in sorted(stats['provinces'].items()):
+        print(f"   {PROVINCE_NAMES[slug]:<20} {province['count']:>4} communes  moyenne {province['mean']:>5} €"
+              f"  médiane {province['median']:>5} €  p10-p90 {province['p10']:>5}-{province['p90']:<5} €")
+    missing = [slug for slug in dataset if slug not in stats['communes']]
+    if missing:
+        print(f"  ⚠️ {len(missing)} communes sans province ou sans prix: {', '.join(missing[:10])}")
+    print(f"\n✅ {len(stats['communes'])} communes classées dans {len(stats['provinces'])} provinces")
+
+if __name__ == "__main__":
+    main()
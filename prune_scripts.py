@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Script pour retirer les scripts WordPress inutiles des pages statiques.
+Chaque page charge jQuery, jQuery Migrate, jQuery UI, comment-reply, Bootstrap,
+le script du thème Hestia et le chargeur d'emojis, qu'elle en ait besoin ou non.
+Pour chaque page, les scripts nécessaires sont déduits de son contenu (sélecteurs,
+attributs data-*, formulaires, emojis), avec leurs dépendances; les autres sont
+retirés (avec leurs scripts en ligne associés) et ceux qui restent sont chargés
+avec `defer`. Le rapport donne les octets et requêtes économisés par type de page.
+
+Un script retiré ne revient pas tout seul: si une page gagne un formulaire de
+commentaire, il faut la réexporter depuis WordPress.
+"""
+
+import os
+import re
+import glob
+import argparse
+
+import link_graph
+import fix_province_pages
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+# Scripts connus (id WordPress): contenu de page qui les rend nécessaires (None: seulement
+# comme dépendance d'un autre script) et dépendances.
+# Hestia 3.3.3 et Bootstrap 3 n'utilisent aucune API retirée de jQuery 3: jQuery Migrate
+# n'est utile à aucune page.
+SCRIPTS = {
+    'jquery-core-js': {'requires': None, 'deps': []},
+    'jquery-migrate-js': {'requires': None, 'deps': ['jquery-core-js']},
+    'comment-reply-js': {'requires': re.compile(r'comment-reply-link|id="respond"|<form[^>]*commentform'),
+                         'deps': []},
+    'jquery-ui-core-js': {'requires': re.compile(r'class="[^"]*\bui-'), 'deps': ['jquery-core-js']},
+    'jquery-bootstrap-js': {'requires': re.compile(r'data-(?:toggle|ride|spy|dismiss)='),
+                            'deps': ['jquery-core-js']},
+    'hestia_scripts-js': {'requires': re.compile(r'class="[^"]*\b(?:navbar|hestia-scroll-to-top|dropdown|carousel)\b'),
+                          'deps': ['jquery-core-js']},
+    # Chargeur d'emojis: remplace les emojis par des images sur les navigateurs qui
+    # ne savent pas les afficher
+    'wp-emoji-settings': {'requires': re.compile('[☀-➿\U0001f300-\U0001faff]'), 'deps': []},
+    'wp-emoji-loader': {'requires': None, 'deps': []},
+}
+# Le module du chargeur d'emojis n'a pas d'id: il suit toujours ses réglages
+COMPANIONS = {'wp-emoji-settings': ['wp-emoji-loader']}
+
+SCRIPT_PATTERN = re.compile(r'<script\b([^>]*)>(.*?)</script>\n?', re.DOTALL)
+ID_PATTERN = re.compile(r'\bid="([^"]*)"')
+SRC_PATTERN = re.compile(r'\bsrc="([^"]*)"')
+EMOJI_LOADER_PATTERN = re.compile(r'sourceURL=[^\s]*wp-emoji-loader')
+# Scripts en ligne de WordPress attachés à un script (données, code avant/après)
+INLINE_SUFFIXES = ('-extra', '-before', '-after')
+JQUERY_USAGE_PATTERN = re.compile(r'\bjQuery\b|\$\(')
+NON_CODE_TYPES = ('application/ld+json', 'application/json', 'speculationrules')
+
+CITY_PAGE_PATTERN = re.compile(r'prix-m2-a-[^/]+/index\.html$')
+HUB_PAGE = "estimation-par-ville/index.html"
+SIMULATOR_PAGE = "simulateur/index.html"
+
+def script_key(attrs, body):
+    """Identifiant d'un script: son id WordPress (ou celui du script qu'il accompagne)"""
+    match = ID_PATTERN.search(attrs)
+    if match:
+        script_id = match.group(1)
+        for suffix in INLINE_SUFFIXES:
+            if script_id.endswith(suffix) and script_id[:-len(suffix)] in SCRIPTS:
+                return script_id[:-len(suffix)]
+        return script_id
+    if EMOJI_LOADER_PATTERN.search(body):
+        return 'wp-emoji-loader'
+    return None
+
+def page_features(content):
+    """Contenu de la page sans ses scripts ni ses styles (ce que les scripts manipulent)"""
+    return re.sub(r'<(script|style)\b.*?</\1>', '', content, flags=re.DOTALL)
+
+def needed_scripts(content, scripts):
+    """Scripts connus nécessaires à la page (avec leurs dépendances), et si du code
+    en ligne utilise jQuery"""
+    features = page_features(content)
+    needed = set()
+    for key in scripts:
+        rule = SCRIPTS.get(key)
+        if rule is not None and rule['requires'] is not None and rule['requires'].search(features):
+            needed.add(key)
+            needed.update(COMPANIONS.get(key, []))
+
+    # Code en ligne conservé (script inconnu ou accompagnant un script nécessaire) qui
+    # appelle jQuery dès son exécution: jQuery doit être chargé avant lui, sans defer
+    inline_jquery = any(entry['code'] and not entry['src'] and JQUERY_USAGE_PATTERN.search(entry['body'])
+                        for key, entries in scripts.items() if key not in SCRIPTS or key in needed
+                        for entry in entries)
+    if inline_jquery:
+        needed.add('jquery-core-js')
+
+    pending = list(needed)
+    while pending:
+        key = pending.pop()
+        for dep in SCRIPTS.get(key, {}).get('deps', []):
+            if dep not in needed:
+                needed.add(dep)
+                pending.append(dep)
+    return needed, inline_jquery
+
+def analyze_scripts(content):
+    """Décision pour chaque balise <script> de la page: 'keep', 'defer' ou 'remove'"""
+    scripts = {}
+    for match in SCRIPT_PATTERN.finditer(content):
+        attrs, body = match.groups()
+        key = script_key(attrs, body)
+        src = SRC_PATTERN.search(attrs)
+        entry = {
+            'key': key,
+            'start': match.start(),
+            'end': match.end(),
+            'attrs': attrs,
+            'body': body,
+            'src': src.group(1) if src else None,
+            'code': not any(t in attrs for t in NON_CODE_TYPES),
+        }
+        scripts.setdefault(key, []).append(entry)
+
+    needed, inline_jquery = needed_scripts(content, scripts)
+    decisions = []
+    for key, entries in scripts.items():
+        for entry in entries:
+            if key is not None and key in SCRIPTS and key not in needed:
+                entry['action'] = 'remove'
+            elif (entry['src'] and entry['code'] and not inline_jquery
+                  and 'defer' not in entry['attrs'] and 'async' not in entry['attrs']
+                  and 'type="module"' not in entry['attrs']):
+                # Les scripts différés s'exécutent dans l'ordre du document, avant DOMContentLoaded
+                entry['action'] = 'defer'
+            else:
+                entry['action'] = 'keep'
+            decisions.append(entry)
+    return sorted(decisions, key=lambda entry: entry['start'])
+
+def prune_scripts(content):
+    """Retire les scripts inutiles de la page et diffère les autres"""
+    if '<script' not in content:
+        return content
+    parts = []
+    last = 0
+    for entry in analyze_scripts(content):
+        if entry['action'] == 'keep':
+            continue
+        parts.append(content[last:entry['start']])
+        if entry['action'] == 'defer':
+            tag = content[entry['start']:entry['end']]
+            parts.append(tag.replace(entry['attrs'], entry['attrs'] + ' defer="defer"', 1))
+        last = entry['end']
+    if not parts:
+        return content
+    parts.append(content[last:])
+    return ''.join(parts)
+
+def page_template(rel_path):
+    """Type de page (pour les rapports)"""
+    if CITY_PAGE_PATTERN.search(rel_path):
+        return 'ville'
+    if rel_path in fix_province_pages.PROVINCE_PAGES:
+        return 'province'
+    if rel_path == HUB_PAGE:
+        return 'hub'
+    if rel_path == SIMULATOR_PAGE:
+        return 'simulateur'
+    if rel_path == 'index.html':
+        return 'accueil'
+    return 'autre'
+
+def script_size(site_dir, rel_path, entry):
+    """Octets d'un script: balise, plus le fichier s'il est externe"""
+    size = entry['end'] - entry['start']
+    if entry['src']:
+        path = link_graph.resolve_link(rel_path, entry['src'])
+        if path and os.path.isfile(os.path.join(site_dir, path)):
+            size += os.path.getsize(os.path.join(site_dir, path))
+    return size
+
+def scripts_report(site_dir=SITE_DIR):
+    """Octets et requêtes économisés par type de page ({type: compteurs})"""
+    report = {}
+    for filepath in sorted(glob.glob(os.path.join(site_dir, "**/*.html"), recursive=True)):
+        rel_path = os.path.relpath(filepath, site_dir)
+        with open(filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
+        counters = report.setdefault(page_template(rel_path), {
+            'pages': 0, 'scripts': 0, 'removed': 0, 'deferred': 0, 'bytes': 0, 'requests': 0, 'names': set()})
+        counters['pages'] += 1
+        for entry in analyze_scripts(content):
+            counters['scripts'] += 1
+            if entry['action'] == 'remove':
+                counters['removed'] += 1
+                counters['bytes'] += script_size(site_dir, rel_path, entry)
+                counters['requests'] += 1 if entry['src'] else 0
+                counters['names'].add(entry['key'])
+            elif entry['action'] == 'defer':
+                counters['deferred'] += 1
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse les scripts inutiles des pages")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="racine du site exporté")
+    args = parser.parse_args()
+
+    print("🔍 Analyse des scripts chargés par les pages...")
+    report = scripts_report(args.site_dir)
+
+    print("\n📊 Économies par type de page (transformation prune_scripts de build_site.py):")
+    for template, counters in sorted(report.items()):
+        pages = counters['pages']
+        print(f"   {template:<10} {pages:>4} pages  {counters['removed'] / pages:>4.1f} scripts retirés"
+              f"  {counters['deferred'] / pages:>4.1f} différés  {counters['requests'] / pages:>4.1f} requêtes"
+              f"  {counters['bytes'] / pages / 1024:>6.1f} Ko par page")
+        if counters['names']:
+            print(f"              retirés: {', '.join(sorted(counters['names']))}")
+
+    if not any(c['removed'] or c['deferred'] for c in report.values()):
+        print("\n✅ Aucun script inutile")
+
+if __name__ == "__main__":
+    main()
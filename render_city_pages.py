@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Script pour générer les pages de ville à partir des données.
+Chaque page est rendue en une passe depuis son enregistrement (city_dataset) et le
+modèle précompilé (templates/city_page.tmpl): encadrés de prix, communes voisines
+(les plus proches si leurs coordonnées sont connues), lien vers la province, lien
+vers les autres villes et FAQ en accordéon.
+Seul le cadre WordPress de la page (en-tête, menus, pied de page) est conservé.
+Une page de ville non conforme au modèle (hors pages retouchées à la main,
+city_template.CUSTOM_PAGES) est une erreur: le script se termine avec le code 1.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import page_writer
+from city_dataset import load_city_dataset, nonconforming_pages
+from city_template import load_city_template, find_city_body, render_neighbors, CUSTOM_PAGES
+from add_faq_to_cities import faq_questions
+from convert_faq_to_accordion import ACCORDION_CSS, render_accordion_item
+from province_stats import compute_province_stats, province_comparison
+from city_neighbors import neighbor_links
+from source_pages import read_source_page
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+def render_faq(city_name, price, province, neighbors, comparison=None):
+    """Génère la FAQ personnalisée directement au format accordéon"""
+    items = [render_accordion_item(question, answer)
+             for question, answer in faq_questions(city_name, price, province, neighbors, comparison)]
+    return ('<!-- FAQ personnalisée -->\n'
+            '<div style="margin-top: 40px; padding: 30px; background-color: #f8f9fa; border-radius: 12px;">\n'
+            f'<h2 style="color: #333; margin-bottom: 25px;">Questions fréquentes sur l\'immobilier à {city_name}</h2>\n\n'
+            + '\n\n'.join(items) + '\n</div>')
+
+def render_city_body(record, template=None, stats=None):
+    """Corps de l'article d'une ville, ou None si la page n'est pas conforme au modèle"""
+    fragments = record.get('fragments')
+    if not fragments or not record['city_name']:
+        return None
+    template = template or load_city_template()
+
+    fields = {name: value for name, value in fragments.items() if name != 'neighbor_links'}
+    fields['city_name'] = record['city_name']
+    fields['neighbors_list'] = render_neighbors(neighbor_links(record))
+    comparison = province_comparison(record['city_name'], record['slug'], stats)
+    fields['faq'] = render_faq(record['city_name'], record['price'], record['province'], record['neighbors'],
+                               comparison)
+    return template['template'].substitute(fields)
+
+def render_city_page(content, record, template=None, stats=None):
+    """Remplace le corps de la page par le rendu du modèle (contenu inchangé si non conforme)"""
+    body = render_city_body(record, template, stats)
+    span = find_city_body(content)
+    if body is None or span is None:
+        return content
+
+    start, end = span
+    content = content[:start] + body + content[end:]
+    if 'details summary::-webkit-details-marker' not in content:
+        content = content.replace('</head>', ACCORDION_CSS + '</head>', 1)
+    return content
+
+def render_city_pages(site_dir=SITE_DIR, write=True):
+    """Rend toutes les pages de ville; renvoie les compteurs"""
+    template = load_city_template()
+    dataset = load_city_dataset(site_dir)
+    stats = compute_province_stats(dataset)
+
+    result = {'pages': len(dataset), 'changed': [], 'skipped': [], 'nonconforming': nonconforming_pages(dataset),
+              'errors': [], 'snapshot': None}
+    tx = page_writer.begin_transaction(site_dir) if write else None
+    for slug, record in dataset.items():
+        if record['fragments'] is None:
+            if slug in CUSTOM_PAGES:
+                result['skipped'].append(slug)
+            continue
+
+        filepath = os.path.join(site_dir, record['path'])
+        try:
+            # Styles en ligne et assets d'origine rétablis: build_site.py les regroupera
+            # et les hashera à nouveau
+            content = read_source_page(site_dir, record['path'])
+
+            new_content = render_city_page(content, record, template, stats)
+
+            if new_content != content:
+                result['changed'].append(slug)
+                if write:
+                    page_writer.write_page(tx, record['path'], new_content)
+        except Exception as e:
+            print(f"Erreur {filepath}: {e}")
+            result['errors'].append(slug)
+    if tx is not None:
+        page_writer.commit(tx)
+        result['snapshot'] = tx['snapshot_id']
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère les pages de ville à partir des données")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="racine du site exporté")
+    parser.add_argument('--check', action='store_true',
+                        help="n'écrit rien, liste les pages qui seraient modifiées")
+    args = parser.parse_args()
+
+    print("🔧 Rendu des pages de ville depuis le modèle...")
+
+    start = time.perf_counter()
+    result = render_city_pages(args.site_dir, write=not args.check)
+    elapsed = time.perf_counter() - start
+
+    rendered = result['pages'] - len(result['skipped']) - len(result['nonconforming']) - len(result['errors'])
+    print(f"   {rendered}/{result['pages']} pages rendues ({elapsed:.2f} s)")
+    if result['skipped']:
+        print(f"⏭️ {len(result['skipped'])} pages retouchées à la main, laissées telles quelles")
+
+    if args.check:
+        print(f"\n📊 {len(result['changed'])} pages seraient modifiées")
+        for slug in result['changed'][:10]:
+            print(f"     {slug}")
+    else:
+        print(f"\n✅ {len(result['changed'])} pages modifiées")
+        if result['changed']:
+            print(f"   annuler: python3 page_writer.py --rollback {result['snapshot']}")
+    if result['nonconforming']:
+        print(f"❌ {len(result['nonconforming'])} pages non conformes au modèle, laissées telles quelles: "
+              f"{', '.join(result['nonconforming'][:10])}")
+    if result['errors']:
+        print(f"❌ {len(result['errors'])} erreurs")
+    if result['nonconforming'] or result['errors']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
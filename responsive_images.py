@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Script pour servir des images responsives.
+Chaque image de wp-content/uploads référencée par une page est réencodée en AVIF
+et WebP aux largeurs utiles (téléphones, tablettes, largeur du contenu Hestia en
+1x et 2x), sans dépasser sa largeur réelle. Les variantes sont écrites à côté de
+l'original (image-640w.webp) et indexées dans .build/images.json par hash de la
+source: une image inchangée n'est jamais réencodée. Les balises <img> sont ensuite
+enveloppées dans un <picture> avec des valeurs `sizes` qui correspondent à la mise
+en page réelle (les `sizes` de WordPress annonçaient jusqu'à 6912px). Les attributs
+modifiés de l'<img> gardent leur valeur d'origine (data-orig-*): la transformation
+est réversible (restore_images).
+
+Pillow est optionnel: sans lui, seules les variantes déjà encodées sont utilisées.
+"""
+
+import os
+import re
+import json
+import hashlib
+import argparse
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+
+import link_graph
+from fingerprint_assets import load_originals
+from build_manifest import build_path, file_stat
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+INDEX_FILE = "images.json"
+INDEX_VERSION = 1
+
+UPLOADS_DIR = "wp-content/uploads/"
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Formats modernes, du plus compact au moins compact: (extension, type MIME, qualité)
+FORMATS = [
+    ('avif', 'image/avif', 50),
+    ('webp', 'image/webp', 75),
+]
+
+# Largeur du contenu Hestia (container de 1170px moins les marges) et largeur
+# en dessous de laquelle les colonnes WordPress s'empilent
+CONTENT_WIDTH = 1140
+STACKED_BREAKPOINT = 781
+
+# Téléphones, tablettes, colonnes, contenu en 1x puis en 2x
+VARIANT_WIDTHS = (360, 480, 640, 768, 1140, 1600, 2280)
+
+# Variante redimensionnée par WordPress (image-300x150.png -> image.png)
+WP_SIZE_PATTERN = re.compile(r'-\d+x\d+(?=\.[a-z]+$)', re.I)
+
+# Une image, déjà enveloppée ou non dans un <picture> (le '<' en tête accélère la recherche)
+PICTURE_PATTERN = re.compile(r'<(?:picture>\s*(?:<source [^>]*>\s*)*<)?(img\b[^>]*>)(?:\s*</picture>)?')
+ATTR_PATTERN = re.compile(r'\b(src|srcset|sizes|width|height|style)="([^"]*)"')
+STYLE_WIDTH_PATTERN = re.compile(r'(?:^|;)\s*width:\s*(\d+)px')
+# Image en tête d'une colonne WordPress (largeur fixée par flex-basis, sinon partagée)
+COLUMN_PATTERN = re.compile(r'<div class="wp-block-column [^"]*"(?: style="flex-basis:(\d+)%")?>\s*<figure[^>]*>\s*$')
+
+# <picture> écrit par render_picture (variantes AVIF/WebP, puis l'<img> de repli)
+BUILT_PICTURE_PATTERN = re.compile(
+    r'<picture>(?:<source type="image/(?:avif|webp)" srcset="[^"]*" sizes="[^"]*">)+(<img\b[^>]*>)</picture>')
+# Attribut modifié par render_picture, suivi de sa valeur d'origine
+ORIGINAL_ATTR_PATTERN = re.compile(r'(?<![\w-])(sizes|srcset|width|height)="[^"]*" data-orig-\1="([^"]*)"')
+
+def available_formats():
+    """Formats que Pillow sait encoder ici"""
+    if Image is None:
+        return []
+    extensions = Image.registered_extensions()
+    return [fmt for fmt in FORMATS if f'.{fmt[0]}' in extensions and extensions[f'.{fmt[0]}'] in Image.SAVE]
+
+def variant_path(source, width, ext):
+    """Chemin d'une variante (à côté de l'original)"""
+    stem, _ = posixpath.splitext(source)
+    return f"{stem}-{width}w.{ext}"
+
+def variant_widths(width):
+    """Largeurs encodées pour une image de largeur `width`"""
+    return [w for w in VARIANT_WIDTHS if w < width] + [width]
+
+def file_hash(path):
+    """Hash du contenu d'un fichier"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_index(site_dir):
+    """Charge l'index des variantes (vide s'il n'existe pas ou n'est plus compatible)"""
+    try:
+        with open(build_path(site_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {'version': INDEX_VERSION, 'images': {}}
+    if index.get('version') != INDEX_VERSION:
+        return {'version': INDEX_VERSION, 'images': {}}
+    return index
+
+def save_index(site_dir, index):
+    """Enregistre l'index (écriture dans un fichier temporaire puis renommage)"""
+    path = build_path(site_dir, INDEX_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def referenced_uploads(site_dir):
+    """Images originales de wp-content/uploads référencées par au moins une page"""
+    pages, files, dirs = link_graph.scan_site(site_dir)
+    graph, _ = link_graph.update_graph(site_dir, pages)
+    # Les pages publiées visent les copies hashées (fingerprint_assets)
+    originals = load_originals(site_dir)
+    sources = set()
+    for rel_path, entry in graph['pages'].items():
+        for attr, target in entry['links']:
+            path = link_graph.resolve_link(rel_path, target)
+            path = originals.get(path, path)
+            if not path or not path.startswith(UPLOADS_DIR) or not path.lower().endswith(SOURCE_EXTENSIONS):
+                continue
+            original = WP_SIZE_PATTERN.sub('', path)
+            if original in files:
+                sources.add(original)
+            elif path in files:
+                sources.add(path)
+    return sorted(sources)
+
+def resized_widths(site_dir, source):
+    """Largeur réelle des copies redimensionnées par WordPress (image-2048x1024.png):
+    leur nom ne dit pas toujours vrai quand l'original a été remplacé"""
+    directory, filename = posixpath.split(source)
+    stem, ext = posixpath.splitext(filename)
+    pattern = re.compile(re.escape(stem) + r'-\d+x\d+' + re.escape(ext) + '$')
+    widths = {}
+    for name in sorted(os.listdir(os.path.join(site_dir, directory))):
+        if pattern.match(name):
+            with Image.open(os.path.join(site_dir, directory, name)) as image:
+                widths[posixpath.join(directory, name)] = image.size[0]
+    return widths
+
+def variants_exist(site_dir, source, entry):
+    """Toutes les variantes d'une entrée de l'index sont présentes sur le disque"""
+    return all(os.path.exists(os.path.join(site_dir, variant_path(source, width, ext)))
+               for ext, widths in entry['variants'].items() for width in widths)
+
+def encode_image(site_dir, source, digest, formats):
+    """Encode les variantes d'une image; renvoie son entrée d'index"""
+    with Image.open(os.path.join(site_dir, source)) as image:
+        image.load()
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.mode else 'RGB')
+        width, height = image.size
+        variants = {}
+        for ext, mime, quality in formats:
+            variants[ext] = []
+            for w in variant_widths(width):
+                resized = image if w == width else image.resize((w, round(height * w / width)), Image.LANCZOS)
+                target = os.path.join(site_dir, variant_path(source, w, ext))
+                resized.save(target + ".tmp", format=Image.registered_extensions()[f'.{ext}'], quality=quality)
+                os.replace(target + ".tmp", target)
+                variants[ext].append(w)
+    return {'stat': file_stat(os.path.join(site_dir, source)), 'hash': digest,
+            'width': width, 'height': height, 'variants': variants,
+            'resized': resized_widths(site_dir, source)}
+
+def _encode_task(task):
+    return task[1], encode_image(*task)
+
+def prepare_images(site_dir=SITE_DIR, encode=True):
+    """Met à jour les variantes des images référencées; renvoie ({source: entrée}, nombre encodé).
+
+    Les images à réencoder (nouvelles ou modifiées) sont réparties sur tous les cœurs.
+    Sans Pillow (ou avec encode=False), seules les variantes existantes sont utilisées.
+    """
+    index = load_index(site_dir)
+    known = index['images']
+    formats = available_formats() if encode else []
+    names = sorted(fmt[0] for fmt in formats)
+
+    images = {}
+    tasks = []
+    for source in referenced_uploads(site_dir):
+        path = os.path.join(site_dir, source)
+        entry = known.get(source)
+        if entry is not None and entry['stat'] != file_stat(path) and formats:
+            # Fichier touché: le hash dit s'il a vraiment changé
+            digest = file_hash(path)
+            if digest == entry['hash']:
+                entry['stat'] = file_stat(path)
+            else:
+                entry = None
+        usable = entry is not None and variants_exist(site_dir, source, entry)
+        if usable and (not formats or sorted(entry['variants']) == names):
+            images[source] = entry
+        elif formats:
+            tasks.append((site_dir, source, file_hash(path), formats))
+        elif usable:
+            images[source] = entry
+
+    # Entrées indexées avant la mesure des copies de WordPress (lecture des en-têtes seulement)
+    if Image is not None:
+        for source, entry in images.items():
+            if 'resized' not in entry:
+                entry['resized'] = resized_widths(site_dir, source)
+
+    if tasks:
+        with ProcessPoolExecutor() as pool:
+            for source, entry in pool.map(_encode_task, tasks):
+                old = known.get(source)
+                if old is not None:
+                    # Variantes qui ne sont plus produites (largeur ou format)
+                    for ext, widths in old['variants'].items():
+                        for w in set(widths) - set(entry['variants'].get(ext, [])):
+                            try:
+                                os.remove(os.path.join(site_dir, variant_path(source, w, ext)))
+                            except FileNotFoundError:
+                                pass
+                images[source] = entry
+
+    if encode:
+        index['images'] = {**known, **images} if not formats else images
+        save_index(site_dir, index)
+    return images, len(tasks)
+
+def display_width(attrs, before, source_width):
+    """Largeur d'affichage (px) d'une image et si elle occupe tout l'écran sous 782px"""
+    match = STYLE_WIDTH_PATTERN.search(attrs.get('style', ''))
+    if match:
+        return int(match.group(1)), False
+    column = COLUMN_PATTERN.search(before)
+    if column:
+        basis = int(column.group(1) or 50)
+        return CONTENT_WIDTH * basis // 100, True
+    declared = int(attrs['width']) if attrs.get('width', '').isdigit() else source_width
+    return min(declared, source_width, CONTENT_WIDTH), False
+
+def image_sizes(width, stacked):
+    """Attribut sizes d'une image affichée sur `width` pixels"""
+    if stacked:
+        return f"(max-width: {STACKED_BREAKPOINT}px) 100vw, {width}px"
+    return f"(max-width: {width}px) 100vw, {width}px"
+
+def original_img(img):
+    """Balise <img> d'origine (attributs data-orig-* rétablis)"""
+    if 'data-orig-' not in img:
+        return img
+    return ORIGINAL_ATTR_PATTERN.sub(r'\1="\2"', img)
+
+def fallback_srcset(srcset, rel_path, source, entry):
+    """srcset de l'<img> de repli: chaque fichier avec sa largeur réelle (WordPress annonçait
+    6912w pour un original de 1600px); une largeur déjà citée n'est pas répétée"""
+    widths = dict(entry.get('resized', {}), **{source: entry['width']})
+    candidates = []
+    seen = set()
+    for candidate in srcset.split(','):
+        parts = candidate.split()
+        if not parts:
+            continue
+        width = widths.get(link_graph.resolve_link(rel_path, parts[0]))
+        descriptor = f"{width}w" if width else ' '.join(parts[1:])
+        if descriptor in seen:
+            continue
+        seen.add(descriptor)
+        candidates.append(f"{parts[0]} {descriptor}".rstrip())
+    return ', '.join(candidates)
+
+def render_picture(img, before, rel_path, images):
+    """<picture> d'une balise <img>, ou None si l'image n'a pas de variantes"""
+    img = original_img(img)
+    attrs = dict(ATTR_PATTERN.findall(img))
+    src = attrs.get('src')
+    if not src:
+        return None
+    path = link_graph.resolve_link(rel_path, src)
+    if path is None:
+        return None
+    source = path if path in images else WP_SIZE_PATTERN.sub('', path)
+    entry = images.get(source)
+    if entry is None:
+        return None
+
+    width, stacked = display_width(attrs, before, entry['width'])
+    sizes = image_sizes(width, stacked)
+
+    # Les variantes sont à côté de l'original: même dossier que le src de la page
+    url_dir = posixpath.dirname(src.split('?', 1)[0])
+    sources = []
+    for ext, mime, quality in FORMATS:
+        widths = entry['variants'].get(ext)
+        if not widths:
+            continue
+        srcset = ', '.join(f"{posixpath.join(url_dir, posixpath.basename(variant_path(source, w, ext)))} {w}w"
+                           for w in widths)
+        sources.append(f'<source type="{mime}" srcset="{srcset}" sizes="{sizes}">')
+
+    # L'<img> reste le repli (format d'origine); ses dimensions déclarées ne
+    # dépassent plus celles de l'image réelle
+    changes = {}
+    if 'sizes' in attrs:
+        changes['sizes'] = sizes
+    if 'srcset' in attrs:
+        changes['srcset'] = fallback_srcset(attrs['srcset'], rel_path, source, entry)
+    if attrs.get('width', '').isdigit() and int(attrs['width']) > entry['width']:
+        changes['width'] = str(entry['width'])
+        if 'height' in attrs:
+            changes['height'] = str(entry['height'])
+    for name, value in changes.items():
+        if value != attrs[name]:
+            img = img.replace(f'{name}="{attrs[name]}"', f'{name}="{value}" data-orig-{name}="{attrs[name]}"', 1)
+    return '<picture>' + ''.join(sources) + img + '</picture>'
+
+def rewrite_images(content, rel_path, images):
+    """Enveloppe les images de la page dans des <picture> (AVIF/WebP)"""
+    if not images or '<img' not in content:
+        return content
+
+    def replace(match):
+        picture = render_picture('<' + match.group(1), content[max(0, match.start() - 300):match.start()],
+                                 rel_path, images)
+        return match.group(0) if picture is None else picture
+
+    return PICTURE_PATTERN.sub(replace, content)
+
+def restore_images(content):
+    """Rétablit les <img> d'origine (inverse de rewrite_images)"""
+    if '<picture>' not in content:
+        return content
+    return BUILT_PICTURE_PATTERN.sub(lambda match: original_img(match.group(1)), content)
+
+def main():
+    parser = argparse.ArgumentParser(description="Encode les images du site en AVIF/WebP")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="racine du site exporté")
+    args = parser.parse_args()
+
+    print("🔧 Encodage des images responsives...")
+    if Image is None:
+        print("  ⚠️ Pillow n'est pas installé (pip install Pillow): seules les variantes existantes sont utilisées")
+
+    images, encoded = prepare_images(args.site_dir)
+    before = sum(os.path.getsize(os.path.join(args.site_dir, source)) for source in images)
+    print(f"   {len(images)} images, {encoded} réencodées")
+
+    for ext, mime, quality in FORMATS:
+        total = sum(os.path.getsize(os.path.join(args.site_dir, variant_path(source, entry['width'], ext)))
+                    for source, entry in images.items() if ext in entry['variants'])
+        if total:
+            print(f"📊 {ext}: {total // 1024} Ko en pleine largeur (originaux: {before // 1024} Ko)")
+
+    print("\n✅ Les pages sont réécrites par build_site.py (transformation responsive_images)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,609 @@
+#!/usr/bin/env python3
+"""
+Serveur local de prévisualisation du site, avec reconstruction en mémoire.
+Chaque page demandée est lue sur le disque et passe par les transformations de
+build_site.py, sans rien écrire: le résultat reste dans un cache LRU en mémoire
+(taille limitée, --cache-mo), avec sa version gzip et son ETag.
+
+Avec --watch, les pages, les modules Python des scripts, le modèle des pages de ville,
+le fichier des coordonnées et les assets du thème (CSS, JS, polices, images) sont
+surveillés. Une page modifiée est retransformée
+seule (et le jeu de données des villes mis à jour si besoin); un module modifié est
+rechargé avec les modules qui en dépendent, et seules les transformations dont le
+code a changé sont réappliquées, à partir de la sortie de l'étape précédente gardée
+en cache. Les pages déjà affichées sont retransformées dès la modification: la page
+est à jour en quelques dizaines de millisecondes.
+
+Les fichiers statiques sont servis tels quels (gzip pour les fichiers texte), avec
+un cache d'un an pour les assets hashés (comme _headers) et une revalidation
+(ETag) pour le reste. Les fichiers que build_site.py écrirait (copies hashées des
+assets, feuille site-styles, index de recherche et table des prix) sont servis depuis
+la mémoire: la prévisualisation fonctionne sur un site qui n'a jamais été construit. La racine du site est --site-dir, sinon la variable
+d'environnement SITE_DIR, sinon le dossier de ce script.
+"""
+
+import os
+import sys
+import gzip
+import time
+import inspect
+import hashlib
+import argparse
+import importlib
+import mimetypes
+import posixpath
+import threading
+import traceback
+from collections import OrderedDict
+from urllib.parse import urlsplit, unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import build_site
+import city_dataset
+import city_template
+import city_neighbors
+import responsive_images
+import hoist_styles
+import fingerprint_assets
+import city_search
+import price_lookup
+import precompress
+from build_manifest import file_stat
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SITE_DIR = os.environ.get("SITE_DIR", SCRIPT_DIR)
+
+CACHE_MB = 256
+# Intervalle de surveillance des fichiers, et de recherche des pages ajoutées ou supprimées
+WATCH_INTERVAL = 0.05
+SCAN_INTERVAL = 2.0
+
+# Dossiers qui ne font pas partie du site publié
+IGNORED_DIRS = {'.build', '.git', 'templates'}
+NO_CACHE = "no-cache"
+GZIP_LEVEL = 6
+
+# Données partagées des transformations et modules dont elles dépendent (recalculées
+# quand un de ces modules est rechargé)
+PART_MODULES = {
+    'dataset': ('city_dataset', 'city_neighbors', 'city_template'),
+    'images': ('responsive_images',),
+    'styles': ('hoist_styles',),
+    'search': ('city_search',),
+    'price_table': ('price_lookup',),
+    'assets': ('fingerprint_assets',),
+}
+# La recherche et la table des prix sont tirées du jeu de données
+DATASET_PARTS = ('dataset', 'search', 'price_table')
+
+def local_modules(script_dir):
+    """Modules des scripts chargés dans ce processus ({nom: module})"""
+    modules = {}
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, '__file__', None)
+        # Le script lancé (__main__, et son alias __mp_main__) n'est pas rechargé
+        if name != '__main__' and module.__name__ == name and path and os.path.dirname(os.path.abspath(path)) == script_dir:
+            modules[name] = module
+    return modules
+
+def module_dependencies(modules):
+    """Modules des scripts utilisés par chaque module ({nom: {noms}}), d'après ses
+    imports (module ou fonction importée)"""
+    dependencies = {}
+    for name, module in modules.items():
+        used = set()
+        for value in list(vars(module).values()):
+            ref = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+            if ref in modules and ref != name:
+                used.add(ref)
+        dependencies[name] = used
+    return dependencies
+
+def reload_order(changed, dependencies):
+    """Modules à recharger: les modules modifiés et ceux qui en dépendent,
+    chaque module après ceux qu'il utilise"""
+    dependents = {}
+    for name, used in dependencies.items():
+        for ref in used:
+            dependents.setdefault(ref, set()).add(name)
+    affected = set()
+    stack = list(changed)
+    while stack:
+        name = stack.pop()
+        if name not in affected:
+            affected.add(name)
+            stack.extend(dependents.get(name, ()))
+
+    order = []
+    visited = set()
+
+    def visit(name):
+        if name in visited:
+            return
+        visited.add(name)
+        for ref in sorted(dependencies.get(name, ())):
+            if ref in affected:
+                visit(ref)
+        order.append(name)
+
+    for name in sorted(affected):
+        visit(name)
+    return order
+
+def data_files(preview):
+    """Fichiers de données surveillés: modèles des pages et coordonnées des communes"""
+    templates = os.path.dirname(city_template.TEMPLATE_FILE)
+    paths = [os.path.join(templates, f) for f in sorted(os.listdir(templates))] if os.path.isdir(templates) else []
+    return paths + [city_neighbors.centroids_path(preview['site_dir'])]
+
+def safe_stat(path):
+    """Empreinte d'un fichier, None s'il n'existe pas"""
+    try:
+        return file_stat(path)
+    except OSError:
+        return None
+
+def prepare_parts(preview, parts):
+    """Recalcule les données partagées demandées puis le contexte des transformations"""
+    site_dir = preview['site_dir']
+    if 'dataset' in parts:
+        preview['dataset'] = city_dataset.refresh_city_dataset(site_dir)
+    if 'images' in parts:
+        # Sans encodage: les variantes manquantes ne sont pas créées (build_site.py s'en charge)
+        preview['images'] = responsive_images.prepare_images(site_dir, encode=False)[0]
+    if 'styles' in parts:
+        preview['styles'] = hoist_styles.prepare_styles(site_dir, sorted(preview['pages']), {}, write=False)
+    if 'search' in parts:
+        preview['search'] = city_search.prepare_search_index(site_dir, preview['dataset'], write=False)
+    if 'price_table' in parts:
+        preview['price_table'] = price_lookup.prepare_price_table(site_dir, preview['dataset'], write=False)
+    if 'assets' in parts:
+        preview['assets'] = fingerprint_assets.prepare_assets(site_dir, write=False)
+        sources = preview['assets']['manifest'] if preview['assets'] else {}
+        preview['asset_files'] = {path: safe_stat(os.path.join(site_dir, path)) for path in sources}
+    preview['generated'] = generated_files(preview)
+    update_context(preview)
+
+def generated_files(preview):
+    """Fichiers liés par les pages transformées mais écrits seulement par build_site.py:
+    {chemin relatif: (donnée partagée, asset d'origine pour une copie hashée)}"""
+    files = {}
+    if preview['assets']:
+        files.update((hashed, ('assets', original)) for original, hashed in preview['assets']['manifest'].items())
+    if preview['styles']:
+        files[preview['styles']['stylesheet']] = ('styles', None)
+    for part in ('search', 'price_table'):
+        if preview[part]:
+            files[preview[part]['path']] = (part, None)
+    return files
+
+def update_context(preview):
+    """Reconstruit le contexte des transformations (build_site.build_context)"""
+    wp_ids = {record['path']: record['wp_id'] for record in preview['dataset'].values()}
+    wp_ids.update(preview['wp_ids'])
+    preview['context'] = build_site.build_context(
+        preview['site_dir'], wp_ids, preview['dataset'], preview['images'], preview['styles'],
+        preview['assets'], preview['search'], preview['price_table'])
+
+def open_preview(site_dir, cache_mb=CACHE_MB):
+    """État du serveur: pages, données partagées, contexte et cache des pages rendues"""
+    pages = build_site.collect_pages(site_dir)
+    preview = {
+        'site_dir': site_dir,
+        'pages': {rel_path: safe_stat(os.path.join(site_dir, rel_path)) for rel_path in pages},
+        'wp_ids': {},
+        'cache': OrderedDict(),
+        'cache_size': 0,
+        'cache_limit': cache_mb * 1024 * 1024,
+        'lock': threading.RLock(),
+        'scanned': time.monotonic(),
+    }
+    for rel_path in pages:
+        if build_site.is_main_page(rel_path):
+            preview['wp_ids'][rel_path] = city_dataset.extract_wp_id(read_file(site_dir, rel_path))
+    preview['modules'] = {name: safe_stat(module.__file__) for name, module in local_modules(SCRIPT_DIR).items()}
+    preview['data_files'] = {path: safe_stat(path) for path in data_files(preview)}
+    prepare_parts(preview, set(PART_MODULES))
+    return preview
+
+def read_file(site_dir, rel_path):
+    """Contenu d'une page du site"""
+    with open(os.path.join(site_dir, rel_path), 'r', encoding='utf-8') as f:
+        return f.read()
+
+def entry_size(entry):
+    """Mémoire occupée par une page en cache (les étapes sans effet partagent leur texte)"""
+    texts = {id(text): len(text) for text in [entry['source']] + [stage[2] for stage in entry['stages']]}
+    return sum(texts.values()) + len(entry['body']) + len(entry['gzip'] or b'')
+
+def cache_remove(preview, key):
+    """Retire une entrée du cache (et sa taille du total)"""
+    old = preview['cache'].pop(key, None)
+    if old is not None:
+        preview['cache_size'] -= old['size']
+
+def cache_put(preview, key, entry):
+    """Ajoute une entrée au cache, en retirant les moins récemment utilisées au-delà de la limite"""
+    cache = preview['cache']
+    cache_remove(preview, key)
+    entry['size'] = entry_size(entry)
+    cache[key] = entry
+    preview['cache_size'] += entry['size']
+    while preview['cache_size'] > preview['cache_limit'] and len(cache) > 1:
+        evicted_key, evicted = cache.popitem(last=False)
+        preview['cache_size'] -= evicted['size']
+
+def compress(data):
+    """Version gzip d'une réponse (None si trop petite pour y gagner)"""
+    if len(data) < precompress.MIN_SIZE:
+        return None
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+def render_page(preview, rel_path):
+    """Page transformée en mémoire: entrée du cache {'body', 'gzip', 'etag', ...}.
+
+    Si seule une partie des transformations a changé depuis le dernier rendu (même
+    page, même contexte), le rendu reprend à la première transformation modifiée.
+    """
+    context = preview['context']
+    stat = safe_stat(os.path.join(preview['site_dir'], rel_path))
+    transforms = [t for t in build_site.TRANSFORMS if t['applies_to'](rel_path)]
+    # Une étape change avec le code de la transformation ou les données qu'elle lit
+    steps = [(t['name'], (t['version'], build_site.transform_data(t, rel_path, context))) for t in transforms]
+    entry = preview['cache'].get(rel_path)
+
+    keep = 0
+    if entry is not None and entry['stat'] == stat and entry['context'] == context['hash']:
+        if [stage[:2] for stage in entry['stages']] == steps:
+            preview['cache'].move_to_end(rel_path)
+            entry['rerun'] = 0
+            return entry
+        while keep < min(len(steps), len(entry['stages'])) and entry['stages'][keep][:2] == steps[keep]:
+            keep += 1
+        source = entry['source']
+        stages = entry['stages'][:keep]
+    else:
+        source = read_file(preview['site_dir'], rel_path)
+        stages = []
+
+    content = stages[-1][2] if stages else source
+    for t, step in zip(transforms[keep:], steps[keep:]):
+        content = t['func'](content, rel_path, context)
+        stages.append(step + (content,))
+
+    body = content.encode('utf-8')
+    entry = {
+        'stat': stat,
+        'context': context['hash'],
+        'source': source,
+        'stages': stages,
+        'body': body,
+        'gzip': compress(body),
+        'etag': '"' + hashlib.sha256(body).hexdigest()[:16] + '"',
+        'rerun': len(transforms) - keep,
+    }
+    cache_put(preview, rel_path, entry)
+    return entry
+
+def static_entry(preview, filepath):
+    """Fichier statique (et sa version gzip pour les fichiers texte), mis en cache"""
+    stat = safe_stat(filepath)
+    key = ('static', filepath)
+    entry = preview['cache'].get(key)
+    if entry is not None and entry['stat'] == stat:
+        preview['cache'].move_to_end(key)
+        return entry
+    with open(filepath, 'rb') as f:
+        body = f.read()
+    entry = {
+        'stat': stat,
+        'source': '',
+        'stages': [],
+        'body': body,
+        'gzip': compress(body) if precompress.file_type(filepath) else None,
+        'etag': f'"{stat[0]:x}-{stat[1]:x}"',
+    }
+    cache_put(preview, key, entry)
+    return entry
+
+def generated_content(preview, rel_path):
+    """Contenu d'un fichier généré, tel que build_site.py l'écrirait"""
+    part, original = preview['generated'][rel_path]
+    if part == 'assets':
+        with open(os.path.join(preview['site_dir'], original), 'rb') as f:
+            data = f.read()
+        if fingerprint_assets.clean_name(original).lower().endswith('.css'):
+            # Comme prepare_assets: les url() de la feuille visent les copies hashées
+            css = fingerprint_assets.rewrite_references(data.decode('utf-8'), original, preview['assets']['manifest'])
+            data = css.encode('utf-8')
+        return data
+    if part == 'styles':
+        return preview['styles']['css'].encode('utf-8')
+    if part == 'search':
+        return city_search.search_index_data(preview['dataset']).encode('utf-8')
+    return price_lookup.price_table_data(price_lookup.build_price_table(preview['dataset'])).encode('utf-8')
+
+def generated_entry(preview, rel_path):
+    """Fichier généré servi depuis la mémoire (son nom dépend de son contenu), mis en cache;
+    None s'il n'est plus lié (données recalculées depuis la requête)"""
+    if rel_path not in preview['generated']:
+        return None
+    part, original = preview['generated'][rel_path]
+    stat = safe_stat(os.path.join(preview['site_dir'], original)) if original else None
+    key = ('generated', rel_path)
+    entry = preview['cache'].get(key)
+    if entry is not None and entry['stat'] == stat:
+        preview['cache'].move_to_end(key)
+        return entry
+    body = generated_content(preview, rel_path)
+    entry = {
+        'stat': stat,
+        'source': '',
+        'stages': [],
+        'body': body,
+        'gzip': compress(body) if precompress.file_type(rel_path) else None,
+        'etag': '"' + hashlib.sha256(body).hexdigest()[:16] + '"',
+    }
+    cache_put(preview, key, entry)
+    return entry
+
+def reload_modules(changed):
+    """Recharge les modules modifiés et leurs dépendants; renvoie les données à recalculer"""
+    modules = local_modules(SCRIPT_DIR)
+    order = reload_order(changed, module_dependencies(modules))
+    for name in order:
+        importlib.reload(modules[name])
+    parts = {part for part, names in PART_MODULES.items() if set(names) & set(order)}
+    if 'dataset' in parts:
+        parts.update(DATASET_PARTS)
+    return order, parts
+
+def check_changes(preview):
+    """Applique les modifications du disque; renvoie les messages à afficher"""
+    site_dir = preview['site_dir']
+    messages = []
+    start = time.perf_counter()
+
+    # 1. Modules des scripts: rechargés avec leurs dépendants
+    changed_modules = [name for name, stat in preview['modules'].items()
+                       if name in sys.modules and safe_stat(sys.modules[name].__file__) != stat]
+    parts = set()
+    if changed_modules:
+        try:
+            order, parts = reload_modules(changed_modules)
+        except Exception:
+            messages.append(f"❌ Rechargement de {', '.join(sorted(changed_modules))}:\n{traceback.format_exc()}")
+            order = []
+        preview['modules'].update((name, safe_stat(sys.modules[name].__file__)) for name in changed_modules)
+        if order:
+            messages.append(f"🔄 modules rechargés: {', '.join(order)}")
+
+    # 2. Modèles et coordonnées: le jeu de données est recalculé
+    changed_data = [path for path, stat in preview['data_files'].items() if safe_stat(path) != stat]
+    if changed_data:
+        city_template.load_city_template.cache_clear()
+        preview['data_files'] = {path: safe_stat(path) for path in data_files(preview)}
+        parts.update(DATASET_PARTS)
+        messages.append(f"🔄 données modifiées: {', '.join(os.path.basename(p) for p in changed_data)}")
+
+    # 3. Assets du thème: noms hashés, contexte (CSS critique) et pages recalculés
+    changed_assets = [path for path, stat in preview['asset_files'].items()
+                      if safe_stat(os.path.join(site_dir, path)) != stat]
+    if changed_assets:
+        parts.add('assets')
+        messages.append(f"🔄 assets modifiés: {', '.join(changed_assets)}")
+
+    # 4. Pages modifiées, ajoutées ou supprimées
+    if time.monotonic() - preview['scanned'] > SCAN_INTERVAL:
+        preview['scanned'] = time.monotonic()
+        found = set(build_site.collect_pages(site_dir))
+        for rel_path in found - set(preview['pages']):
+            preview['pages'][rel_path] = None
+    changed_pages = []
+    for rel_path, stat in list(preview['pages'].items()):
+        new_stat = safe_stat(os.path.join(site_dir, rel_path))
+        if new_stat == stat:
+            continue
+        if new_stat is None:
+            del preview['pages'][rel_path]
+            cache_remove(preview, rel_path)
+            preview['wp_ids'].pop(rel_path, None)
+            messages.append(f"🗑️ {rel_path}")
+            continue
+        preview['pages'][rel_path] = new_stat
+        changed_pages.append(rel_path)
+
+    if changed_pages:
+        for rel_path in changed_pages:
+            if build_site.is_main_page(rel_path):
+                wp_id = city_dataset.extract_wp_id(read_file(site_dir, rel_path))
+                if preview['wp_ids'].get(rel_path) != wp_id:
+                    preview['wp_ids'][rel_path] = wp_id
+                    # Aucune donnée à recalculer, seulement le contexte
+                    parts.add('wp_ids')
+        if 'dataset' not in parts and any(build_site.is_city_page(p) for p in changed_pages):
+            # Seules les pages de ville modifiées sont réanalysées
+            dataset = city_dataset.refresh_city_dataset(site_dir)
+            if dataset != preview['dataset']:
+                preview['dataset'] = dataset
+                parts.update(('search', 'price_table'))
+
+    try:
+        if parts:
+            prepare_parts(preview, parts)
+    except Exception:
+        messages.append(f"❌ Données partagées:\n{traceback.format_exc()}")
+
+    # 5. Pages déjà affichées: retransformées tout de suite (les pages modifiées d'abord;
+    #    après un rechargement, seules les transformations modifiées sont réappliquées)
+    if changed_modules or changed_data or changed_assets or changed_pages:
+        rendered = [p for p in changed_pages if p in preview['cache']]
+        if changed_modules or changed_assets:
+            rendered += [key for key in preview['cache'] if isinstance(key, str) and key not in rendered]
+        for rel_path in rendered:
+            try:
+                entry = render_page(preview, rel_path)
+            except Exception:
+                messages.append(f"❌ {rel_path}:\n{traceback.format_exc()}")
+                continue
+            if entry['rerun']:
+                messages.append(f"🔄 {rel_path} ({entry['rerun']} transformations)")
+        for rel_path in changed_pages:
+            if rel_path not in rendered:
+                messages.append(f"🔄 {rel_path}")
+        messages.append(f"   à jour en {(time.perf_counter() - start) * 1000:.0f} ms")
+    return messages
+
+def watch(preview, interval=WATCH_INTERVAL):
+    """Surveille les fichiers (boucle du thread de surveillance)"""
+    while True:
+        time.sleep(interval)
+        with preview['lock']:
+            messages = check_changes(preview)
+        for message in messages:
+            print(message)
+
+def resolve(preview, url):
+    """Fichier demandé: ('page', chemin relatif), ('generated', chemin relatif), ('file', chemin),
+    ('redirect', url) ou (None, None)"""
+    parts = urlsplit(url)
+    rel_path = posixpath.normpath(unquote(parts.path)).lstrip('/')
+    if rel_path == '.':
+        rel_path = ''
+    segments = rel_path.split('/')
+    if '..' in segments or segments[0] in IGNORED_DIRS or any(s.startswith('.') for s in segments if s):
+        return None, None
+    filepath = os.path.join(preview['site_dir'], rel_path)
+    if os.path.isdir(filepath):
+        if rel_path and not parts.path.endswith('/'):
+            return 'redirect', parts.path + '/' + (f"?{parts.query}" if parts.query else '')
+        rel_path = posixpath.join(rel_path, 'index.html')
+        filepath = os.path.join(preview['site_dir'], rel_path)
+    if rel_path.endswith('.html') and os.path.isfile(filepath):
+        return 'page', rel_path
+    if rel_path in preview['generated']:
+        return 'generated', rel_path
+    # Assets exportés avec leur query string dans le nom: jquery.min.js?ver=3.7.1
+    if parts.query and os.path.isfile(f"{filepath}?{parts.query}"):
+        return 'file', f"{filepath}?{parts.query}"
+    if os.path.isfile(filepath):
+        return 'file', filepath
+    return None, None
+
+def content_type(path):
+    """Type MIME d'un fichier (sans la query string des assets exportés)"""
+    name = os.path.basename(path).split('?', 1)[0]
+    kind = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if kind.startswith('text/') or kind in ('application/javascript', 'application/json', 'image/svg+xml'):
+        kind += '; charset=utf-8'
+    return kind
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    """Requêtes GET/HEAD du serveur de prévisualisation"""
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body):
+        preview = self.server.preview
+        start = time.perf_counter()
+        kind, target = resolve(preview, self.path)
+        if kind is None:
+            self.send_error(404)
+            return
+        if kind == 'redirect':
+            self.send_response(301)
+            self.send_header('Location', target)
+            self.end_headers()
+            return
+
+        try:
+            with preview['lock']:
+                if kind == 'page':
+                    if target not in preview['pages']:
+                        preview['pages'][target] = safe_stat(os.path.join(preview['site_dir'], target))
+                    entry = render_page(preview, target)
+                elif kind == 'generated':
+                    entry = generated_entry(preview, target)
+                else:
+                    entry = static_entry(preview, target)
+        except Exception:
+            message = traceback.format_exc()
+            print(f"❌ {self.path}:\n{message}")
+            self.send_error(500, explain=message)
+            return
+        if entry is None:
+            self.send_error(404)
+            return
+
+        name = target if kind == 'page' else os.path.basename(target)
+        hashed = fingerprint_assets.HASHED_NAME_PATTERN.search(name.split('?', 1)[0])
+        headers = {
+            'Content-Type': content_type(name),
+            'Cache-Control': fingerprint_assets.IMMUTABLE_CACHE if hashed else NO_CACHE,
+            'ETag': entry['etag'],
+        }
+        if entry['gzip'] is not None:
+            headers['Vary'] = 'Accept-Encoding'
+        if self.headers.get('If-None-Match') == entry['etag']:
+            self.elapsed = time.perf_counter() - start
+            self.send_response(304)
+            for header, value in headers.items():
+                self.send_header(header, value)
+            self.end_headers()
+            return
+
+        body = entry['body']
+        if entry['gzip'] is not None and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = entry['gzip']
+            headers['Content-Encoding'] = 'gzip'
+        headers['Content-Length'] = str(len(body))
+        self.elapsed = time.perf_counter() - start
+        self.send_response(200)
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_request(self, code='-', size='-'):
+        elapsed = getattr(self, 'elapsed', None)
+        timing = f" ({elapsed * 1000:.1f} ms)" if elapsed is not None else ''
+        print(f"   {code} {self.path}{timing}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Prévisualise le site en local, pages transformées en mémoire")
+    parser.add_argument('--site-dir', default=SITE_DIR,
+                        help="racine du site exporté (par défaut: $SITE_DIR, sinon le dossier des scripts)")
+    parser.add_argument('--host', default='127.0.0.1', help="adresse d'écoute")
+    parser.add_argument('--port', type=int, default=8000, help="port d'écoute")
+    parser.add_argument('--watch', action='store_true',
+                        help="surveille les pages et les scripts, et met à jour les pages affichées")
+    parser.add_argument('--cache-mo', type=int, default=CACHE_MB,
+                        help="taille maximale du cache des pages rendues (Mo)")
+    args = parser.parse_args()
+
+    print(f"🔧 Préparation de la prévisualisation de {args.site_dir}...")
+    start = time.perf_counter()
+    preview = open_preview(os.path.abspath(args.site_dir), args.cache_mo)
+    print(f"   {len(preview['pages'])} pages, {len(preview['dataset'])} villes ({time.perf_counter() - start:.2f} s)")
+
+    if args.watch:
+        threading.Thread(target=watch, args=(preview,), daemon=True).start()
+        print(f"🔍 Surveillance des pages et de {len(preview['modules'])} modules")
+
+    server = ThreadingHTTPServer((args.host, args.port), PreviewHandler)
+    server.preview = preview
+    print(f"\n✅ http://{args.host}:{server.server_address[1]}/ (Ctrl+C pour arrêter)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏭️ Arrêt du serveur")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
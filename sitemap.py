@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Script pour générer le sitemap du site (sitemap_index.xml, déjà annoncé par robots.txt).
+Chaque page indexable (ni flux RSS, ni doublon exporté, ni noindex) y figure avec
+une date `lastmod` qui ne change que lorsque son contenu change: le hash porte sur
+le titre, le texte et les liens de la page, pas sur les styles, scripts ou noms
+d'assets que build_site.py réécrit à chaque passe (date de départ: celle publiée
+par WordPress, article:modified_time). L'historique des hash est
+conservé dans .build/sitemap.json: seules les pages dont l'empreinte a changé sont
+relues.
+
+Les URLs sont réparties en fichiers de 50 000 URLs au plus (sitemap-1.xml, ...),
+listés par l'index. Une page garde son fichier d'une passe à l'autre (les nouvelles
+vont dans le dernier): seuls les fichiers dont une page a changé sont réécrits.
+"""
+
+import os
+import re
+import json
+import hashlib
+import argparse
+from datetime import datetime, timezone
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+import link_graph
+from build_manifest import build_path, file_stat
+
+SITE_DIR = "/Users/marc/Desktop/estimation-maison"
+
+INDEX_FILE = "sitemap.json"
+INDEX_VERSION = 1
+
+SITEMAP_INDEX = "sitemap_index.xml"
+SHARD_NAME = "sitemap-{number}.xml"
+# Limite du protocole sitemaps.org (50 000 URLs et 50 Mo par fichier: ~150 octets
+# par URL ici, la limite de taille n'est jamais atteinte)
+MAX_URLS = 50000
+
+XMLNS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+# Date de dernière modification publiée par WordPress (Yoast)
+MODIFIED_TIME_PATTERN = re.compile(r'<meta property="article:modified_time" content="([^"]+)"')
+NOINDEX_PATTERN = re.compile(r'<meta name=["\']robots["\'] content=["\'][^"\']*noindex', re.I)
+TITLE_PATTERN = re.compile(r'<title>(.*?)</title>', re.S)
+BODY_PATTERN = re.compile(r'<body\b.*', re.S)
+NON_CONTENT_PATTERN = re.compile(r'<(script|style|noscript)\b.*?</\1>', re.S)
+ANCHOR_HREF_PATTERN = re.compile(r'<a\b[^>]*?href=["\']([^"\']*)["\']')
+TAG_PATTERN = re.compile(r'<[^>]+>')
+WHITESPACE = re.compile(r'\s+')
+
+def is_candidate(rel_path, pages):
+    """Page publiée sous sa propre URL (pas un flux, pas un doublon de l'export)"""
+    parts = rel_path.split('/')
+    if 'feed' in parts[:-1]:
+        return False
+    # Dossiers "prix-m2-bruxelles." créés par l'export (liens avec un point final)
+    if any(part.endswith('.') for part in parts[:-1]):
+        return False
+    # "prix-m2-namur.html" à côté de "prix-m2-namur/index.html": même page
+    if rel_path.endswith('.html') and not rel_path.endswith('/index.html') and rel_path != 'index.html':
+        if rel_path[:-len('.html')] + '/index.html' in pages:
+            return False
+    return True
+
+def page_url(base_url, rel_path):
+    """URL publique d'une page (dossier/index.html -> dossier/)"""
+    if rel_path == 'index.html':
+        path = ''
+    elif rel_path.endswith('/index.html'):
+        path = rel_path[:-len('index.html')]
+    else:
+        path = rel_path
+    return base_url + quote(path)
+
+def page_text_hash(content):
+    """Hash du contenu d'une page: titre, texte et liens (ni styles, ni scripts, ni assets)"""
+    title = TITLE_PATTERN.search(content)
+    body = BODY_PATTERN.search(content)
+    body = NON_CONTENT_PATTERN.sub('', body.group(0)) if body else ''
+    links = ANCHOR_HREF_PATTERN.findall(body)
+    text = WHITESPACE.sub(' ', TAG_PATTERN.sub(' ', body)).strip()
+    parts = [title.group(1).strip() if title else '', text] + links
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+def mtime_iso(path):
+    """Date de modification d'un fichier (W3C datetime, UTC)"""
+    return datetime.fromtimestamp(os.path.getmtime(path), timezone.utc).replace(microsecond=0).isoformat()
+
+def now_iso():
+    """Date courante (W3C datetime, UTC)"""
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+
+def site_base_url(site_dir):
+    """URL racine du site, d'après le fichier CNAME"""
+    try:
+        with open(os.path.join(site_dir, 'CNAME'), 'r', encoding='utf-8') as f:
+            domain = f.read().strip()
+    except OSError:
+        return None
+    return f"https://{domain}/" if domain else None
+
+def load_index(site_dir):
+    """Charge l'historique du sitemap (vide s'il n'existe pas ou n'est plus compatible)"""
+    try:
+        with open(build_path(site_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    if index.get('version') != INDEX_VERSION:
+        return {'version': INDEX_VERSION, 'base_url': None, 'pages': {}, 'shards': {}}
+    return index
+
+def save_index(site_dir, index):
+    """Enregistre l'historique (écriture dans un fichier temporaire puis renommage)"""
+    path = build_path(site_dir, INDEX_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def write_file(path, text):
+    """Écrit un fichier (fichier temporaire puis renommage)"""
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+
+def render_shard(urls):
+    """Fichier sitemap: [(url, lastmod)]"""
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f'<urlset xmlns="{XMLNS}">']
+    for url, lastmod in urls:
+        lines.append(f"<url><loc>{escape(url)}</loc><lastmod>{lastmod}</lastmod></url>")
+    lines.append('</urlset>')
+    return '\n'.join(lines) + '\n'
+
+def render_sitemap_index(shards):
+    """Index des fichiers sitemap: [(url, lastmod)]"""
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f'<sitemapindex xmlns="{XMLNS}">']
+    for url, lastmod in shards:
+        lines.append(f"<sitemap><loc>{escape(url)}</loc><lastmod>{lastmod}</lastmod></sitemap>")
+    lines.append('</sitemapindex>')
+    return '\n'.join(lines) + '\n'
+
+def assign_shards(shards, paths):
+    """Répartit les pages dans les fichiers: chaque page garde le sien, les nouvelles
+    complètent le dernier ou en ouvrent un nouveau ({numéro: [pages]})"""
+    remaining = set(paths)
+    assigned = {}
+    for number, shard_paths in sorted(shards.items(), key=lambda item: int(item[0])):
+        kept = [p for p in shard_paths if p in remaining]
+        remaining.difference_update(kept)
+        if kept:
+            assigned[number] = kept
+    new_paths = sorted(remaining)
+    while new_paths:
+        last = max(assigned, key=int) if assigned else None
+        if last is None or len(assigned[last]) >= MAX_URLS:
+            last = str(int(last) + 1 if last is not None else 1)
+            assigned[last] = []
+        room = MAX_URLS - len(assigned[last])
+        assigned[last] = assigned[last] + new_paths[:room]
+        new_paths = new_paths[room:]
+    return assigned
+
+def update_sitemap(site_dir=SITE_DIR, base_url=None):
+    """Met à jour le sitemap; renvoie {'urls', 'changed', 'shards', 'written'} (None sans URL racine)"""
+    base_url = base_url or site_base_url(site_dir)
+    if base_url is None:
+        return None
+    base_url = base_url.rstrip('/') + '/'
+
+    index = load_index(site_dir)
+    # Nouvelle URL racine: toutes les <loc> changent
+    rewrite_all = index['base_url'] != base_url
+    known = index['pages']
+    pages, files, dirs = link_graph.scan_site(site_dir)
+    page_set = set(pages)
+
+    updated = {}
+    changed = 0
+    for rel_path in pages:
+        if not is_candidate(rel_path, page_set):
+            continue
+        filepath = os.path.join(site_dir, rel_path)
+        stat = file_stat(filepath)
+        entry = known.get(rel_path)
+        if entry is None or entry['stat'] != stat:
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except Exception as e:
+                print(f"Erreur {rel_path}: {e}")
+                continue
+            digest = page_text_hash(content)
+            if entry is None:
+                # Première apparition: la date de modification publiée par WordPress,
+                # sinon celle du fichier
+                modified = MODIFIED_TIME_PATTERN.search(content)
+                entry = {'lastmod': modified.group(1) if modified else mtime_iso(filepath)}
+                changed += 1
+            elif entry['hash'] != digest:
+                entry = {'lastmod': now_iso()}
+                changed += 1
+            entry = dict(entry, stat=stat, hash=digest, indexable=not NOINDEX_PATTERN.search(content))
+        updated[rel_path] = entry
+    index['pages'] = updated
+
+    indexable = [p for p, entry in updated.items() if entry['indexable']]
+    assigned = assign_shards({number: shard['pages'] for number, shard in index['shards'].items()}, indexable)
+
+    written = 0
+    shards = {}
+    for number, shard_paths in assigned.items():
+        urls = [(page_url(base_url, p), updated[p]['lastmod']) for p in sorted(shard_paths)]
+        digest = hashlib.sha256(json.dumps(urls).encode('utf-8')).hexdigest()
+        filename = SHARD_NAME.format(number=number)
+        old = index['shards'].get(number)
+        if rewrite_all or old is None or old['digest'] != digest or not os.path.exists(os.path.join(site_dir, filename)):
+            write_file(os.path.join(site_dir, filename), render_shard(urls))
+            written += 1
+        shards[number] = {'pages': sorted(shard_paths), 'digest': digest,
+                          'lastmod': max(lastmod for url, lastmod in urls)}
+
+    # Fichiers vidés (toutes leurs pages supprimées)
+    for number in set(index['shards']) - set(shards):
+        try:
+            os.remove(os.path.join(site_dir, SHARD_NAME.format(number=number)))
+        except FileNotFoundError:
+            pass
+
+    index_path = os.path.join(site_dir, SITEMAP_INDEX)
+    if written or set(shards) != set(index['shards']) or not os.path.exists(index_path):
+        entries = [(base_url + SHARD_NAME.format(number=number), shards[number]['lastmod'])
+                   for number in sorted(shards, key=int)]
+        write_file(index_path, render_sitemap_index(entries))
+        written += 1
+
+    index['shards'] = shards
+    index['base_url'] = base_url
+    save_index(site_dir, index)
+    return {'urls': len(indexable), 'changed': changed, 'shards': len(shards), 'written': written}
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère le sitemap du site (mis à jour de façon incrémentale)")
+    parser.add_argument('--site-dir', default=SITE_DIR, help="racine du site exporté")
+    parser.add_argument('--base-url', help="URL racine du site (par défaut: d'après le fichier CNAME)")
+    args = parser.parse_args()
+
+    print("🔧 Mise à jour du sitemap...")
+    result = update_sitemap(args.site_dir, args.base_url)
+    if result is None:
+        print("❌ URL racine inconnue: ajouter un fichier CNAME ou utiliser --base-url")
+        return
+    print(f"   {result['urls']} URLs dans {result['shards']} fichiers, {result['changed']} pages nouvelles ou modifiées")
+    print(f"\n✅ {result['written']} fichiers réécrits ({SITEMAP_INDEX})")
+
+if __name__ == "__main__":
+    main()
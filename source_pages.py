@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Pages sources du site, telles qu'avant les dernières étapes de build_site.py.
+Les pages publiées ont leurs assets hashés (fingerprint_assets), leur CSS critique
+en ligne (critical_css), leurs styles en ligne regroupés dans une feuille partagée
+(hoist_styles) et leurs images dans des <picture> (responsive_images). Les scripts
+qui analysent ou réécrivent les pages (jeu de données, rendu des pages de ville,
+import des prix, benchmark...) travaillent sur la page d'origine: ces quatre étapes
+sont annulées ici, dans l'ordre inverse du build.
+Les index des assets et des styles ne sont relus que s'ils ont changé.
+"""
+
+import os
+
+from build_manifest import build_path, file_stat
+import fingerprint_assets
+import critical_css
+import hoist_styles
+import responsive_images
+
+# Index chargés (par processus): {site: (empreintes, chemins d'origine des assets, styles)}
+_indexes = {}
+
+def _stat(path):
+    try:
+        return file_stat(path)
+    except OSError:
+        return None
+
+def source_indexes(site_dir):
+    """Assets hashés ({chemin hashé: chemin d'origine}) et styles regroupés ({'classes', 'blocks'})"""
+    stats = (_stat(build_path(site_dir, fingerprint_assets.INDEX_FILE)),
+             _stat(build_path(site_dir, hoist_styles.INDEX_FILE)))
+    cached = _indexes.get(site_dir)
+    if cached is None or cached[0] != stats:
+        style_index = hoist_styles.load_index(site_dir)
+        cached = (stats, fingerprint_assets.load_originals(site_dir),
+                  {key: style_index[key] for key in ('classes', 'blocks')})
+        _indexes[site_dir] = cached
+    return cached[1], cached[2]
+
+def restore_source(content, rel_path, site_dir, expand=True):
+    """Page d'origine d'une page publiée: assets d'origine, sans CSS critique et, avec
+    `expand`, avec ses styles en ligne et ses <img> d'origine (sinon telle que la voit
+    critical_css)"""
+    originals, style_index = source_indexes(site_dir)
+    content = critical_css.restore_stylesheets(fingerprint_assets.restore_assets(content, rel_path, originals))
+    if not expand:
+        return content
+    return responsive_images.restore_images(hoist_styles.expand_styles(content, style_index))
+
+def read_source_page(site_dir, rel_path, expand=True):
+    """Lit une page du site et renvoie sa version d'origine (voir restore_source)"""
+    with open(os.path.join(site_dir, rel_path), 'r', encoding='utf-8') as f:
+        return restore_source(f.read(), rel_path, site_dir, expand)